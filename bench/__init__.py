@@ -0,0 +1,11 @@
+# bench/__init__.py
+"""
+Offline benchmarks: run real handler modules against a fake Telegram client
+and a local Mongo stand-in, with synthetic populations.
+
+    python -m bench --members 20000 --groups 8 --scenario all
+    python -m bench --scenario sweep --latency-ms 40 --floodwait-rate 0.01
+    python -m bench --mongo-uri mongodb://localhost:27017/bench   # real local mongod
+
+Nothing here talks to Telegram or Atlas. Needs `mongomock` unless --mongo-uri is given.
+"""
@@ -0,0 +1,85 @@
+# bench/__main__.py
+"""python -m bench --help"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from bench import fake_mongo, populations
+
+
+def _args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="python -m bench", description="Offline handler benchmarks.")
+    p.add_argument("--scenario", action="append", help="scenario name (repeatable); default: all")
+    p.add_argument("--list", action="store_true", help="list scenarios and exit")
+    p.add_argument("--members", type=int, default=10_000)
+    p.add_argument("--groups", type=int, default=4)
+    p.add_argument("--blacklist", type=int, default=5_000)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--latency-ms", type=float, default=0.0, help="mean fake Bot API latency per call")
+    p.add_argument("--floodwait-rate", type=float, default=0.0, help="probability a call raises FloodWait")
+    p.add_argument("--floodwait-seconds", type=int, default=1)
+    p.add_argument("--sleep-scale", type=float, default=0.0,
+                   help="multiply handler asyncio.sleep pacing by this (0 = don't wait, still reported)")
+    p.add_argument("--mongo-uri", help="use a real local mongod instead of mongomock (its Succubot db is overwritten)")
+    p.add_argument("--json", action="store_true", help="print JSON rows instead of a table")
+    p.add_argument("-v", "--verbose", action="store_true")
+    return p.parse_args(argv)
+
+
+async def _main(a: argparse.Namespace, pop: populations.Population) -> list:
+    # handler modules read env and connect to Mongo at import, so they load only now
+    from bench import scenarios
+    from bench.fake_client import FakeClient
+
+    client = FakeClient(
+        latency=a.latency_ms / 1000.0,
+        floodwait_rate=a.floodwait_rate,
+        floodwait_seconds=a.floodwait_seconds,
+        members=pop.by_group,
+        seed=a.seed,
+    )
+    ctx = scenarios.setup(client, pop)
+    import pymongo
+
+    populations.seed(pop, pymongo.MongoClient(a.mongo_uri or "mongodb://bench.invalid/")["Succubot"])
+    scenarios.scale_sleeps(a.sleep_scale)
+
+    names = a.scenario or list(scenarios.SCENARIOS)
+    unknown = [n for n in names if n not in scenarios.SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenario(s): {', '.join(unknown)}")
+    rows = []
+    for name in names:
+        rows.append(await scenarios.run(ctx, name))
+    if a.json:
+        print(json.dumps(rows, indent=2, default=str))
+    else:
+        print(f"members={len(pop.members)} groups={len(pop.groups)} blacklist={len(pop.blacklist)} "
+              f"latency={a.latency_ms}ms floodwait={a.floodwait_rate} mongo={fake_mongo.install(a.mongo_uri)}")
+        print(scenarios.format_report(rows))
+    return rows
+
+
+def main(argv=None) -> int:
+    a = _args(argv)
+    logging.basicConfig(level=logging.INFO if a.verbose else logging.ERROR,
+                        format="%(levelname)s %(name)s: %(message)s")
+    if a.list:
+        # scenario names and docs only; no population, env or Mongo needed
+        from bench import scenarios
+
+        for name, (doc, _) in scenarios.SCENARIOS.items():
+            print(f"{name:<15} {doc}")
+        return 0
+    pop = populations.build(a.members, a.groups, a.blacklist, seed=a.seed)
+    populations.configure_env(pop)
+    fake_mongo.install(a.mongo_uri)
+    rows = asyncio.run(_main(a, pop))
+    # bugs already in the handlers show up as "handler bug" rows; only bench failures exit 1
+    return 1 if any(r["error"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
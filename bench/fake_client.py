@@ -0,0 +1,331 @@
+# bench/fake_client.py
+"""
+A stand-in for pyrogram.Client.
+
+- Handler registration (on_message / on_callback_query / … / add_handler)
+  plus a small dispatcher with pyrogram's group semantics, so real handler
+  modules can be registered and fed updates.
+- Every Bot API method handlers use is recorded in `calls`, sleeps for the
+  configured latency and can raise FloodWait at a configured rate.
+- Builders for Message / CallbackQuery / ChatMemberUpdated updates bound to
+  this client, so `m.reply_text`, `cq.answer`, `cq.message.edit_text` … all
+  land back here.
+"""
+import asyncio
+import inspect
+import itertools
+import logging
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from pyrogram import ContinuePropagation, StopPropagation, types
+from pyrogram.enums import ChatMemberStatus, ChatType
+from pyrogram.errors import FloodWait
+from pyrogram.handlers import (
+    CallbackQueryHandler,
+    ChatMemberUpdatedHandler,
+    InlineQueryHandler,
+    MessageHandler,
+)
+
+log = logging.getLogger(__name__)
+
+# captured before the runner rescales asyncio.sleep for handler pacing
+_real_sleep = asyncio.sleep
+
+_HANDLER_TYPES = (
+    (MessageHandler, types.Message),
+    (CallbackQueryHandler, types.CallbackQuery),
+    (ChatMemberUpdatedHandler, types.ChatMemberUpdated),
+    (InlineQueryHandler, types.InlineQuery),
+)
+
+
+class FakeClient:
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        floodwait_rate: float = 0.0,
+        floodwait_seconds: int = 1,
+        members: Optional[Dict[int, Sequence[dict]]] = None,
+        admins: Iterable[int] = (),
+        seed: int = 1,
+    ):
+        self.latency = float(latency)
+        self.floodwait_rate = float(floodwait_rate)
+        self.floodwait_seconds = int(floodwait_seconds)
+        self.members: Dict[int, Sequence[dict]] = members or {}
+        self.admins = set(admins)
+        self.calls: Counter = Counter()
+        self.floodwaits: Counter = Counter()
+        self.groups: Dict[int, List[Any]] = {}
+        self.loop = asyncio.get_event_loop()
+        self.executor = ThreadPoolExecutor(4, thread_name_prefix="fakeclient")
+        self.is_initialized = True
+        self.is_connected = True
+        self.me = types.User(id=1, is_bot=True, first_name="Bench", username="BenchBot", client=self)
+        self._rng = random.Random(seed)
+        self._msg_ids = itertools.count(1000)
+        self._users: Dict[int, dict] = {}
+        self._in_chat = {gid: {u["id"] for u in rows} for gid, rows in self.members.items()}
+        for rows in self.members.values():
+            for u in rows:
+                self._users[u["id"]] = u
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.floodwaits.clear()
+
+    # ---------- registration / dispatch ----------
+
+    def add_handler(self, handler, group: int = 0):
+        self.groups.setdefault(group, []).append(handler)
+        self.groups = dict(sorted(self.groups.items()))
+        return handler, group
+
+    def remove_handler(self, handler, group: int = 0):
+        self.groups.get(group, []).remove(handler)
+
+    def _decorator(self, handler_cls, filters=None, group: int = 0):
+        def deco(func):
+            self.add_handler(handler_cls(func, filters), group)
+            return func
+        return deco
+
+    def on_message(self, filters=None, group: int = 0):
+        return self._decorator(MessageHandler, filters, group)
+
+    def on_callback_query(self, filters=None, group: int = 0):
+        return self._decorator(CallbackQueryHandler, filters, group)
+
+    def on_chat_member_updated(self, filters=None, group: int = 0):
+        return self._decorator(ChatMemberUpdatedHandler, filters, group)
+
+    def on_inline_query(self, filters=None, group: int = 0):
+        return self._decorator(InlineQueryHandler, filters, group)
+
+    async def feed(self, update) -> None:
+        """Dispatch one update the way pyrogram's Dispatcher does."""
+        for group in list(self.groups.values()):
+            for handler in group:
+                if not any(isinstance(handler, h) and isinstance(update, t) for h, t in _HANDLER_TYPES):
+                    continue
+                try:
+                    if not await handler.check(self, update):
+                        continue
+                except Exception:
+                    log.exception("bench: filter failed")
+                    continue
+                try:
+                    if inspect.iscoroutinefunction(handler.callback):
+                        await handler.callback(self, update)
+                    else:
+                        await self.loop.run_in_executor(self.executor, handler.callback, self, update)
+                except StopPropagation:
+                    return
+                except ContinuePropagation:
+                    continue
+                except Exception:
+                    log.exception("bench: handler %s failed", getattr(handler.callback, "__qualname__", handler.callback))
+                break
+
+    # ---------- API call plumbing ----------
+
+    async def _api(self, name: str) -> None:
+        self.calls[name] += 1
+        if self.latency:
+            await _real_sleep(self.latency * self._rng.uniform(0.5, 1.5))
+        if self.floodwait_rate and self._rng.random() < self.floodwait_rate:
+            self.floodwaits[name] += 1
+            raise FloodWait(value=self.floodwait_seconds)
+
+    def user(self, user_id: int) -> types.User:
+        u = self._users.get(user_id) or {"id": user_id, "first_name": f"User{user_id}"}
+        return types.User(
+            id=u["id"], is_bot=bool(u.get("is_bot")), first_name=u.get("first_name"),
+            last_name=u.get("last_name"), username=u.get("username"), client=self,
+        )
+
+    def chat(self, chat_id: int, type: Optional[ChatType] = None) -> types.Chat:
+        if chat_id > 0:
+            return types.Chat(id=chat_id, type=type or ChatType.PRIVATE, first_name=f"User{chat_id}", client=self)
+        return types.Chat(id=chat_id, type=type or ChatType.SUPERGROUP, title=f"Group {chat_id}", client=self)
+
+    def add_member(self, chat_id: int, user: dict) -> None:
+        """Make `user` ({"id", "first_name", …}) known, and a member of `chat_id` if it's a group."""
+        self._users.setdefault(user["id"], user)
+        if chat_id and chat_id < 0 and user["id"] not in self._in_chat.setdefault(chat_id, set()):
+            self._in_chat[chat_id].add(user["id"])
+            self.members.setdefault(chat_id, []).append(user)
+
+    def message(self, chat_id: int, text: str = "", from_user: Optional[int] = None,
+                chat_type: Optional[ChatType] = None, **kw) -> types.Message:
+        return types.Message(
+            id=next(self._msg_ids),
+            chat=self.chat(int(chat_id), chat_type) if not isinstance(chat_id, str) else self.chat(-1),
+            from_user=self.user(from_user) if from_user else self.me,
+            date=datetime.now(),
+            text=text or None,
+            client=self,
+            **kw,
+        )
+
+    # ---------- Bot API surface used by handlers ----------
+
+    async def send_message(self, chat_id, text, *args, **kwargs):
+        await self._api("send_message")
+        return self.message(chat_id, text)
+
+    async def _send_media(self, name, chat_id, *args, caption: str = "", **kwargs):
+        await self._api(name)
+        return self.message(chat_id, caption)
+
+    async def send_photo(self, chat_id, photo, *args, **kwargs):
+        return await self._send_media("send_photo", chat_id, **kwargs)
+
+    async def send_document(self, chat_id, document, *args, **kwargs):
+        return await self._send_media("send_document", chat_id, **kwargs)
+
+    async def send_video(self, chat_id, video, *args, **kwargs):
+        return await self._send_media("send_video", chat_id, **kwargs)
+
+    async def send_animation(self, chat_id, animation, *args, **kwargs):
+        return await self._send_media("send_animation", chat_id, **kwargs)
+
+    async def copy_message(self, chat_id, from_chat_id, message_id, *args, **kwargs):
+        await self._api("copy_message")
+        return self.message(chat_id)
+
+    async def copy_media_group(self, chat_id, from_chat_id, message_id, *args, **kwargs):
+        await self._api("copy_media_group")
+        return [self.message(chat_id)]
+
+    async def edit_message_text(self, chat_id, message_id, text, *args, **kwargs):
+        await self._api("edit_message_text")
+        return self.message(chat_id, text)
+
+    async def edit_message_caption(self, chat_id, message_id, caption, *args, **kwargs):
+        await self._api("edit_message_caption")
+        return self.message(chat_id, caption)
+
+    async def edit_message_reply_markup(self, chat_id, message_id, reply_markup=None, *args, **kwargs):
+        await self._api("edit_message_reply_markup")
+        return self.message(chat_id)
+
+    async def delete_messages(self, chat_id, message_ids, *args, **kwargs):
+        await self._api("delete_messages")
+        return 1
+
+    async def answer_callback_query(self, callback_query_id, *args, **kwargs):
+        await self._api("answer_callback_query")
+        return True
+
+    async def answer_inline_query(self, inline_query_id, results, *args, **kwargs):
+        await self._api("answer_inline_query")
+        return True
+
+    async def get_me(self):
+        await self._api("get_me")
+        return self.me
+
+    async def get_chat(self, chat_id):
+        await self._api("get_chat")
+        return self.chat(int(chat_id) if str(chat_id).lstrip("-").isdigit() else -1)
+
+    async def get_users(self, user_ids):
+        await self._api("get_users")
+        if isinstance(user_ids, (list, tuple, set)):
+            return [self.user(int(u)) for u in user_ids]
+        return self.user(int(user_ids))
+
+    def _member(self, chat_id: int, user_id: int) -> types.ChatMember:
+        if user_id in self.admins:
+            status = ChatMemberStatus.ADMINISTRATOR
+        elif chat_id in self._in_chat and user_id not in self._in_chat[chat_id]:
+            status = ChatMemberStatus.LEFT
+        else:
+            status = ChatMemberStatus.MEMBER
+        return types.ChatMember(status=status, user=self.user(user_id), chat=self.chat(chat_id), client=self)
+
+    async def get_chat_member(self, chat_id, user_id):
+        await self._api("get_chat_member")
+        return self._member(int(chat_id), int(user_id))
+
+    async def get_chat_members(self, chat_id, *args, **kwargs):
+        # pyrogram fetches 200 members per request
+        rows = self.members.get(int(chat_id), [])
+        for i, u in enumerate(rows):
+            if i % 200 == 0:
+                await self._api("get_chat_members")
+            yield self._member(int(chat_id), u["id"])
+
+    async def get_chat_members_count(self, chat_id):
+        await self._api("get_chat_members_count")
+        return len(self.members.get(int(chat_id), []))
+
+    async def ban_chat_member(self, chat_id, user_id, *args, **kwargs):
+        await self._api("ban_chat_member")
+        return True
+
+    async def unban_chat_member(self, chat_id, user_id, *args, **kwargs):
+        await self._api("unban_chat_member")
+        return True
+
+    async def restrict_chat_member(self, chat_id, user_id, *args, **kwargs):
+        await self._api("restrict_chat_member")
+        return True
+
+    async def leave_chat(self, chat_id, *args, **kwargs):
+        await self._api("leave_chat")
+        return True
+
+    def __getattr__(self, name: str):
+        # anything else a handler calls is recorded and returns a bland message
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        async def _generic(*args, **kwargs):
+            await self._api(name)
+            chat_id = kwargs.get("chat_id", args[0] if args else 0)
+            return self.message(chat_id if isinstance(chat_id, int) else 0)
+        return _generic
+
+    # ---------- update builders ----------
+
+    def make_message(self, chat_id: int, from_user: int, text: str, **kw) -> types.Message:
+        return self.message(chat_id, text, from_user=from_user, **kw)
+
+    def make_callback(self, from_user: int, data: str, chat_id: Optional[int] = None,
+                      chat_type: Optional[ChatType] = None) -> types.CallbackQuery:
+        msg = self.message(chat_id or from_user, "panel", chat_type=chat_type)
+        return types.CallbackQuery(
+            id=str(next(self._msg_ids)), from_user=self.user(from_user),
+            chat_instance="bench", message=msg, data=data, client=self,
+        )
+
+    def make_inline_query(self, from_user: int, query: str, offset: str = "") -> types.InlineQuery:
+        return types.InlineQuery(
+            id=str(next(self._msg_ids)), from_user=self.user(from_user),
+            query=query, offset=offset, chat_type=ChatType.PRIVATE, client=self,
+        )
+
+    def make_member_update(self, chat_id: int, from_user: int, target: int,
+                           old: Optional[str], new: Optional[str]) -> types.ChatMemberUpdated:
+        """`old` / `new` are ChatMemberStatus names ("member", "left", …) or None."""
+        def member(status):
+            if not status:
+                return None
+            return types.ChatMember(status=ChatMemberStatus[status.upper()], user=self.user(target),
+                                    chat=self.chat(chat_id), client=self)
+        return types.ChatMemberUpdated(
+            chat=self.chat(chat_id), from_user=self.user(from_user), date=datetime.now(),
+            old_chat_member=member(old), new_chat_member=member(new), client=self,
+        )
+
+    def make_join(self, chat_id: int, user_id: int) -> types.ChatMemberUpdated:
+        return self.make_member_update(chat_id, user_id, user_id, None, "member")
+
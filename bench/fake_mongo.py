@@ -0,0 +1,91 @@
+# bench/fake_mongo.py
+"""
+Mongo for benchmarks.
+
+install() must run before any handler module is imported, because most of
+them build a MongoClient at import time.
+
+- With a URI (a local mongod), nothing is patched: utils.metrics' command
+  listener already counts every command per collection.
+- Without one, pymongo.MongoClient is replaced by mongomock's, and the
+  mongomock Collection methods are wrapped so every call is counted in the
+  same "mongo" metrics family, labelled "<collection>:<op>".
+"""
+import functools
+import os
+import time
+from typing import Optional
+
+from utils import metrics
+
+# mongomock method -> the server command it stands for
+_OPS = {
+    "find": "find",
+    "find_one": "find",
+    "count_documents": "aggregate",
+    "distinct": "distinct",
+    "aggregate": "aggregate",
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "update_one": "update",
+    "update_many": "update",
+    "replace_one": "update",
+    "delete_one": "delete",
+    "delete_many": "delete",
+    "find_one_and_update": "findAndModify",
+    "find_one_and_replace": "findAndModify",
+    "find_one_and_delete": "findAndModify",
+    "bulk_write": "bulkWrite",
+    "create_index": "createIndexes",
+}
+
+_installed: Optional[str] = None
+
+
+def _counted(fn, op: str):
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        err = False
+        try:
+            return fn(self, *args, **kwargs)
+        except Exception:
+            err = True
+            raise
+        finally:
+            metrics.observe("mongo", f"{self.name}:{op}", time.perf_counter() - t0, err)
+    return wrapper
+
+
+def install(uri: Optional[str] = None) -> str:
+    """Point every MongoClient at `uri`, or at mongomock. Returns a description."""
+    global _installed
+    if _installed:
+        return _installed
+
+    if uri:
+        os.environ["MONGO_URI"] = os.environ["MONGODB_URI"] = uri
+        _installed = f"mongod at {uri}"
+        return _installed
+
+    try:
+        import mongomock
+    except ImportError as e:
+        raise SystemExit("bench: mongomock is not installed; pip install mongomock or pass --mongo-uri") from e
+    import pymongo
+
+    for name, op in _OPS.items():
+        fn = getattr(mongomock.collection.Collection, name, None)
+        if fn is not None:
+            setattr(mongomock.collection.Collection, name, _counted(fn, op))
+
+    shared = mongomock.MongoClient()
+
+    def _client(*args, **kwargs):
+        # one in-memory server for every module, like one cluster in production
+        return shared
+
+    pymongo.MongoClient = _client
+    os.environ["MONGO_URI"] = os.environ["MONGODB_URI"] = "mongodb://bench.invalid/"
+    _installed = "mongomock (in-memory)"
+    return _installed
@@ -0,0 +1,149 @@
+# bench/populations.py
+"""
+Synthetic populations: members spread over sanctuary groups, a spend
+distribution, exemptions, a blacklist and booking availability.
+
+configure_env() must run before handler modules are imported (they read
+env at import time); seed() fills Mongo and the ReqStore JSON afterwards.
+"""
+import json
+import os
+import random
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+OWNER_ID = 6964994611
+BASE_GROUP = -1001000000000
+BASE_USER = 100_000_000
+
+_FIRST = ["Ava", "Mia", "Luna", "Zoe", "Ivy", "Nova", "Ruby", "Jade", "Lily", "Rose",
+          "Max", "Leo", "Kai", "Eli", "Jax", "Finn", "Cole", "Dean", "Ezra", "Noah"]
+_LAST = ["Smith", "Nguyen", "Garcia", "Brown", "Lee", "Walker", "Hall", "Young", "King", "Wright", None]
+
+
+@dataclass
+class Population:
+    members: List[dict]
+    groups: List[int]
+    by_group: Dict[int, List[dict]]
+    blacklist: List[int]
+    exempt: List[int]
+    owner_id: int = OWNER_ID
+    store_path: str = ""
+    extras: Dict[str, int] = field(default_factory=dict)
+
+
+def build(members: int = 10_000, groups: int = 4, blacklist: int = 5_000,
+          overlap: float = 0.3, exempt_rate: float = 0.02, seed: int = 1) -> Population:
+    """
+    Every member lands in one primary group; `overlap` of them also join a
+    second one, so per-group member lists overlap like the real sanctuaries.
+    """
+    rng = random.Random(seed)
+    gids = [BASE_GROUP - i for i in range(groups)]
+    by_group: Dict[int, List[dict]] = {g: [] for g in gids}
+    rows: List[dict] = []
+    for i in range(members):
+        uid = BASE_USER + i
+        first = rng.choice(_FIRST)
+        u = {
+            "id": uid,
+            "first_name": first,
+            "last_name": rng.choice(_LAST),
+            "username": f"{first.lower()}{i}" if rng.random() < 0.7 else None,
+            "is_bot": rng.random() < 0.002,
+            # long tail: most spend nothing, a few spend a lot
+            "spend": round(rng.paretovariate(1.5) * 5 - 5, 2) if rng.random() < 0.6 else 0.0,
+            "games": rng.choice((0, 0, 1, 2, 4, 6)),
+            "groups": [],
+        }
+        primary = gids[i % groups]
+        u["groups"].append(primary)
+        if groups > 1 and rng.random() < overlap:
+            u["groups"].append(rng.choice([g for g in gids if g != primary]))
+        for g in u["groups"]:
+            by_group[g].append(u)
+        rows.append(u)
+
+    # blacklisted ids are mostly outsiders, with a handful who are members
+    bl = [BASE_USER + members + i for i in range(blacklist)]
+    bl += [rows[rng.randrange(members)]["id"] for _ in range(min(5, members))] if members else []
+    exempt = [u["id"] for u in rows if rng.random() < exempt_rate]
+    return Population(members=rows, groups=gids, by_group=by_group, blacklist=bl, exempt=exempt)
+
+
+def configure_env(pop: Population) -> None:
+    """Point handler config at the synthetic groups and a throwaway ReqStore file."""
+    pop.store_path = os.path.join(tempfile.mkdtemp(prefix="succubench-"), "req_store.json")
+    os.environ.update({
+        "OWNER_ID": str(pop.owner_id),
+        "SANCTUARY_GROUP_IDS": ",".join(str(g) for g in pop.groups),
+        "SANCTUARY_CHAT_ID": str(pop.groups[0]),
+        "REQ_STORE_PATH": pop.store_path,
+        # requirements_messages defaults to a differently-cased db name
+        "MONGO_DB": "Succubot",
+        "MONGO_DB_NAME": "Succubot",
+        "LOOP_WATCHDOG_ENABLED": "0",
+        "HTTP_ENABLED": "0",
+    })
+    _write_req_store(pop)
+
+
+def _write_req_store(pop: Population) -> None:
+    month = datetime.now().strftime("%Y-%m")
+    users = {
+        str(u["id"]): {"tokens": int(u["spend"] * 100), "buys": 1 if u["spend"] else 0,
+                       "games": u["games"], "last_buy_ts": 0.0, "notes": ""}
+        for u in pop.members if u["spend"] or u["games"]
+    }
+    raw = {
+        "months": {month: {"users": users}},
+        "admins": [pop.owner_id],
+        # every human member has DMed the bot (worst case for reminder batches)
+        "dm_ready_global": {str(u["id"]): {"since": 0.0, "by_admin": False} for u in pop.members if not u["is_bot"]},
+        "exemptions": {"global": {str(uid): {"until": None} for uid in pop.exempt}, "groups": {}},
+    }
+    with open(pop.store_path, "w", encoding="utf-8") as f:
+        json.dump(raw, f)
+
+
+def seed(pop: Population, db) -> None:
+    """Fill the collections the scenarios read. `db` is the Succubot database."""
+    now = datetime.now(timezone.utc)
+    exempt = set(pop.exempt)
+    members = db["requirements_members"]
+    members.delete_many({})
+    docs = []
+    for u in pop.members:
+        docs.append({
+            "user_id": u["id"],
+            # requirements_messages keys its picker off chat_id
+            "chat_id": u["groups"][0],
+            "first_name": u["first_name"],
+            "last_name": u["last_name"],
+            "username": u["username"],
+            "name": u["first_name"],
+            "groups": u["groups"],
+            "in_group": {str(g): True for g in u["groups"]},
+            "manual_spend": u["spend"],
+            "exempt": u["id"] in exempt,
+            "last_updated": now,
+        })
+    if docs:
+        members.insert_many(docs)
+
+    bl = db["blacklist_users"]
+    bl.delete_many({})
+    if pop.blacklist:
+        bl.insert_many([{"user_id": uid, "reason": "bench", "added_at": now} for uid in set(pop.blacklist)])
+
+    avail = db["nsfw_availability"]
+    avail.delete_many({})
+    start = date.today()
+    avail.insert_many([
+        {"day": (start + timedelta(days=d)).strftime("%Y-%m-%d"),
+         "blocked": {f"{h:02d}:00": True for h in range(9, 22, 3)}}
+        for d in range(28)
+    ])
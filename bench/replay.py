@@ -0,0 +1,331 @@
+# bench/replay.py
+"""
+Replay a log written by utils/update_recorder.py against the fake client.
+
+    python -m bench.replay updates.jsonl.gz                   # real time
+    python -m bench.replay updates.jsonl.gz --speed 20        # 20x faster
+    python -m bench.replay updates.jsonl.gz --speed 0 --concurrency 200   # flat out
+
+Every module main.py registers is registered here too (same order, same
+request context, callback router and metrics wrappers), the loop watchdog runs, and each
+recorded update is rebuilt and fed through the dispatcher at its recorded
+offset / speed. At most --concurrency updates are in flight; when that
+limit holds the replay back, it shows up as "behind schedule".
+
+Reported: end-to-end latency per update kind, per-handler latency
+distribution (utils.metrics), event-loop lag and attributed stalls, Bot API
+calls and Mongo ops.
+
+Handlers run in a temp copy of data/, so JSON stores in the tree are not
+touched. Media is not reconstructed: media messages replay with their
+(scrubbed) caption only.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional
+
+from bench import fake_mongo
+
+log = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main_modules() -> List[str]:
+    """Handler modules in the order main.py registers them."""
+    with open(os.path.join(ROOT, "main.py"), encoding="utf-8") as f:
+        return re.findall(r'_try_register\("(\w+)"\)', f.read())
+
+
+def read_events(path: str, limit: Optional[int] = None) -> Iterator[dict]:
+    opener = gzip.open if path.endswith(".gz") else open
+    n = 0
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            ev = json.loads(line)
+            if ev.get("k") == "hdr":
+                continue
+            yield ev
+            n += 1
+            if limit and n >= limit:
+                return
+
+
+def _user_dict(u: Optional[dict]) -> Optional[dict]:
+    if not u:
+        return None
+    return {"id": u["id"], "first_name": u.get("fn"), "username": u.get("un"), "is_bot": bool(u.get("bot"))}
+
+
+def population(events: List[dict]) -> Dict[int, List[dict]]:
+    """Group members as seen in the log: senders, joiners and member-update targets."""
+    seen: Dict[int, Dict[int, dict]] = defaultdict(dict)
+    for ev in events:
+        chat = (ev.get("chat") or {}).get("id")
+        if not chat or chat > 0:
+            continue
+        for u in [ev.get("user"), ev.get("target"), *(ev.get("joined") or [])]:
+            d = _user_dict(u)
+            if d:
+                seen[chat].setdefault(d["id"], d)
+    return {chat: list(users.values()) for chat, users in seen.items()}
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _dist(values: List[float]) -> dict:
+    return {
+        "n": len(values),
+        "p50_ms": round(_pct(values, 0.50) * 1000, 2),
+        "p95_ms": round(_pct(values, 0.95) * 1000, 2),
+        "p99_ms": round(_pct(values, 0.99) * 1000, 2),
+        "max_ms": round(max(values, default=0.0) * 1000, 2),
+    }
+
+
+class Replayer:
+    def __init__(self, client, speed: float = 1.0, concurrency: int = 64):
+        self.client = client
+        self.speed = speed
+        self.concurrency = max(1, concurrency)
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.behind: List[float] = []
+
+    def build(self, ev: dict):
+        from pyrogram.enums import ChatType
+
+        c = self.client
+        chat = ev.get("chat") or {}
+        chat_id = chat.get("id")
+        try:
+            chat_type = ChatType[chat["type"].upper()]
+        except (KeyError, AttributeError):
+            chat_type = None
+        user = _user_dict(ev.get("user"))
+        if user:
+            c.add_member(chat_id or user["id"], user)
+        uid = user["id"] if user else None
+
+        kind = ev["k"]
+        if kind == "cb":
+            return c.make_callback(uid, ev.get("data") or "", chat_id=chat_id, chat_type=chat_type)
+        if kind == "cmu":
+            target = _user_dict(ev.get("target")) or user
+            if target:
+                c.add_member(chat_id, target)
+            return c.make_member_update(chat_id, uid, target["id"] if target else uid, ev.get("old"), ev.get("new"))
+        joined = []
+        for d in map(_user_dict, ev.get("joined") or []):
+            c.add_member(chat_id, d)
+            joined.append(c.user(d["id"]))
+        left = _user_dict(ev.get("left"))
+        extra = {}
+        if joined:
+            extra["new_chat_members"] = joined
+        if left:
+            extra["left_chat_member"] = c.user(left["id"])
+        if ev.get("caption"):
+            extra["caption"] = ev["caption"]
+        return c.message(chat_id or uid, ev.get("text") or "", from_user=uid, chat_type=chat_type, **extra)
+
+    async def _one(self, kind: str, update, queued_at: float, sem: asyncio.Semaphore):
+        try:
+            await self.client.feed(update)
+        finally:
+            self.latency[kind].append(time.perf_counter() - queued_at)
+            sem.release()
+
+    async def run(self, events: List[dict]) -> float:
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        t_first = events[0]["t"] if events else 0.0
+        start = loop.time()
+        t0 = time.perf_counter()
+        for ev in events:
+            if self.speed > 0:
+                due = start + (ev["t"] - t_first) / self.speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await sem.acquire()
+            if self.speed > 0:
+                self.behind.append(max(0.0, loop.time() - due))
+            try:
+                update = self.build(ev)
+            except Exception as e:
+                sem.release()
+                log.warning("replay: could not rebuild %s event: %s", ev.get("k"), e)
+                continue
+            task = asyncio.create_task(self._one(ev["k"], update, time.perf_counter(), sem))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return time.perf_counter() - t0
+
+
+def _hist_row(row) -> dict:
+    from utils import metrics
+
+    h = metrics.Histogram()
+    h.count, h.errors, h.total, h.max, h.buckets = row[0], row[1], row[2], row[3], list(row[4])
+    return {
+        "n": h.count, "errors": h.errors,
+        "mean_ms": round(h.total / h.count * 1000, 2) if h.count else 0.0,
+        "p50_ms": round(h.quantile(0.50) * 1000, 1),
+        "p95_ms": round(h.quantile(0.95) * 1000, 1),
+        "p99_ms": round(h.quantile(0.99) * 1000, 1),
+        "max_ms": round(h.max * 1000, 2),
+        "total_s": round(h.total, 3),
+    }
+
+
+def report(rp: Replayer, wall: float, n_events: int, failed: List[str]) -> dict:
+    from utils import metrics
+
+    snap = metrics.snapshot()
+    hist = snap["histograms"]
+    handlers = {name: _hist_row(row) for (fam, name), row in hist.items() if fam == "handler"}
+    lag = hist.get(("loop", "lag"))
+    mongo = sum(row[0] for (fam, _), row in hist.items() if fam == "mongo")
+    return {
+        "events": n_events,
+        "wall_s": round(wall, 3),
+        "rate_per_s": round(n_events / wall, 1) if wall else 0.0,
+        "behind_schedule": _dist(rp.behind) if rp.behind else None,
+        "updates": {k: _dist(v) for k, v in sorted(rp.latency.items())},
+        "handlers": dict(sorted(handlers.items(), key=lambda kv: -kv[1]["total_s"])),
+        "loop_lag": _hist_row(lag) if lag else None,
+        "stalls": {name: n for (fam, name), n in snap["counters"].items() if fam == "stall"},
+        "api_total": sum(rp.client.calls.values()),
+        "api_calls": dict(rp.client.calls.most_common()),
+        "floodwaits": sum(rp.client.floodwaits.values()),
+        "db_total": mongo,
+        "failed_modules": failed,
+    }
+
+
+def format_report(r: dict, top: int = 15) -> str:
+    out = [f"{r['events']} updates in {r['wall_s']:.2f}s ({r['rate_per_s']}/s); "
+           f"api={r['api_total']} floodwaits={r['floodwaits']} db ops={r['db_total']}"]
+    if r["failed_modules"]:
+        out.append("modules that failed to register: " + ", ".join(r["failed_modules"]))
+    b = r["behind_schedule"]
+    if b:
+        out.append(f"behind schedule: p95={b['p95_ms']}ms max={b['max_ms']}ms")
+    out.append("")
+    out.append(f"{'update':<8} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for k, d in r["updates"].items():
+        out.append(f"{k:<8} {d['n']:>7} {d['p50_ms']:>9} {d['p95_ms']:>9} {d['p99_ms']:>9} {d['max_ms']:>9}")
+    out.append("")
+    out.append(f"{'handler':<48} {'n':>6} {'err':>4} {'mean':>8} {'p95≤':>7} {'max ms':>9}")
+    for name, d in list(r["handlers"].items())[:top]:
+        out.append(f"{name[:48]:<48} {d['n']:>6} {d['errors']:>4} {d['mean_ms']:>8} {d['p95_ms']:>7} {d['max_ms']:>9}")
+    lag = r["loop_lag"]
+    if lag:
+        out.append("")
+        out.append(f"loop lag: p50≤{lag['p50_ms']}ms p95≤{lag['p95_ms']}ms p99≤{lag['p99_ms']}ms max={lag['max_ms']}ms")
+    if r["stalls"]:
+        out.append("stalls: " + ", ".join(f"{k}={v}" for k, v in sorted(r["stalls"].items(), key=lambda kv: -kv[1])))
+    return "\n".join(out)
+
+
+async def _replay(a: argparse.Namespace, events: List[dict]) -> dict:
+    from utils import boot, callback_router, loop_watchdog, metrics, request_context, roles, user_profiles
+
+    from bench.fake_client import FakeClient
+
+    client = FakeClient(
+        latency=a.latency_ms / 1000.0,
+        floodwait_rate=a.floodwait_rate,
+        floodwait_seconds=a.floodwait_seconds,
+        members=population(events),
+        seed=a.seed,
+    )
+    request_context.install(client)
+    roles.install(client)
+    user_profiles.install(client)
+    callback_router.install(client)
+    metrics.install(client)
+    failed = []
+    for name in a.modules or main_modules():
+        try:
+            __import__(f"handlers.{name}", fromlist=["register"]).register(client)
+        except Exception as e:
+            log.warning("replay: %s failed to register: %s", name, e)
+            failed.append(name)
+    await boot.run_init_hooks()
+    loop_watchdog.start(client)
+    metrics.reset()
+
+    rp = Replayer(client, speed=a.speed, concurrency=a.concurrency)
+    wall = await rp.run(events)
+    return report(rp, wall, len(events), failed)
+
+
+def _args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="python -m bench.replay", description="Replay recorded updates offline.")
+    p.add_argument("log", help="file written by UPDATE_RECORD_PATH (.jsonl or .jsonl.gz)")
+    p.add_argument("--speed", type=float, default=1.0, help="time multiplier; 0 = no pacing")
+    p.add_argument("--concurrency", type=int, default=64, help="max updates in flight")
+    p.add_argument("--limit", type=int, help="replay only the first N updates")
+    p.add_argument("--module", dest="modules", action="append", help="register only these handler modules")
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--floodwait-rate", type=float, default=0.0)
+    p.add_argument("--floodwait-seconds", type=int, default=1)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--mongo-uri", help="use a real local mongod instead of mongomock")
+    p.add_argument("--no-watchdog", action="store_true", help="don't measure loop lag")
+    p.add_argument("--top", type=int, default=15)
+    p.add_argument("--json", action="store_true")
+    p.add_argument("-v", "--verbose", action="store_true")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    a = _args(argv)
+    logging.basicConfig(level=logging.INFO if a.verbose else logging.ERROR,
+                        format="%(levelname)s %(name)s: %(message)s")
+    events = list(read_events(os.path.abspath(a.log), a.limit))
+    if not events:
+        print("no updates in log")
+        return 1
+
+    # isolate JSON stores; handler modules read env at import, so set it first
+    work = tempfile.mkdtemp(prefix="succureplay-")
+    if os.path.isdir(os.path.join(ROOT, "data")):
+        shutil.copytree(os.path.join(ROOT, "data"), os.path.join(work, "data"))
+    os.chdir(work)
+    sys.path.insert(0, ROOT)
+    os.environ.pop("UPDATE_RECORD_PATH", None)
+    os.environ["HTTP_ENABLED"] = "0"
+    os.environ["LOOP_WATCHDOG_ENABLED"] = "0" if a.no_watchdog else "1"
+    os.environ.setdefault("REQ_STORE_PATH", os.path.join(work, "data", "req_store.json"))
+    fake_mongo.install(a.mongo_uri)
+
+    r = asyncio.run(_replay(a, events))
+    print(json.dumps(r, indent=2) if a.json else format_report(r, a.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
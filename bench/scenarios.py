@@ -0,0 +1,246 @@
+# bench/scenarios.py
+"""
+Scripted scenarios. Each one drives the real handler code the way an admin
+or member would (button presses and commands fed through the fake client's
+dispatcher) or, for scheduled work, calls the job function directly.
+
+Add one with:
+
+    @scenario("name", "what it does")
+    async def _name(ctx: BenchContext): ...
+"""
+import asyncio
+import importlib
+import logging
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils import callback_router, metrics
+
+from bench.fake_client import FakeClient
+from bench.populations import Population
+
+log = logging.getLogger(__name__)
+
+# modules registered on the fake client, in main.py's order
+MODULES = (
+    "health",
+    "nsfw_text_session_booking",
+    "summon",
+    "requirements_panel",
+    "member_search",
+    "requirements_messages",
+    "kick_requirements",
+)
+
+
+@dataclass
+class BenchContext:
+    client: FakeClient
+    pop: Population
+    modules: Dict[str, object] = field(default_factory=dict)
+
+
+SCENARIOS: Dict[str, Tuple[str, Callable[[BenchContext], Awaitable[None]]]] = {}
+
+
+def scenario(name: str, doc: str):
+    def deco(fn):
+        SCENARIOS[name] = (doc, fn)
+        return fn
+    return deco
+
+
+def setup(client: FakeClient, pop: Population) -> BenchContext:
+    """Install the router and metrics like main.py, then register the handler modules."""
+    callback_router.install(client)
+    metrics.install(client)
+    ctx = BenchContext(client=client, pop=pop)
+    for name in MODULES:
+        mod = importlib.import_module(f"handlers.{name}")
+        mod.register(client)
+        ctx.modules[name] = mod
+    # scheduled / helper-only modules: imported, not registered
+    for name in ("enforce_requirements", "sanctu_controls"):
+        try:
+            ctx.modules[name] = importlib.import_module(f"handlers.{name}")
+        except Exception as e:
+            log.warning("bench: %s unavailable: %s", name, e)
+    return ctx
+
+
+# ---------- scenarios ----------
+
+@scenario("scan", "owner taps Scan Group Members (reqpanel:scan) across all sanctuary groups")
+async def _scan(ctx: BenchContext):
+    await ctx.client.feed(ctx.client.make_callback(ctx.pop.owner_id, "reqpanel:scan"))
+
+
+@scenario("reminders", "open the reminder picker in the main group and Send All (reqpick:reminder:send_all)")
+async def _reminders(ctx: BenchContext):
+    gid, owner = ctx.pop.groups[0], ctx.pop.owner_id
+    await ctx.client.feed(ctx.client.make_callback(owner, "reqpanel:reminders", chat_id=gid))
+    await ctx.client.feed(ctx.client.make_callback(owner, "reqpick:reminder:send_all", chat_id=gid))
+
+
+@scenario("kick_preview", "owner taps Kick Behind → Preview (kickreq:preview)")
+async def _kick_preview(ctx: BenchContext):
+    await ctx.client.feed(ctx.client.make_callback(ctx.pop.owner_id, "kickreq:preview"))
+
+
+@scenario("sweep", "monthly requirements sweep of the main group (enforce_requirements job)")
+async def _sweep(ctx: BenchContext):
+    mod = ctx.modules.get("enforce_requirements")
+    if mod is None:
+        raise RuntimeError("enforce_requirements did not import")
+    await mod._monthly_sweep(ctx.client)
+
+
+@scenario("batch_remind", "scheduled reminder DMs to every DM-ready member who is behind (enforce_requirements job)")
+async def _batch_remind(ctx: BenchContext):
+    mod = ctx.modules.get("enforce_requirements")
+    if mod is None:
+        raise RuntimeError("enforce_requirements did not import")
+    await mod._batch_remind(ctx.client)
+
+
+@scenario("member_search", "owner types 200 inline searches (@bot spend <prefix>) against the member index")
+async def _member_search(ctx: BenchContext):
+    rp = ctx.modules["requirements_panel"]
+    await asyncio.to_thread(rp._load_member_index)
+    names = [u["first_name"] for u in ctx.pop.members if u["first_name"]] or ["a"]
+    for i in range(200):
+        prefix = names[i % len(names)][: 1 + i % 3]
+        await ctx.client.feed(ctx.client.make_inline_query(ctx.pop.owner_id, f"spend {prefix}"))
+
+
+@scenario("summon", "/summonall in the main group")
+async def _summon(ctx: BenchContext):
+    msg = ctx.client.make_message(ctx.pop.groups[0], ctx.pop.owner_id, "/summonall bench")
+    await ctx.client.feed(msg)
+
+
+@scenario("booking_week", "50 members open the booking week view at once (nsfw_book:week)")
+async def _booking_week(ctx: BenchContext):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    users = [u["id"] for u in ctx.pop.members[:50]] or [ctx.pop.owner_id]
+    await asyncio.gather(*(
+        ctx.client.feed(ctx.client.make_callback(uid, f"nsfw_book:week:{monday:%Y-%m-%d}"))
+        for uid in users
+    ))
+
+
+@scenario("blacklist_scan", "safety sweep of every sanctuary group against the blacklist")
+async def _blacklist_scan(ctx: BenchContext):
+    mod = ctx.modules.get("sanctu_controls")
+    if mod is None:
+        raise RuntimeError("sanctu_controls did not import")
+    for gid in ctx.pop.groups:
+        await mod._scan_chat_for_blacklisted(ctx.client, ctx.client.chat(gid))
+
+
+# ---------- running ----------
+
+_paced = [0.0]
+
+
+def scale_sleeps(factor: float) -> None:
+    """
+    Rescale asyncio.sleep for handler code (pacing between DMs, FloodWait
+    back-off). The requested total is still reported as `paced_s`.
+    The fake client's own latency is unaffected.
+    """
+    real = asyncio.sleep
+
+    async def sleep(delay, result=None):
+        _paced[0] += max(0.0, float(delay))
+        return await real(delay * factor, result)
+
+    asyncio.sleep = sleep
+
+
+_BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+_REPO_DIR = os.path.dirname(_BENCH_DIR)
+
+
+def _bug_site(exc: BaseException) -> Optional[str]:
+    """
+    "handlers/x.py:123" when the innermost repo frame of `exc` is code under
+    test rather than the bench itself, i.e. the scenario tripped over a bug
+    that is already in the tree. None for bench failures.
+    """
+    site = None
+    for fs in traceback.extract_tb(exc.__traceback__):
+        path = os.path.abspath(fs.filename)
+        if path.startswith(_REPO_DIR + os.sep) and "site-packages" not in path:
+            site = (path, fs.lineno)
+    if site is None or site[0].startswith(_BENCH_DIR + os.sep):
+        return None
+    return f"{os.path.relpath(site[0], _REPO_DIR)}:{site[1]}"
+
+
+def _family(snap: dict, family: str) -> Dict[str, Tuple[int, int]]:
+    return {name: (h[0], h[1]) for (fam, name), h in snap["histograms"].items() if fam == family}
+
+
+async def run(ctx: BenchContext, name: str) -> dict:
+    _doc, fn = SCENARIOS[name]
+    metrics.reset()
+    ctx.client.reset_counters()
+    _paced[0] = 0.0
+    error = handler_bug = None
+    t0 = time.perf_counter()
+    try:
+        await fn(ctx)
+    except Exception as e:
+        site = _bug_site(e)
+        if site:
+            # reported, not fixed: the bench measures the tree as it is
+            log.warning("bench: scenario %s hit a handler bug at %s: %r", name, site, e)
+            handler_bug = f"{type(e).__name__}: {e} ({site})"
+        else:
+            log.exception("bench: scenario %s failed", name)
+            error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - t0
+
+    snap = metrics.snapshot()
+    mongo = {k: n for k, (n, _) in _family(snap, "mongo").items()}
+    handlers = _family(snap, "handler")
+    return {
+        "scenario": name,
+        "wall_s": round(wall, 4),
+        "paced_s": round(_paced[0], 2),
+        "api_total": sum(ctx.client.calls.values()),
+        "api_calls": dict(ctx.client.calls.most_common()),
+        "floodwaits": sum(ctx.client.floodwaits.values()),
+        "db_total": sum(mongo.values()),
+        "db_ops": dict(sorted(mongo.items(), key=lambda kv: -kv[1])),
+        "handler_errors": {k: e for k, (_, e) in handlers.items() if e},
+        "handler_bug": handler_bug,
+        "error": error,
+    }
+
+
+def format_report(rows: List[dict]) -> str:
+    out = [f"{'scenario':<15} {'wall s':>9} {'paced s':>8} {'api':>7} {'flood':>6} {'db ops':>8}  notes"]
+    for r in rows:
+        notes = []
+        if r["error"]:
+            notes.append(r["error"][:60])
+        if r["handler_bug"]:
+            notes.append("handler bug: " + r["handler_bug"][:100])
+        if r["handler_errors"]:
+            notes.append("handler errors: " + ", ".join(r["handler_errors"]))
+        out.append(f"{r['scenario']:<15} {r['wall_s']:>9.3f} {r['paced_s']:>8.1f} {r['api_total']:>7} "
+                   f"{r['floodwaits']:>6} {r['db_total']:>8}  {'; '.join(notes)}")
+        top_api = ", ".join(f"{k}={v}" for k, v in list(r["api_calls"].items())[:4])
+        top_db = ", ".join(f"{k}={v}" for k, v in list(r["db_ops"].items())[:4])
+        if top_api:
+            out.append(f"{'':<15}   api: {top_api}")
+        if top_db:
+            out.append(f"{'':<15}   db:  {top_db}")
+    return "\n".join(out)
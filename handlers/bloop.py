@@ -2,13 +2,13 @@
 from __future__ import annotations
 from pyrogram import Client, filters
 from pyrogram.types import Message
-from utils.admin_check import is_admin
+from utils.admin_check import is_admin_id
 
 def register(app: Client):
 
     @app.on_message(filters.command(["bloop"]))
     async def bloop_help(client: Client, m: Message):
-        if not m.from_user or not is_admin(m.from_user.id):
+        if not m.from_user or not is_admin_id(m.from_user.id):
             return await m.reply_text("❌ You’re not allowed to use this command.")
 
         text = """🐰 <b>SuccuBot Command List</b> 🐰
@@ -2,9 +2,8 @@
 # Contact Roni / Ruby + Anonymous message to OWNER_ID, with reply + cancel support.
 
 import os
+import asyncio
 import logging
-import itertools
-from typing import Dict, Set
 
 from pyrogram import Client, filters
 from pyrogram.types import (
@@ -12,10 +11,15 @@ from pyrogram.types import (
     InlineKeyboardMarkup, InlineKeyboardButton,
 )
 
+from utils import request_context
+from utils.anon_store import anon_store
+from utils.roles import roles
+from utils.ttl_cache import TTLSet
+
 log = logging.getLogger("contact_admins")
 
 # ────────────── ENV / CONFIG ──────────────
-OWNER_ID        = int(os.getenv("OWNER_ID", "0") or "0")
+OWNER_ID        = roles.owner_id
 
 # Prefer usernames from env; fall back to provided handles
 RONI_USERNAME   = (os.getenv("RONI_USERNAME") or "Chaossub283").lstrip("@")
@@ -26,17 +30,16 @@ RUBY_NAME       = os.getenv("RUBY_NAME", "Ruby")
 BTN_BACK_MAIN   = "⬅️ Back to Main Menu"
 
 # ────────────── STATE ──────────────
-# Users currently composing an anonymous message
-_PENDING_ANON: Set[int] = set()
-
-# Thread id -> real user id (kept secret from owner)
-_ANON_THREADS: Dict[int, int] = {}
+# Who is composing an anon, thread id -> real user id (kept secret from owner),
+# and which thread the owner is replying to all live in utils.anon_store:
+# persisted with TTLs, with an LRU of active threads in memory.
 
-# Owner currently replying: owner_id -> thread_id
-_OWNER_REPLY_TARGET: Dict[int, int] = {}
+# Albums arrive as one update per item; remember which ones we've already relayed.
+ALBUM_SETTLE_SECONDS = float(os.getenv("ANON_ALBUM_SETTLE_SECONDS", "1.0"))
+_RELAYED_ALBUMS = TTLSet(ttl=120.0, maxsize=5000)
 
-# Simple in-memory thread id generator
-_THREAD_ID_COUNTER = itertools.count(1)
+request_context.register_flow("contact_admins.compose", anon_store.is_pending)
+request_context.register_flow("contact_admins.reply", lambda uid: anon_store.reply_target(uid) is not None)
 
 # ────────────── COPY ──────────────
 CONTACT_COPY = (
@@ -47,7 +50,7 @@ CONTACT_COPY = (
 
 ANON_PROMPT = (
     "💋 Anonymous Message\n"
-    "Go ahead, sweetheart — send your secret message now (text only).\n"
+    "Go ahead, sweetheart — send your secret message now (text, photos, videos, voice notes or files).\n"
     "I’ll whisper it directly to the owner, no names attached. 😉\n\n"
     "You can also cancel with the button below if you change your mind."
 )
@@ -107,6 +110,42 @@ def _kb_owner_reply(thread_id: int) -> InlineKeyboardMarkup:
     ])
 
 
+# ────────────── RELAY HELPERS ──────────────
+def _album_key(m: Message):
+    return (m.chat.id, m.media_group_id)
+
+
+def _wants_relay(_, __, m: Message) -> bool:
+    """Only claim private messages that belong to an anon flow, so other DM handlers still see the rest."""
+    u = m.from_user
+    if not u:
+        return False
+    if m.media_group_id and _album_key(m) in _RELAYED_ALBUMS:
+        return True
+    if anon_store.is_pending(u.id):
+        return True
+    return u.id == OWNER_ID and anon_store.reply_target(u.id) is not None
+
+
+_anon_relay = filters.create(_wants_relay)
+
+
+async def _relay(client: Client, m: Message, to_chat: int, header: str, reply_markup=None):
+    """
+    Deliver m to to_chat under a header line. Text is re-sent inline; media is
+    copied server-side with copy_message/copy_media_group, so nothing passes
+    through the worker and the sender's identity isn't attached.
+    """
+    if m.text:
+        return await client.send_message(to_chat, f"{header}\n\n{m.text.strip()}", reply_markup=reply_markup)
+    head = await client.send_message(to_chat, header, reply_markup=reply_markup)
+    if m.media_group_id:
+        # let the rest of the album land before copying it as one group
+        await asyncio.sleep(ALBUM_SETTLE_SECONDS)
+        return await client.copy_media_group(to_chat, m.chat.id, m.id, reply_to_message_id=head.id)
+    return await client.copy_message(to_chat, m.chat.id, m.id, reply_to_message_id=head.id)
+
+
 # ────────────── RENDER HELPERS ──────────────
 async def _render_contact_panel(target_message: Message, edit: bool = True):
     if edit:
@@ -144,7 +183,7 @@ def register(app: Client):
     @app.on_callback_query(filters.regex(r"^contact:anon$"))
     async def anon_begin(_, q: CallbackQuery):
         if q.from_user:
-            _PENDING_ANON.add(q.from_user.id)
+            await asyncio.to_thread(anon_store.set_pending, q.from_user.id, True)
         try:
             await q.message.edit_text(
                 ANON_PROMPT,
@@ -163,8 +202,8 @@ def register(app: Client):
     @app.on_callback_query(filters.regex(r"^contact:anon_cancel$"))
     async def anon_cancel(_, q: CallbackQuery):
         uid = q.from_user.id if q.from_user else None
-        if uid is not None and uid in _PENDING_ANON:
-            _PENDING_ANON.discard(uid)
+        if uid is not None:
+            await asyncio.to_thread(anon_store.set_pending, uid, False)
         await q.answer("Anonymous message canceled.", show_alert=True)
         # Back to Contact panel
         await _render_contact_panel(q.message, edit=True)
@@ -183,11 +222,11 @@ def register(app: Client):
             await q.answer("Invalid thread id.", show_alert=True)
             return
 
-        if thread_id not in _ANON_THREADS:
+        if await asyncio.to_thread(anon_store.thread_user, thread_id) is None:
             await q.answer("This anonymous thread has expired.", show_alert=True)
             return
 
-        _OWNER_REPLY_TARGET[q.from_user.id] = thread_id
+        await asyncio.to_thread(anon_store.set_reply_target, q.from_user.id, thread_id)
 
         try:
             await q.message.edit_text(
@@ -212,39 +251,42 @@ def register(app: Client):
             return
 
         uid = q.from_user.id
-        _OWNER_REPLY_TARGET.pop(uid, None)
+        await asyncio.to_thread(anon_store.set_reply_target, uid, None)
 
         await q.answer("Reply canceled.", show_alert=True)
         # Go back to contact panel or just say done
         await _render_contact_panel(q.message, edit=True)
 
-    # Collect private messages for anon + owner replies
-    @app.on_message(filters.private & filters.text)
+    # Collect private messages (any media type) for anon + owner replies
+    @app.on_message(filters.private & ~filters.service & _anon_relay)
     async def private_router(client: Client, m: Message):
         if not m.from_user:
             return
 
         uid = m.from_user.id
-        text = (m.text or "").strip()
-        if not text:
+        if m.text is not None and not m.text.strip():
+            return
+
+        # Later items of an album we're already relaying as one group
+        if m.media_group_id and _RELAYED_ALBUMS.seen(_album_key(m)):
             return
 
         # 1) User composing anonymous message
-        if uid in _PENDING_ANON:
+        if anon_store.is_pending(uid):
             if OWNER_ID <= 0:
-                _PENDING_ANON.discard(uid)
+                await asyncio.to_thread(anon_store.set_pending, uid, False)
                 await m.reply_text("Owner is not configured.", reply_markup=_kb_back_main())
                 return
 
-            # allocate a thread id for this anon
-            thread_id = next(_THREAD_ID_COUNTER)
-            _ANON_THREADS[thread_id] = uid
-
             try:
-                # Forward to OWNER with a reply button
-                await client.send_message(
+                # allocate a persistent, never-reused thread id for this anon
+                thread_id = await asyncio.to_thread(anon_store.new_thread, uid)
+                # Relay to OWNER with a reply button
+                await _relay(
+                    client,
+                    m,
                     OWNER_ID,
-                    f"🕵️ Anonymous message (Thread #{thread_id}):\n\n{text}",
+                    f"🕵️ Anonymous message (Thread #{thread_id}):",
                     reply_markup=_kb_owner_thread(thread_id),
                 )
                 await m.reply_text("✅ Sent anonymously.", reply_markup=_kb_back_main())
@@ -255,25 +297,22 @@ def register(app: Client):
                     reply_markup=_kb_back_main(),
                 )
             finally:
-                _PENDING_ANON.discard(uid)
+                await asyncio.to_thread(anon_store.set_pending, uid, False)
             return
 
         # 2) Owner replying to anon
-        if uid == OWNER_ID and uid in _OWNER_REPLY_TARGET:
-            thread_id = _OWNER_REPLY_TARGET.get(uid)
-            target_id = _ANON_THREADS.get(thread_id or -1)
+        thread_id = anon_store.reply_target(uid) if uid == OWNER_ID else None
+        if thread_id is not None:
+            target_id = await asyncio.to_thread(anon_store.thread_user, thread_id)
 
-            if not thread_id or not target_id:
-                # Thread vanished or never existed
-                _OWNER_REPLY_TARGET.pop(uid, None)
+            if not target_id:
+                # Thread expired or never existed
+                await asyncio.to_thread(anon_store.set_reply_target, uid, None)
                 await m.reply_text("That anon thread has expired.", reply_markup=_kb_back_main())
                 return
 
             try:
-                await client.send_message(
-                    target_id,
-                    f"💌 Reply from admin:\n\n{text}",
-                )
+                await _relay(client, m, target_id, "💌 Reply from admin:")
                 await m.reply_text("✅ Your reply was sent to the anon.", reply_markup=_kb_back_main())
             except Exception as e:
                 log.warning("Owner reply forward failed: %s", e)
@@ -282,7 +321,7 @@ def register(app: Client):
                     reply_markup=_kb_back_main(),
                 )
             finally:
-                _OWNER_REPLY_TARGET.pop(uid, None)
+                await asyncio.to_thread(anon_store.set_reply_target, uid, None)
             return
 
         # Otherwise: ignore, let other handlers handle this private message if needed.
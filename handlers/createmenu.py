@@ -1,19 +1,13 @@
 # handlers/createmenu.py
-import os
 import logging
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
 from utils.menu_store import store
+from utils.roles import roles
 
 log = logging.getLogger(__name__)
 
-OWNER_ID = int(os.getenv("OWNER_ID", "0") or "0")
-SUPER_ADMINS = {
-    int(x)
-    for x in os.getenv("SUPER_ADMINS", "").replace(",", " ").split()
-    if x.isdigit()
-}
 
 USAGE = (
     "✨ <b>Create a menu</b>\n\n"
@@ -29,7 +23,7 @@ USAGE = (
 
 def _allowed(user_id: int) -> bool:
     # Only Roni + SUPER_ADMINS
-    return user_id == OWNER_ID or user_id in SUPER_ADMINS
+    return roles.is_super_admin(user_id)
 
 
 def register(app: Client) -> None:
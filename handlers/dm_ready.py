@@ -7,6 +7,9 @@ from datetime import datetime, timezone
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
+from utils import request_context
+from utils.roles import roles
+
 log = logging.getLogger("dm_ready")
 
 # -------- time utils (LA) ----------
@@ -121,7 +124,7 @@ class DMReadyStore:
         return list(data.values())
 
 store = DMReadyStore()
-OWNER_ID = int(os.getenv("OWNER_ID", "0") or 0)
+OWNER_ID = roles.owner_id
 
 # helper for other handlers
 async def mark_dm_ready_from_message(m: Message) -> None:
@@ -149,7 +152,7 @@ def register(app: Client):
             uid = m.from_user.id if m.from_user else 0
             log.info("/dmreadylist from %s", uid)
 
-            if uid != OWNER_ID:
+            if not roles.is_owner(uid):
                 await m.reply_text("Only the owner can run this.")
                 return
 
@@ -197,4 +200,7 @@ def register(app: Client):
         group=10
     )
     async def _mark_all_private(_: Client, m: Message):
+        # the shared context already knows returning users; only first contact touches the store
+        if m.from_user and (await request_context.get(m)).dm_ready:
+            return
         await mark_dm_ready_from_message(m)
@@ -6,13 +6,13 @@ from dateutil import parser as dtparse
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from utils.dmready_store import global_store as store
+from utils.roles import roles
 
 LA_TZ = pytz.timezone("America/Los_Angeles")
-OWNER_ID = int(os.getenv("OWNER_ID", "0") or "0")
 BOT_ID = int(os.getenv("BOT_ID", "0") or "0")  # Optional: set to bot's ID to always hide it
 
 def _allowed(uid: int) -> bool:
-    return uid == OWNER_ID
+    return roles.is_owner(uid)
 
 def _fmt_la(ts_iso: str | None) -> str:
     if not ts_iso:
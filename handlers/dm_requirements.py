@@ -12,6 +12,7 @@ from pyrogram.enums import ChatMemberStatus
 
 from req_store import ReqStore
 from payments import has_met_requirements, days_left_in_month
+from utils.roles import roles
 
 log = logging.getLogger("handlers.dm_requirements")
 
@@ -55,12 +56,7 @@ REMINDER_TEMPLATES = [
 
 
 async def _is_admin(client: Client, chat_id: int, user_id: int) -> bool:
-    try:
-        m = await client.get_chat_member(chat_id, user_id)
-        return m.status in (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR)
-    except Exception as e:
-        log.warning("dm_requirements: admin check failed for %s in %s: %s", user_id, chat_id, e)
-        return False
+    return await roles.is_chat_admin(client, chat_id, user_id)
 
 
 async def _is_in_target_chat(client: Client, user_id: int) -> bool:
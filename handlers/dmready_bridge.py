@@ -6,25 +6,33 @@ from typing import Optional
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
+from utils import request_context
+from utils.roles import roles
+
 log = logging.getLogger("dmready_bridge")
 
-OWNER_ID = int(os.getenv("OWNER_ID", os.getenv("BOT_OWNER_ID", "6964994611")))
+OWNER_ID = roles.owner_id
 
 # Requirements panel uses db="Succubot" and coll="requirements_members"
 MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI")
 
 
+_members_coll = None
+
+
 def _get_members_coll():
-    if not MONGO_URI:
-        return None
+    # one client for the process (this used to open a new one per private message)
+    global _members_coll
+    if _members_coll is not None or not MONGO_URI:
+        return _members_coll
     try:
         from pymongo import MongoClient
         mongo = MongoClient(MONGO_URI, serverSelectionTimeoutMS=8000)
         db = mongo["Succubot"]
-        return db["requirements_members"]
+        _members_coll = db["requirements_members"]
     except Exception as e:
         log.warning("dmready_bridge: could not connect to mongo for requirements_members: %s", e)
-        return None
+    return _members_coll
 
 
 def _upsert_dm_ready_flag(user_id: int) -> None:
@@ -39,9 +47,11 @@ def _upsert_dm_ready_flag(user_id: int) -> None:
     try:
         coll.update_one(
             {"user_id": user_id},
-            {"$set": {"dm_ready": True}},
+            # "~" = nameless in the panel's member pickers (see requirements_panel._name_key)
+            {"$set": {"dm_ready": True}, "$setOnInsert": {"name_key": "~"}},
             upsert=True,
         )
+        request_context.remember(user_id, dm_ready=True)
     except Exception as e:
         log.warning("dmready_bridge: update_one failed for user_id=%s: %s", user_id, e)
 
@@ -56,6 +66,8 @@ def register(app: Client):
         try:
             if not m.from_user:
                 return
+            if (await request_context.get(m)).dm_ready:
+                return
             _upsert_dm_ready_flag(m.from_user.id)
         except Exception as e:
             log.warning("dmready_bridge: mirror on private message failed: %s", e)
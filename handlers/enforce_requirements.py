@@ -22,7 +22,9 @@
 
 import os
 import asyncio
+import logging
 import math
+from html import escape
 from datetime import datetime
 from typing import Optional, Tuple, Dict, List
 
@@ -31,13 +33,18 @@ from pyrogram.enums import ChatType
 from pyrogram.types import Message
 from pyrogram.errors import FloodWait, UserIsBlocked, PeerIdInvalid, RPCError, BadRequest
 
+TZ = os.getenv("TZ", "America/Los_Angeles")
 try:
     import pytz
-    TZ = os.getenv("TZ", "America/Los_Angeles")
     _TZ = pytz.timezone(TZ)
 except Exception:
     _TZ = None
 
+from utils.boot import on_init
+from utils.scheduler import scheduler
+from utils.roles import roles
+from utils.user_profiles import profiles
+
 # ---- ReqStore ----
 try:
     from req_store import ReqStore, _month_key  # your provided store helper
@@ -57,7 +64,7 @@ def _to_int(s: Optional[str]) -> Optional[int]:
         return None
 
 SANCTUARY_CHAT_ID = _to_int(os.getenv("SANCTUARY_CHAT_ID"))   # main group
-OWNER_ID          = _to_int(os.getenv("OWNER_ID"))
+OWNER_ID          = roles.owner_id
 REQ_AUDIT_CHAT_ID = _to_int(os.getenv("REQ_AUDIT_CHAT_ID") or (str(OWNER_ID) if OWNER_ID else "0"))
 REQ_AUDIT_VERBOSE = (os.getenv("REQ_AUDIT_VERBOSE", "0").lower() in ("1","true","yes","on"))
 
@@ -207,6 +214,7 @@ async def _batch_remind(app: Client) -> Tuple[int, int, int]:
         return checked, sent, failed
 
     dm_ready_map: Dict[str, dict] = _store.list_dm_ready_global()  # {uid_str: {...}}
+    targets = []
     for s_uid in list(dm_ready_map.keys()):
         try:
             uid = int(s_uid)
@@ -224,17 +232,13 @@ async def _batch_remind(app: Client) -> Tuple[int, int, int]:
         # skip if qualified (either condition)
         if _qualifies(u.purchases, u.games):
             continue
+        targets.append((uid, u))
 
-        # Build text & send
-        name = f"darling"
-        try:
-            user = await app.get_users(uid)
-            if user and user.first_name:
-                name = user.first_name
-        except Exception:
-            pass
+    # names for the whole batch: cache first, then get_users 200 at a time
+    await profiles.resolve(app, [uid for uid, _ in targets])
 
-        text = _spicy_dm(name, u.purchases, u.games)
+    for uid, u in targets:
+        text = _spicy_dm(profiles.first_name(uid, "darling"), u.purchases, u.games)
         ok = await _send_dm_safe(app, uid, text)
         if ok:
             sent += 1
@@ -257,6 +261,8 @@ async def _monthly_report(app: Client, title: str = "Monthly Requirement Report"
         return
 
     # Build per-user lines and totals
+    names = await profiles.resolve(app, [int(k) for k in list(raw)[:300] if str(k).lstrip("-").isdigit()])
+
     lines: List[str] = []
     total_spend = 0.0
     total_games = 0
@@ -283,7 +289,8 @@ async def _monthly_report(app: Client, title: str = "Monthly Requirement Report"
             kept += 1
         else:
             removed += 1
-        lines.append(f"{status} <code>{uid}</code> — ${purchases:.2f}, {games} game{'s' if games!=1 else ''}")
+        who = f"{escape(profiles.label(uid))} <code>{uid}</code>" if uid in names else f"<code>{uid}</code>"
+        lines.append(f"{status} {who} — ${purchases:.2f}, {games} game{'s' if games!=1 else ''}")
 
     header = (
         f"📊 <b>{title}</b> ({mk})\n"
@@ -348,6 +355,20 @@ async def _monthly_sweep(app: Client):
     await _audit(app, f"🧹 <b>Monthly Sweep Summary</b>: kept={kept}, removed={removed}, failures={failures}.")
     await _monthly_report(app, "Post-Sweep Monthly Report")
 
+# ----------------- Scheduled jobs ------------------
+
+@scheduler.task("enforce.remind")
+async def _job_remind(app: Client, payload: dict):
+    await _batch_remind(app)
+
+@scheduler.task("enforce.sweep")
+async def _job_sweep(app: Client, payload: dict):
+    await _monthly_sweep(app)
+
+@scheduler.task("enforce.report")
+async def _job_report(app: Client, payload: dict):
+    await _monthly_report(app)
+
 # ----------------- Registration ------------------
 
 def register(app: Client):
@@ -403,13 +424,8 @@ def register(app: Client):
                 return await m.reply_text("No data for that user yet this month.")
             if _qualifies(u.purchases, u.games):
                 return await m.reply_text("They already qualify. No reminder needed.")
-            name = "darling"
-            try:
-                uobj = await client.get_users(target_id)
-                if uobj and uobj.first_name:
-                    name = uobj.first_name
-            except Exception:
-                pass
+            await profiles.resolve(client, [target_id])
+            name = profiles.first_name(target_id, "darling")
             await m.reply_text(_spicy_dm(name, u.purchases, u.games), disable_web_page_preview=True)
             return
 
@@ -451,17 +467,17 @@ def register(app: Client):
         await _monthly_sweep(client)
         await m.reply_text("Sweep complete (see audit).")
 
-    # ---- Scheduler (1st of month @ 00:10 local) ----
+    # ---- Scheduled jobs (shared scheduler, see /jobs); declared in _declare_jobs ----
+    scheduler.attach(app)
+
+
+@on_init("enforce_requirements.jobs")
+def _declare_jobs():
+    # Reminders on the last day @ 18:00, sweep on the 1st @ 00:10, report @ 00:12
     try:
-        from apscheduler.schedulers.asyncio import AsyncIOScheduler
-        from apscheduler.triggers.cron import CronTrigger
-
-        _scheduler = AsyncIOScheduler(timezone=TZ if _TZ else None)
-        # Reminders on the last day @ 18:00, and sweep on the 1st @ 00:10 (adjust if you prefer)
-        _scheduler.add_job(_batch_remind, CronTrigger(day="last", hour=18, minute=0), args=[app])
-        _scheduler.add_job(_monthly_sweep, CronTrigger(day=1, hour=0, minute=10), args=[app])
-        _scheduler.add_job(_monthly_report, CronTrigger(day=1, hour=0, minute=12), args=[app])
-        _scheduler.start()
+        scheduler.recurring("enforce.remind", "enforce.remind", {"day": "last", "hour": 18, "minute": 0}, tz=TZ)
+        scheduler.recurring("enforce.sweep", "enforce.sweep", {"day": 1, "hour": 0, "minute": 10}, tz=TZ)
+        scheduler.recurring("enforce.report", "enforce.report", {"day": 1, "hour": 0, "minute": 12}, tz=TZ)
     except Exception:
-        # If APScheduler is not available or fails, we just skip scheduling; manual commands still work.
-        pass
+        # If the job store is unavailable we just skip scheduling; manual commands still work.
+        logging.getLogger(__name__).exception("enforce_requirements: could not schedule jobs")
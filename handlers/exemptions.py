@@ -7,6 +7,8 @@ from typing import Any, Dict, Iterable, List, Optional, Set
 from pyrogram import Client, filters
 from pyrogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 
+from utils.roles import roles
+
 # Try to use your ReqStore if available
 try:
     from req_store import ReqStore
@@ -14,25 +16,6 @@ try:
 except Exception:
     _store = None
 
-def _super_admins() -> Set[int]:
-    raw = os.getenv("SUPER_ADMINS", "")
-    ids: Set[int] = set()
-    for tok in raw.replace(";", ",").split(","):
-        tok = tok.strip()
-        if tok and tok.lstrip("-").isdigit():
-            ids.add(int(tok))
-    # legacy single var
-    for v in (os.getenv("OWNER_ID"), os.getenv("SUPER_ADMIN_ID")):
-        if v and v.isdigit(): ids.add(int(v))
-    return ids
-
-async def _is_group_admin(app: Client, chat_id: int, user_id: int) -> bool:
-    try:
-        m = await app.get_chat_member(chat_id, user_id)
-        return (m.privileges is not None) or (m.status in ("administrator", "creator"))
-    except Exception:
-        return False
-
 def _fmt_dt_remaining(until_ts: Optional[float]) -> str:
     if not until_ts:  # None or 0 → no expiration
         return "no expiration"
@@ -147,10 +130,10 @@ def register(app: Client):
     async def cmd_exempt_list(client: Client, m: Message):
         # Permissions
         if m.chat and m.chat.type != "private":
-            if not await _is_group_admin(client, m.chat.id, m.from_user.id):
+            if not await roles.is_chat_admin(client, m.chat.id, m.from_user.id):
                 return await m.reply_text("Admins only.", reply_markup=_back_home_kb())
         else:
-            if m.from_user.id not in _super_admins():
+            if not roles.is_super_admin(m.from_user.id):
                 return await m.reply_text("Admins only.", reply_markup=_back_home_kb())
 
         items = _from_req_store()
@@ -1,8 +1,18 @@
 import os
+import asyncio
 import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
 from pyrogram import filters
-from pyrogram.types import Message
-from pymongo import MongoClient
+from pyrogram.enums import ChatMemberStatus, ChatType
+from pyrogram.types import Message, ChatMemberUpdated
+from pymongo import MongoClient, ASCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from utils.boot import on_init
+from utils.rate_limit import RateLimiter, call_with_floodwait
+from utils.roles import roles
 
 """
 Federation Handler for SuccuBot — Miss Rose-style federations, MongoDB-powered.
@@ -19,8 +29,119 @@ mongo_client = MongoClient(MONGO_URI)
 db = mongo_client["succubot"]
 feds = db["federations"]
 groups = db["groups"]
+# one document per (fed_id, user_id) instead of an ever-growing array on the fed
+fed_bans = db["federation_bans"]
+
+
+@on_init("federation.indexes")
+def _ensure_indexes():
+    fed_bans.create_index([("fed_id", ASCENDING), ("user_id", ASCENDING)], unique=True)
+    groups.create_index([("fed_id", ASCENDING)])
+    # the migration upserts on (fed_id, user_id), so it runs only once that index exists
+    try:
+        moved = _migrate_legacy_bans()
+        if moved:
+            logging.info(f"federation: migrated {moved} legacy bans into federation_bans")
+    except Exception as e:
+        logging.error(f"federation: legacy ban migration failed: {e}")
+
+
+# Fan-out limits for banning across every linked group
+FEDBAN_RATE = float(os.getenv("FEDBAN_RATE_PER_SEC", "20"))
+FEDBAN_CONCURRENCY = int(os.getenv("FEDBAN_CONCURRENCY", "8"))
+_limiter = RateLimiter(rate=FEDBAN_RATE, concurrency=FEDBAN_CONCURRENCY)
+
+# Runs in its own handler group so welcome/sanctu member-update handlers still fire
+FED_GUARD_GROUP = 7
+
+# ────────────── Caches ──────────────
+# fed_id -> banned user ids (loaded once per fed, kept in sync by fedban/fedunban)
+_BANS: Dict[str, Set[int]] = {}
+# chat_id -> fed_id (or None if the group isn't linked)
+_GROUP_FED: Dict[int, Optional[str]] = {}
+
+
+def _fed_ban_set(fed_id: str) -> Set[int]:
+    cached = _BANS.get(fed_id)
+    if cached is None:
+        cached = {
+            int(d["user_id"])
+            for d in fed_bans.find({"fed_id": fed_id}, {"user_id": 1, "_id": 0})
+        }
+        _BANS[fed_id] = cached
+    return cached
+
+
+def is_fedbanned(fed_id: str, user_id: int) -> bool:
+    return user_id in _fed_ban_set(fed_id)
+
+
+def _group_fed(chat_id: int) -> Optional[str]:
+    if chat_id not in _GROUP_FED:
+        doc = groups.find_one({"chat_id": chat_id}, {"fed_id": 1, "_id": 0})
+        _GROUP_FED[chat_id] = doc.get("fed_id") if doc else None
+    return _GROUP_FED[chat_id]
+
+
+def _linked_groups(fed_id: str) -> List[int]:
+    out = [int(d["chat_id"]) for d in groups.find({"fed_id": fed_id}, {"chat_id": 1, "_id": 0})]
+    for cid in out:
+        _GROUP_FED[cid] = fed_id
+    return out
+
+
+def _migrate_legacy_bans() -> int:
+    """Move bans from the old embedded `bans` arrays into federation_bans."""
+    moved = 0
+    for fed in feds.find({"bans.0": {"$exists": True}}, {"fed_id": 1, "bans": 1}):
+        fed_id = fed["fed_id"]
+        ops = [
+            UpdateOne(
+                {"fed_id": fed_id, "user_id": int(b["user_id"])},
+                {"$setOnInsert": {"reason": b.get("reason", ""), "created_at": datetime.now(timezone.utc)}},
+                upsert=True,
+            )
+            for b in fed.get("bans", [])
+            if b.get("user_id") is not None
+        ]
+        if ops:
+            fed_bans.bulk_write(ops, ordered=False)
+            moved += len(ops)
+        feds.update_one({"_id": fed["_id"]}, {"$unset": {"bans": ""}})
+        _BANS.pop(fed_id, None)
+    return moved
 
-SUPER_ADMIN_ID = 6964994611
+
+async def _fanout(client, fed_id: str, user_id: int, *, ban: bool) -> Tuple[int, int, List[str]]:
+    """
+    Ban (or unban) user_id in every group linked to fed_id, concurrently under the
+    rate limiter. Returns (ok, total, failure lines).
+    """
+    chat_ids = _linked_groups(fed_id)
+    action = client.ban_chat_member if ban else client.unban_chat_member
+
+    async def _one(chat_id: int):
+        async with _limiter:
+            await call_with_floodwait(action, chat_id, user_id)
+
+    results = await asyncio.gather(*(_one(c) for c in chat_ids), return_exceptions=True)
+    failures = [
+        f"<code>{cid}</code>: {type(r).__name__}"
+        for cid, r in zip(chat_ids, results)
+        if isinstance(r, Exception)
+    ]
+    return len(chat_ids) - len(failures), len(chat_ids), failures
+
+
+def _fanout_summary(verb: str, ok: int, total: int, failures: List[str]) -> str:
+    if not total:
+        return "\n<i>No linked groups to enforce in.</i>"
+    text = f"\n{verb} in <b>{ok}/{total}</b> linked group(s)."
+    if failures:
+        text += "\n<b>Failed:</b>\n" + "\n".join(failures[:10])
+        if len(failures) > 10:
+            text += f"\n…and {len(failures) - 10} more"
+    return text
 
 def is_fed_admin(user_id, fed_id):
     fed = feds.find_one({"fed_id": fed_id})
@@ -30,7 +151,7 @@ def is_fed_admin(user_id, fed_id):
         return True
     if user_id in fed.get("admins", []):
         return True
-    if user_id == SUPER_ADMIN_ID:
+    if roles.is_super_admin(user_id):
         return True
     return False
 
@@ -53,7 +174,6 @@ def register(app):
                 "name": fed_name,
                 "owner_id": message.from_user.id,
                 "admins": [],
-                "bans": []
             })
         except Exception as e:
             await message.reply(f"Database error:\n<code>{e}</code>")
@@ -63,7 +183,7 @@ def register(app):
 
     @app.on_message(filters.command("fedlist") & filters.group)
     async def fed_list(client, message: Message):
-        fed_list = list(feds.find({}))
+        fed_list = list(feds.find({}, {"fed_id": 1, "name": 1, "_id": 0}))
         if not fed_list:
             await message.reply("No federations found.")
             return
@@ -83,11 +203,16 @@ def register(app):
         if not fed:
             await message.reply("No federation found with that ID.")
             return
-        if message.from_user.id != fed["owner_id"] and message.from_user.id != SUPER_ADMIN_ID:
+        if message.from_user.id != fed["owner_id"] and not roles.is_super_admin(message.from_user.id):
             await message.reply("Only the federation owner or super admin can delete this federation.")
             return
         feds.delete_one({"fed_id": fed_id})
+        fed_bans.delete_many({"fed_id": fed_id})
         groups.update_many({"fed_id": fed_id}, {"$unset": {"fed_id": ""}})
+        _BANS.pop(fed_id, None)
+        for cid, fid in list(_GROUP_FED.items()):
+            if fid == fed_id:
+                _GROUP_FED[cid] = None
         await message.reply(f"✅ Federation <b>{fed_id}</b> deleted and unlinked from all groups.")
 
     @app.on_message(filters.command("joinfed") & filters.group)
@@ -102,11 +227,13 @@ def register(app):
             await message.reply("No federation found with that ID.")
             return
         groups.update_one({"chat_id": message.chat.id}, {"$set": {"fed_id": fed_id}}, upsert=True)
+        _GROUP_FED[message.chat.id] = fed_id
         await message.reply(f"✅ Group linked to federation <b>{fed_id}</b>.")
 
     @app.on_message(filters.command("leavefed") & filters.group)
     async def leave_fed(client, message: Message):
         groups.update_one({"chat_id": message.chat.id}, {"$unset": {"fed_id": ""}})
+        _GROUP_FED[message.chat.id] = None
         await message.reply("✅ Group unlinked from its federation.")
 
     @app.on_message(filters.command("linkgroup") & filters.group)
@@ -121,12 +248,12 @@ def register(app):
             await message.reply("No federation found with that ID.")
             return
         groups.update_one({"chat_id": message.chat.id}, {"$set": {"fed_id": fed_id}}, upsert=True)
+        _GROUP_FED[message.chat.id] = fed_id
         await message.reply(f"✅ Group linked to federation <b>{fed_id}</b>.")
 
     @app.on_message(filters.command("fedban") & filters.group)
     async def fedban_user(client, message: Message):
-        group_doc = groups.find_one({"chat_id": message.chat.id})
-        fed_id = group_doc.get("fed_id") if group_doc else None
+        fed_id = _group_fed(message.chat.id)
         if not fed_id:
             await message.reply("This group is not part of a federation.")
             return
@@ -158,19 +285,30 @@ def register(app):
             await message.reply("Couldn't find user to fedban.")
             return
         user_id = user.id
-        fed = feds.find_one({"fed_id": fed_id})
-        if any(b['user_id'] == user_id for b in fed.get("bans", [])):
+        if is_fedbanned(fed_id, user_id):
             await message.reply("User is already fedbanned.")
             return
-        ban_entry = {"user_id": user_id, "reason": reason}
-        feds.update_one({"fed_id": fed_id}, {"$push": {"bans": ban_entry}})
+        try:
+            fed_bans.insert_one({
+                "fed_id": fed_id,
+                "user_id": user_id,
+                "reason": reason,
+                "banned_by": message.from_user.id,
+                "created_at": datetime.now(timezone.utc),
+            })
+        except DuplicateKeyError:
+            pass
+        _fed_ban_set(fed_id).add(user_id)
+        ok, total, failures = await _fanout(client, fed_id, user_id, ban=True)
         reason_text = f"\n<b>Reason:</b> {reason}" if reason else ""
-        await message.reply(f"✅ {user.mention} has been federationally banned!{reason_text}")
+        await message.reply(
+            f"✅ {user.mention} has been federationally banned!{reason_text}"
+            + _fanout_summary("Banned", ok, total, failures)
+        )
 
     @app.on_message(filters.command("fedunban") & filters.group)
     async def fedunban_user(client, message: Message):
-        group_doc = groups.find_one({"chat_id": message.chat.id})
-        fed_id = group_doc.get("fed_id") if group_doc else None
+        fed_id = _group_fed(message.chat.id)
         if not fed_id:
             await message.reply("This group is not part of a federation.")
             return
@@ -197,30 +335,37 @@ def register(app):
             await message.reply("Couldn't find user to fedunban.")
             return
         user_id = user.id
-        fed = feds.find_one({"fed_id": fed_id})
-        if not any(b['user_id'] == user_id for b in fed.get("bans", [])):
+        if not is_fedbanned(fed_id, user_id):
             await message.reply("User is not fedbanned.")
             return
-        feds.update_one({"fed_id": fed_id}, {"$pull": {"bans": {"user_id": user_id}}})
-        await message.reply(f"✅ {user.mention} has been federationally unbanned!")
+        fed_bans.delete_one({"fed_id": fed_id, "user_id": user_id})
+        _fed_ban_set(fed_id).discard(user_id)
+        ok, total, failures = await _fanout(client, fed_id, user_id, ban=False)
+        await message.reply(
+            f"✅ {user.mention} has been federationally unbanned!"
+            + _fanout_summary("Unbanned", ok, total, failures)
+        )
 
     @app.on_message(filters.command("fedbans") & filters.group)
     async def fedbans_list(client, message: Message):
-        group_doc = groups.find_one({"chat_id": message.chat.id})
-        fed_id = group_doc.get("fed_id") if group_doc else None
+        fed_id = _group_fed(message.chat.id)
         if not fed_id:
             await message.reply("This group is not part of a federation.")
             return
-        fed = feds.find_one({"fed_id": fed_id})
-        ban_list = fed.get("bans", [])
-        if not ban_list:
+        total = fed_bans.count_documents({"fed_id": fed_id})
+        if not total:
             await message.reply("No users are fedbanned in this federation.")
             return
+        ban_list = fed_bans.find(
+            {"fed_id": fed_id}, {"user_id": 1, "reason": 1, "_id": 0}
+        ).sort("user_id", ASCENDING).limit(100)
         ban_text = "\n".join([
             f"<code>{ban['user_id']}</code>" + (f" — {ban['reason']}" if ban.get("reason") else "")
             for ban in ban_list
         ])
-        await message.reply(f"🚫 Fedbanned users in <b>{fed_id}</b>:\n{ban_text}")
+        if total > 100:
+            ban_text += f"\n…and {total - 100} more"
+        await message.reply(f"🚫 Fedbanned users in <b>{fed_id}</b> ({total}):\n{ban_text}")
 
     @app.on_message(filters.command("addfedadmin") & filters.group)
     async def add_fed_admin(client, message: Message):
@@ -234,7 +379,7 @@ def register(app):
         if not fed:
             await message.reply("No federation found with that ID.")
             return
-        if message.from_user.id != fed["owner_id"] and message.from_user.id != SUPER_ADMIN_ID:
+        if message.from_user.id != fed["owner_id"] and not roles.is_super_admin(message.from_user.id):
             await message.reply("Only the federation owner or super admin can add federation admins.")
             return
         try:
@@ -263,7 +408,7 @@ def register(app):
         if not fed:
             await message.reply("No federation found with that ID.")
             return
-        if message.from_user.id != fed["owner_id"] and message.from_user.id != SUPER_ADMIN_ID:
+        if message.from_user.id != fed["owner_id"] and not roles.is_super_admin(message.from_user.id):
             await message.reply("Only the federation owner or super admin can remove federation admins.")
             return
         try:
@@ -304,3 +449,26 @@ def register(app):
                 except Exception:
                     text += f"- <code>{admin_id}</code>\n"
         await message.reply(text)
+
+    # Join-time enforcement: a fedbanned user joining any linked group is banned on sight.
+    @app.on_chat_member_updated(group=FED_GUARD_GROUP)
+    async def fed_join_guard(client, upd: ChatMemberUpdated):
+        chat = upd.chat
+        new = upd.new_chat_member
+        if not chat or chat.type not in (ChatType.GROUP, ChatType.SUPERGROUP):
+            return
+        if not new or not new.user or new.user.is_self:
+            return
+        if new.status not in (ChatMemberStatus.MEMBER, ChatMemberStatus.RESTRICTED):
+            return
+        fed_id = _group_fed(chat.id)
+        if not fed_id or not is_fedbanned(fed_id, new.user.id):
+            return
+        try:
+            await call_with_floodwait(client.ban_chat_member, chat.id, new.user.id)
+            await client.send_message(
+                chat.id,
+                f"🚫 {new.user.mention} is fedbanned in <b>{fed_id}</b> and was removed.",
+            )
+        except Exception as e:
+            logging.warning(f"federation: join-time ban failed for {new.user.id} in {chat.id}: {e}")
@@ -0,0 +1,264 @@
+# handlers/flyer.py
+"""
+Flyers: saved promo posts (photo + caption, or plain text) that can be blasted
+to many groups at once.
+
+Storage: utils.mongo.flyer_collection, one doc per flyer:
+    {name (lowercase, unique), photo (file_id or URL), caption, created_by, updated_at,
+     last_posted_at, last_results}
+Each blast is also logged to db.flyer_runs with a per-group result row.
+
+Groups are given as a comma-separated list of ids, @usernames or env aliases
+(SUCCUBUS_SANCTUARY, MODELS_CHAT, …), resolved like /warmup does. Posting fans
+out concurrently through a RateLimiter; URL photos go through the media
+registry so they are uploaded once and reused by file_id.
+
+Commands (super admins / owner):
+  /addflyer <name> [caption]        — attach or reply to a photo; or text-only with a caption
+  /flyer <name>                     — preview
+  /flyers                           — list
+  /deleteflyer <name>
+  /postflyer <name> <group[,group…]> — post now
+Scheduling lives in handlers/flyer_scheduler.py.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from html import escape
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from handlers.warmup import resolve_group_name
+from utils.admin_check import is_super_admin_id
+from utils.media_registry import registry as _media
+from utils.mongo import db, flyer_collection
+from utils.rate_limit import RateLimiter, call_with_floodwait
+
+log = logging.getLogger(__name__)
+
+FLYER_RATE_PER_SEC = float(os.getenv("FLYER_RATE_PER_SEC", "15"))
+FLYER_CONCURRENCY = int(os.getenv("FLYER_CONCURRENCY", "6"))
+
+flyer_runs = db.flyer_runs
+_limiter: Optional[RateLimiter] = None
+_indexes_ready = False
+
+
+def _ensure_indexes() -> None:
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    flyer_collection.create_index([("name", ASCENDING)], unique=True)
+    flyer_runs.create_index([("flyer", ASCENDING), ("started_at", ASCENDING)])
+    _indexes_ready = True
+
+
+def _get_limiter() -> RateLimiter:
+    # created lazily so it binds to the running bot loop
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(rate=FLYER_RATE_PER_SEC, concurrency=FLYER_CONCURRENCY)
+    return _limiter
+
+
+def _norm(name: str) -> str:
+    return (name or "").strip().lower()
+
+
+def parse_groups(spec: str) -> List[str]:
+    """'MODELS_CHAT,@foo,-100123' -> resolved, de-duplicated targets (order kept)."""
+    out: List[str] = []
+    for tok in (spec or "").split(","):
+        tok = tok.strip()
+        if not tok:
+            continue
+        g = resolve_group_name(tok)
+        if g not in out:
+            out.append(g)
+    return out
+
+
+def _chat_ref(group: str):
+    try:
+        return int(group)
+    except ValueError:
+        return group
+
+
+# ---------- store ----------
+
+def get_flyer(name: str) -> Optional[Dict[str, Any]]:
+    _ensure_indexes()
+    return flyer_collection.find_one({"name": _norm(name)})
+
+
+def save_flyer(name: str, photo: Optional[str], caption: str, created_by: int) -> None:
+    _ensure_indexes()
+    flyer_collection.update_one(
+        {"name": _norm(name)},
+        {"$set": {"name": _norm(name), "photo": photo, "caption": caption,
+                  "created_by": created_by, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+def delete_flyer(name: str) -> bool:
+    _ensure_indexes()
+    return flyer_collection.delete_one({"name": _norm(name)}).deleted_count > 0
+
+
+def list_flyers() -> List[Dict[str, Any]]:
+    _ensure_indexes()
+    return list(flyer_collection.find({}, {"name": 1, "photo": 1, "last_posted_at": 1}).sort("name", ASCENDING))
+
+
+def _record_run(flyer: str, job_id: Optional[str], started: datetime, duration: float,
+                results: List[Dict[str, Any]]) -> None:
+    flyer_runs.insert_one({
+        "flyer": flyer, "job_id": job_id, "started_at": started,
+        "duration": duration, "results": results,
+    })
+    flyer_collection.update_one(
+        {"name": flyer},
+        {"$set": {"last_posted_at": started,
+                  "last_results": {r["group"]: {"ok": r["ok"], "error": r.get("error")} for r in results}}},
+    )
+
+
+# ---------- posting ----------
+
+async def _post_one(client: Client, flyer: Dict[str, Any], group: str) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"group": group, "ok": False, "message_id": None, "error": None}
+    caption = flyer.get("caption") or ""
+    try:
+        async with _get_limiter():
+            if flyer.get("photo"):
+                msg = await call_with_floodwait(
+                    _media.send_photo, client, _chat_ref(group), flyer["photo"], caption=caption
+                )
+            else:
+                msg = await call_with_floodwait(client.send_message, _chat_ref(group), caption)
+        row["ok"] = True
+        row["message_id"] = getattr(msg, "id", None)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+        log.warning("flyer %s → %s failed: %s", flyer.get("name"), group, e)
+    return row
+
+
+async def post_flyer(client: Client, name: str, groups: List[str],
+                     job_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Post flyer `name` to every group concurrently; returns one result row per group."""
+    flyer = await asyncio.to_thread(get_flyer, name)
+    if not flyer:
+        raise ValueError(f"no flyer named {name!r}")
+    started, t0 = datetime.now(timezone.utc), time.perf_counter()
+    results = list(await asyncio.gather(*(_post_one(client, flyer, g) for g in groups)))
+    duration = time.perf_counter() - t0
+    try:
+        await asyncio.to_thread(_record_run, flyer["name"], job_id, started, duration, results)
+    except Exception:
+        log.exception("flyer: failed to record run for %s", flyer["name"])
+    log.info("flyer %s posted to %d/%d groups in %.2fs",
+             flyer["name"], sum(r["ok"] for r in results), len(results), duration)
+    return results
+
+
+def format_results(name: str, results: List[Dict[str, Any]]) -> str:
+    ok = sum(1 for r in results if r["ok"])
+    lines = [f"📣 <b>{escape(name)}</b>: posted to {ok}/{len(results)} group(s)"]
+    for r in results:
+        if r["ok"]:
+            lines.append(f"✅ <code>{escape(r['group'])}</code>")
+        else:
+            lines.append(f"❌ <code>{escape(r['group'])}</code> — {escape(str(r['error'])[:120])}")
+    return "\n".join(lines)
+
+
+# ---------- commands ----------
+
+def _allowed(m: Message) -> bool:
+    return bool(m.from_user and is_super_admin_id(m.from_user.id))
+
+
+def register(app: Client):
+
+    @app.on_message(filters.command("addflyer"))
+    async def addflyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        text = m.text or m.caption or ""
+        parts = text.split(maxsplit=2)
+        if len(parts) < 2:
+            return await m.reply_text(
+                "Usage: /addflyer <name> [caption]\n"
+                "Attach a photo, reply to one, or give just a caption for a text flyer."
+            )
+        name, caption = parts[1], (parts[2] if len(parts) > 2 else "")
+        src = m if m.photo else m.reply_to_message
+        photo = src.photo.file_id if src and src.photo else None
+        if not photo and src is not None and not caption:
+            caption = src.caption or src.text or ""
+        if not photo and not caption:
+            return await m.reply_text("❌ A flyer needs a photo or some text.")
+        await asyncio.to_thread(save_flyer, name, photo, caption, m.from_user.id)
+        await m.reply_text(f"✅ Flyer <b>{escape(_norm(name))}</b> saved.")
+
+    @app.on_message(filters.command("flyer"))
+    async def show_flyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        if len(m.command) < 2:
+            return await m.reply_text("Usage: /flyer <name>")
+        flyer = await asyncio.to_thread(get_flyer, m.command[1])
+        if not flyer:
+            return await m.reply_text("❌ No such flyer.")
+        if flyer.get("photo"):
+            await _media.send_photo(client, m.chat.id, flyer["photo"], caption=flyer.get("caption") or "")
+        else:
+            await m.reply_text(flyer.get("caption") or "")
+
+    @app.on_message(filters.command("flyers"))
+    async def flyers_cmd(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        docs = await asyncio.to_thread(list_flyers)
+        if not docs:
+            return await m.reply_text("No flyers saved.")
+        lines = ["<b>Flyers</b>"]
+        for d in docs:
+            icon = "🖼" if d.get("photo") else "📝"
+            last = d.get("last_posted_at")
+            when = f" — last posted {last:%Y-%m-%d %H:%M} UTC" if isinstance(last, datetime) else ""
+            lines.append(f"{icon} <code>{escape(d['name'])}</code>{when}")
+        await m.reply_text("\n".join(lines))
+
+    @app.on_message(filters.command("deleteflyer"))
+    async def deleteflyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        if len(m.command) < 2:
+            return await m.reply_text("Usage: /deleteflyer <name>")
+        ok = await asyncio.to_thread(delete_flyer, m.command[1])
+        await m.reply_text("🗑 Deleted." if ok else "❌ No such flyer.")
+
+    @app.on_message(filters.command("postflyer"))
+    async def postflyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        parts = (m.text or "").split(maxsplit=2)
+        if len(parts) < 3:
+            return await m.reply_text("Usage: /postflyer <name> <group[,group…]>")
+        groups = parse_groups(parts[2])
+        try:
+            results = await post_flyer(client, parts[1], groups)
+        except ValueError as e:
+            return await m.reply_text(f"❌ {escape(str(e))}")
+        await m.reply_text(format_results(_norm(parts[1]), results))
+
+    log.info("✅ handlers.flyer registered")
@@ -0,0 +1,132 @@
+# handlers/flyer_scheduler.py
+"""
+Scheduled flyer posts on the shared scheduler (utils/scheduler.py).
+
+  /scheduleflyer <name> <YYYY-MM-DD HH:MM> <group[,group…]>       — one-off (LA time)
+  /recurflyer <name> <HH:MM> <group[,group…]> [mon,wed,…|daily]  — recurring
+  /flyerjobs                                                      — pending flyer jobs
+  /cancelflyer <job_id>
+
+Per-group results of every run are recorded by handlers.flyer.post_flyer.
+"""
+import asyncio
+import logging
+import re
+from datetime import datetime
+from html import escape
+
+import pytz
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from handlers.flyer import _allowed, _norm, format_results, get_flyer, parse_groups, post_flyer
+from utils.scheduler import scheduler, DEFAULT_TZ
+
+log = logging.getLogger(__name__)
+
+JOB_KIND = "flyer.post"
+LOCAL_TZ = pytz.timezone(DEFAULT_TZ)
+_DAYS = {"mon", "tue", "wed", "thu", "fri", "sat", "sun"}
+
+
+@scheduler.task(JOB_KIND)
+async def _run_flyer_job(client: Client, payload: dict):
+    results = await post_flyer(client, payload["flyer"], payload["groups"], job_id=payload.get("job_id"))
+    notify = payload.get("notify")
+    if notify:
+        try:
+            await client.send_message(notify, format_results(payload["flyer"], results))
+        except Exception:
+            log.warning("flyer_scheduler: could not send results to %s", notify)
+    if not any(r["ok"] for r in results):
+        raise RuntimeError(f"flyer {payload['flyer']} failed in all {len(results)} group(s)")
+
+
+def register(app: Client):
+    scheduler.attach(app)
+
+    @app.on_message(filters.command("scheduleflyer"))
+    async def scheduleflyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        parts = (m.text or "").split(maxsplit=4)
+        if len(parts) < 5:
+            return await m.reply_text("Usage: /scheduleflyer <name> <YYYY-MM-DD HH:MM> <group[,group…]>")
+        name = _norm(parts[1])
+        try:
+            when = LOCAL_TZ.localize(datetime.strptime(f"{parts[2]} {parts[3]}", "%Y-%m-%d %H:%M"))
+        except ValueError as e:
+            return await m.reply_text(f"❌ Invalid time: {e}")
+        if not await asyncio.to_thread(get_flyer, name):
+            return await m.reply_text("❌ No such flyer.")
+        groups = parse_groups(parts[4])
+        job_id = f"flyer|{name}|{int(when.timestamp())}"
+        await asyncio.to_thread(
+            scheduler.schedule_at, job_id, JOB_KIND, when,
+            {"flyer": name, "groups": groups, "job_id": job_id, "notify": m.chat.id},
+        )
+        await m.reply_text(
+            f"✅ Flyer <b>{escape(name)}</b> scheduled for {when:%Y-%m-%d %H:%M %Z} "
+            f"in {len(groups)} group(s).\nID: <code>{escape(job_id)}</code>"
+        )
+
+    @app.on_message(filters.command("recurflyer"))
+    async def recurflyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        parts = (m.text or "").split()
+        if len(parts) < 4 or not re.fullmatch(r"\d{1,2}:\d{2}", parts[2]):
+            return await m.reply_text("Usage: /recurflyer <name> <HH:MM> <group[,group…]> [mon,wed,…|daily]")
+        name = _norm(parts[1])
+        hour, minute = (int(x) for x in parts[2].split(":"))
+        if hour > 23 or minute > 59:
+            return await m.reply_text("❌ Invalid time.")
+        days = (parts[4].lower() if len(parts) > 4 else "daily")
+        cron = {"hour": hour, "minute": minute}
+        if days != "daily":
+            if not set(days.split(",")) <= _DAYS:
+                return await m.reply_text("❌ Days must be like mon,wed,fri or daily.")
+            cron["day_of_week"] = days
+        if not await asyncio.to_thread(get_flyer, name):
+            return await m.reply_text("❌ No such flyer.")
+        groups = parse_groups(parts[3])
+        job_id = f"flyer|{name}|{days}|{hour:02d}{minute:02d}"
+        await asyncio.to_thread(
+            scheduler.recurring, job_id, JOB_KIND, cron,
+            {"flyer": name, "groups": groups, "job_id": job_id, "notify": m.chat.id},
+        )
+        await m.reply_text(
+            f"🔁 Flyer <b>{escape(name)}</b> will post {days} at {hour:02d}:{minute:02d} "
+            f"in {len(groups)} group(s).\nID: <code>{escape(job_id)}</code>"
+        )
+
+    @app.on_message(filters.command("flyerjobs"))
+    async def flyerjobs(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        jobs = await asyncio.to_thread(scheduler.list_jobs, JOB_KIND, 50)
+        if not jobs:
+            return await m.reply_text("No scheduled flyers.")
+        lines = ["<b>Scheduled flyers</b>"]
+        for j in jobs:
+            p = j.get("payload") or {}
+            rt = j["run_at"]
+            rt = rt if rt.tzinfo else pytz.utc.localize(rt)
+            lines.append(
+                f"• <b>{escape(p.get('flyer', '?'))}</b> → {len(p.get('groups') or [])} group(s), "
+                f"next {rt.astimezone(LOCAL_TZ):%Y-%m-%d %H:%M %Z}{' 🔁' if j.get('cron') else ''}\n"
+                f"  <code>{escape(j['_id'])}</code>"
+            )
+        await m.reply_text("\n".join(lines))
+
+    @app.on_message(filters.command("cancelflyer"))
+    async def cancelflyer(client: Client, m: Message):
+        if not _allowed(m):
+            return
+        parts = (m.text or "").split(maxsplit=1)
+        if len(parts) < 2:
+            return await m.reply_text("Usage: /cancelflyer <job_id>")
+        ok = await asyncio.to_thread(scheduler.cancel, parts[1].strip())
+        await m.reply_text("✅ Canceled." if ok else "❌ No such scheduled flyer.")
+
+    log.info("✅ handlers.flyer_scheduler registered")
@@ -2,18 +2,36 @@ import logging
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery
 
+from utils import boot, metrics
+from utils.callback_router import mark_answered, was_answered
+from utils.roles import roles
+
 log = logging.getLogger("health")
 
+OWNER_ID = roles.owner_id
+
 def register(app: Client):
     @app.on_message(filters.command("ping"))
     async def ping(client, m):
         await m.reply_text("pong")
 
+    @app.on_message(filters.command("boot") & filters.user(OWNER_ID))
+    async def boot_report(client, m):
+        await m.reply_text(boot.format_report())
+
+    @app.on_message(filters.command("stats") & filters.user(OWNER_ID))
+    async def stats(client, m):
+        family = m.command[1] if len(m.command) > 1 else None
+        await m.reply_text(metrics.format_top(family))
+
     # Safety net: always answer callback queries so buttons don’t hang
     @app.on_callback_query(group=99)
     async def _cb_safety(client: Client, cq: CallbackQuery):
+        if was_answered(cq):
+            return
         try:
             await cq.answer(cache_time=0)
+            mark_answered(cq)
         except Exception as e:
             if "QUERY_ID_INVALID" not in str(e):
                 log.debug("cb safety: %s", e)
@@ -1,10 +1,8 @@
-import os
 from pyrogram import Client, filters
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, Message
 
-# Load env variables
-SUPER_ADMINS = set(map(int, os.getenv("SUPER_ADMINS", "").split(",")))
-MODEL_IDS = set(map(int, os.getenv("MODEL_IDS", "").split(",")))
+from utils.callback_router import route_of
+from utils.roles import roles
 
 def register(app: Client):
     @app.on_message(filters.command("help") & filters.private)
@@ -13,7 +11,7 @@ def register(app: Client):
 
     @app.on_callback_query(filters.regex(r"^help_menu:(.+)$"))
     async def help_menu_callback(client: Client, query: CallbackQuery):
-        data = query.data.split(":")[1]
+        data = route_of(query).action
 
         if data == "main":
             await show_help_menu(query.message, query)
@@ -37,7 +35,7 @@ def register(app: Client):
             )
         elif data == "commands":
             user_id = query.from_user.id
-            if user_id in SUPER_ADMINS:
+            if roles.is_super_admin(user_id):
                 cmds = (
                     "⚙️ <b>Super Admin Commands</b>\n"
                     "/warn, /resetwarns, /mute, /unmute, /ban, /unban\n"
@@ -46,7 +44,7 @@ def register(app: Client):
                     "/addflyer, /changeflyer, /deleteflyer, /listflyers, /flyer\n"
                     "/addmenu, /changemenu, /deletemenu, /listmenus\n"
                 )
-            elif user_id in MODEL_IDS:
+            elif roles.is_model(user_id):
                 cmds = (
                     "✨ <b>Model Commands</b>\n"
                     "Includes all Member Commands + the following:\n\n"
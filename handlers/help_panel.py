@@ -5,6 +5,8 @@ import os
 from pyrogram import Client, filters
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from utils.callback_router import route_of
+
 BTN_BACK         = "⬅ Back to Main"
 BTN_BUYER_REQS   = "✨ Buyer Requirements"
 BTN_BUYER_RULES  = "‼️ Buyer Rules"
@@ -47,7 +49,7 @@ def register(app: Client):
     # Pages
     @app.on_callback_query(filters.regex(r"^help:(reqs|rules|games)$"))
     async def _pages(_, q: CallbackQuery):
-        kind = q.data.split(":", 1)[1]
+        kind = route_of(q).action
         if kind == "reqs":
             text = f"✨ Buyer Requirements\n\n{BUYER_REQUIREMENTS}"
         elif kind == "rules":
@@ -1,12 +1,15 @@
 # handlers/kick_requirements.py
 
 import logging
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
 from pyrogram import Client
 from pyrogram import filters
 from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
 
+if TYPE_CHECKING:
+    from handlers.requirements_panel import MemberRecord
+
 log = logging.getLogger(__name__)
 
 
@@ -30,7 +33,7 @@ async def _get_group_members_map(app: Client, chat_id: int) -> Dict[int, Tuple[s
     return out
 
 
-def _compute_behind_for_group(member_map: Dict[int, Tuple[str, str, str]], docs_by_uid: Dict[int, dict], *, rp) -> List[Tuple[int, str]]:
+def _compute_behind_for_group(member_map: Dict[int, Tuple[str, str, str]], docs_by_uid: Dict[int, "MemberRecord"], *, rp) -> List[Tuple[int, str]]:
     behind: List[Tuple[int, str]] = []
 
     for uid, (first, last, username) in member_map.items():
@@ -41,13 +44,9 @@ def _compute_behind_for_group(member_map: Dict[int, Tuple[str, str, str]], docs_
         if rp._is_owner(uid) or rp._is_super_admin(uid) or rp._is_model(uid):
             continue
 
-        doc = docs_by_uid.get(uid) or rp._member_doc(uid, username=username, first_name=first, last_name=last)
-
-        if doc.get("is_exempt"):
-            continue
-
-        total = int(doc.get("spend_cents", 0)) + int(doc.get("manual_spend_cents", 0))
-        if total < int(rp.REQUIRED_MIN_SPEND_CENTS):
+        # no member doc yet means nothing logged: behind unless staff (handled above)
+        rec = docs_by_uid.get(uid) or rp.MemberRecord(uid)
+        if rec.behind:
             behind.append((uid, _display_name(first, last, username, uid)))
 
     behind.sort(key=lambda t: t[1].lower())
@@ -72,12 +71,13 @@ def _after_kick_kb() -> InlineKeyboardMarkup:
     )
 
 
-async def _load_docs_by_uid(rp, user_ids: List[int]) -> Dict[int, dict]:
-    # Mongo "in" query
+async def _load_docs_by_uid(rp, user_ids: List[int]) -> Dict[int, "MemberRecord"]:
+    # one Mongo "in" query for every group; misses are simply absent (no per-member fallback)
     cur = rp.members_coll.find({"user_id": {"$in": user_ids}}, {"_id": 0})
-    out: Dict[int, dict] = {}
+    out: Dict[int, "MemberRecord"] = {}
     for d in cur:
-        out[int(d["user_id"])] = d
+        rec = rp._member_record(d)
+        out[rec.user_id] = rec
     return out
 
 
@@ -110,7 +110,7 @@ async def _build_preview(app: Client, rp) -> Tuple[str, Dict[int, List[Tuple[int
 
     lines: List[str] = []
     lines.append("🧹 <b>Manual Kick (Behind Requirements)</b>")
-    lines.append(f"Minimum required: <b>${rp.REQUIRED_MIN_SPEND_DOLLARS:.2f}</b>")
+    lines.append(f"Minimum required: <b>${rp.REQUIRED_MIN_SPEND:.2f}</b>")
     lines.append(f"Groups checked: <b>{len(group_ids)}</b>")
     lines.append(f"Total behind: <b>{total}</b>")
     lines.append("")
@@ -224,7 +224,7 @@ def register(app: Client):
 
         # Also log to the log group if configured
         try:
-            if rp.LOG_CHAT_ID:
-                await app.send_message(rp.LOG_CHAT_ID, f"[Requirements] Manual kick run by {uid}: kicked behind members.")
+            if rp.LOG_GROUP_ID:
+                await app.send_message(rp.LOG_GROUP_ID, f"[Requirements] Manual kick run by {uid}: kicked behind members.")
         except Exception:
             log.exception("kickreq: failed logging")
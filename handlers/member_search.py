@@ -0,0 +1,86 @@
+# handlers/member_search.py
+"""
+Inline member search for the requirements tools (owner + models only).
+
+  @bot spend roni      → members matching "roni", each with an Add Spend button
+  @bot exempt @user    → … with an Exempt / Un-exempt button
+  @bot roni            → both buttons
+
+Results come from requirements_panel.member_index (in memory, no Mongo per
+keystroke) and their buttons open the panel's existing flows
+(reqpanel:spend_member:<id>, reqpanel:toggle_exempt_member:<id>), which edit
+the sent message in place.
+
+Inline mode must be switched on for the bot in @BotFather (/setinline).
+"""
+import logging
+from html import escape
+from typing import List, Optional, Tuple
+
+from pyrogram import Client
+from pyrogram.types import (
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    InlineQuery,
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+)
+
+from handlers.requirements_panel import member_index
+from utils.roles import roles
+
+log = logging.getLogger(__name__)
+
+RESULTS_PER_PAGE = 20
+ACTIONS = {
+    "spend": ("💸 Add Spend", "reqpanel:spend_member"),
+    "exempt": ("🛡 Exempt / Un-exempt", "reqpanel:toggle_exempt_member"),
+}
+
+
+def _parse(query: str) -> Tuple[Optional[str], str]:
+    """'spend roni' → ("spend", "roni"); anything else searches with both actions."""
+    head, _, rest = (query or "").strip().partition(" ")
+    if head.lower() in ACTIONS:
+        return head.lower(), rest.strip()
+    return None, (query or "").strip()
+
+
+def _result(action: Optional[str], uid: int, first: str, uname: str) -> InlineQueryResultArticle:
+    name = first or f"@{uname}"
+    buttons = [
+        InlineKeyboardButton(label, callback_data=f"{prefix}:{uid}")
+        for key, (label, prefix) in ACTIONS.items()
+        if action in (None, key)
+    ]
+    return InlineQueryResultArticle(
+        id=f"{action or 'any'}:{uid}",
+        title=name,
+        description=" · ".join(p for p in (f"@{uname}" if uname else "", str(uid)) if p),
+        input_message_content=InputTextMessageContent(
+            f"<b>{escape(name)}</b>{f' (@{uname})' if uname and first else ''} — <code>{uid}</code>"
+        ),
+        reply_markup=InlineKeyboardMarkup([buttons]),
+    )
+
+
+def register(app: Client):
+
+    @app.on_inline_query()
+    async def member_search_inline(client: Client, iq: InlineQuery):
+        if not roles.is_staff(iq.from_user.id):
+            await iq.answer([], cache_time=300, is_personal=True)
+            return
+
+        action, text = _parse(iq.query)
+        offset = int(iq.offset) if (iq.offset or "").isdigit() else 0
+        hits, more = member_index.search(text, RESULTS_PER_PAGE, offset)
+        results: List[InlineQueryResultArticle] = [_result(action, *h) for h in hits]
+        await iq.answer(
+            results,
+            cache_time=0,
+            is_personal=True,
+            next_offset=str(offset + len(hits)) if more else "",
+        )
+
+    log.info("✅ handlers.member_search registered (inline member search)")
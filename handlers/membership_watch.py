@@ -3,29 +3,21 @@
 
 from contextlib import suppress
 from typing import Optional
-import os
 
 from pyrogram import Client
 from pyrogram.types import ChatMemberUpdated
 from pyrogram.enums import ChatMemberStatus
 
+from utils.roles import roles
+
 try:
     from req_store import ReqStore
     _store = ReqStore()
 except Exception:
     _store = None
 
-def _to_int(x: Optional[str]) -> Optional[int]:
-    try:
-        return int(str(x)) if x not in (None, "", "None") else None
-    except Exception:
-        return None
-
-OWNER_ID       = _to_int(os.getenv("OWNER_ID"))
-SUPER_ADMIN_ID = _to_int(os.getenv("SUPER_ADMIN_ID"))
-
 def _is_admin(uid: Optional[int]) -> bool:
-    return bool(uid and uid in {OWNER_ID, SUPER_ADMIN_ID})
+    return roles.is_super_admin(uid)
 
 def register(app: Client):
     @app.on_chat_member_updated()
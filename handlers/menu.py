@@ -12,6 +12,7 @@ from pyrogram.types import (
     Message,
 )
 
+from utils.callback_router import route_of
 from utils.menu_store import store
 
 log = logging.getLogger(__name__)
@@ -186,7 +187,7 @@ def register(app: Client):
     # Show a specific menu from a list button
     @app.on_callback_query(filters.regex(r"^menus:show:.+"))
     async def show_cb(_, cq: CallbackQuery):
-        raw = cq.data[len(SHOW_CB_P):]
+        raw = route_of(cq).tail(2)  # menus:show:<Name>
         name, text = _get_menu_ci(raw)
         log.info("menus:show: raw=%r -> key=%r found=%s", raw, name, text is not None)
 
@@ -204,7 +205,7 @@ def register(app: Client):
     # Tip placeholder (so the button does something now; Stripe later)
     @app.on_callback_query(filters.regex(r"^menus:tip:.+"))
     async def tip_cb(_, cq: CallbackQuery):
-        model = cq.data[len(TIP_CB_P):]
+        model = route_of(cq).tail(2)  # menus:tip:<Name>
         log.info("Tip button tapped for %r", model)
         await cq.answer(
             "Tips coming soon 💸 — this button is wired, we just need to hook up Stripe.",
@@ -4,6 +4,7 @@ import asyncio
 import datetime
 from pyrogram import filters
 from pyrogram.types import Message, ChatPermissions
+from utils.roles import roles
 from pymongo import MongoClient
 import os
 
@@ -21,7 +22,7 @@ logging.basicConfig(
     format='[%(asctime)s] %(levelname)s:%(name)s: %(message)s'
 )
 
-OWNER_ID = 6964994611
+OWNER_ID = roles.owner_id
 
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DBNAME = os.getenv("MONGO_DBNAME")
@@ -9,6 +9,8 @@ from pymongo import MongoClient
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from utils.callback_router import route_of
+
 log = logging.getLogger(__name__)
 
 LA_TZ = pytz.timezone("America/Los_Angeles")
@@ -217,7 +219,7 @@ def register(app: Client):
     @app.on_callback_query(filters.regex(r"^nsfw_book:week:"))
     async def _week(cq: CallbackQuery):
         try:
-            start_key = cq.data.split(":", 2)[2]
+            start_key = route_of(cq).tail(2)
             start = _parse_day_key(start_key)
         except Exception:
             start = _today_la()
@@ -225,16 +227,15 @@ def register(app: Client):
 
     @app.on_callback_query(filters.regex(r"^nsfw_book:day:"))
     async def _day(cq: CallbackQuery):
-        day_key = cq.data.split(":", 2)[2]
+        day_key = route_of(cq).tail(2)
         await _show_day(cq, day_key, page=0)
 
     @app.on_callback_query(filters.regex(r"^nsfw_book:page:"))
     async def _page(cq: CallbackQuery):
         # nsfw_book:page:YYYY-MM-DD:<page>
         try:
-            _, _, rest = cq.data.split(":", 2)
-            day_key, page_s = rest.split(":")
-            page = int(page_s)
+            day_key, page = route_of(cq).args
+            page = int(page)
         except Exception:
             return await cq.answer("Something went wrong.", show_alert=True)
         await _show_day(cq, day_key, page=page)
@@ -247,8 +248,8 @@ def register(app: Client):
     async def _time(cq: CallbackQuery):
         # nsfw_book:time:YYYY-MM-DD:HH:MM
         try:
-            _, _, rest = cq.data.split(":", 2)
-            day_key, slot_key = rest.split(":")
+            route = route_of(cq)
+            day_key, slot_key = route.parts[2], route.tail(3)
         except Exception:
             return await cq.answer("Bad selection.", show_alert=True)
 
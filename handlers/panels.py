@@ -11,6 +11,7 @@ from pyrogram.types import (
     InlineKeyboardButton,
 )
 
+from utils.callback_router import route_of
 from utils.menu_store import store
 
 log = logging.getLogger(__name__)
@@ -200,7 +201,7 @@ def register(app: Client):
     # -------- Single model page --------
     @app.on_callback_query(filters.regex(r"^panels:model:(.+)$"))
     async def model_page_cb(_, cq: CallbackQuery):
-        slug = cq.data.split(":", 2)[-1]
+        slug = route_of(cq).tail(2)
         cfg = MODEL_CONFIG.get(slug)
         if not cfg:
             await cq.answer("Unknown model.", show_alert=True)
@@ -6,7 +6,7 @@ import calendar
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
@@ -20,6 +20,7 @@ class Payment:
     purchase_type: str  # e.g. "game", "content", "tip"
     amount_cents: int
     created_at: datetime
+    source_id: str = ""  # Stripe checkout session id, for idempotent webhook writes
 
     @classmethod
     def from_dict(cls, d: Dict[str, Any]) -> "Payment":
@@ -29,6 +30,7 @@ class Payment:
             purchase_type=str(d.get("purchase_type") or "unknown"),
             amount_cents=int(d.get("amount_cents") or 0),
             created_at=datetime.fromisoformat(d["created_at"]),
+            source_id=str(d.get("source_id") or ""),
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -38,6 +40,7 @@ class Payment:
             "purchase_type": self.purchase_type,
             "amount_cents": self.amount_cents,
             "created_at": self.created_at.isoformat(),
+            "source_id": self.source_id,
         }
 
 
@@ -54,7 +57,9 @@ def _load_all() -> List[Payment]:
 
 def _save_all(payments: List[Payment]) -> None:
     data = [p.to_dict() for p in payments]
-    PAYMENTS_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    tmp = PAYMENTS_FILE.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    tmp.replace(PAYMENTS_FILE)
 
 
 def record_payment(
@@ -68,18 +73,44 @@ def record_payment(
     Append a successful payment. Call this from your Stripe webhook handler once
     a payment is confirmed (e.g. checkout.session.completed).
     """
-    created_at = created_at or datetime.utcnow()
+    record_payments([{
+        "telegram_id": telegram_id,
+        "model_id": model_id,
+        "purchase_type": purchase_type,
+        "amount_cents": amount_cents,
+        "created_at": created_at,
+    }])
+
+
+def record_payments(rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Append many payments with a single load/save of the ledger.
+    Rows whose source_id is already recorded are skipped (webhook retries).
+    Returns how many rows were added.
+    """
     payments = _load_all()
-    payments.append(
-        Payment(
-            telegram_id=telegram_id,
-            model_id=model_id,
-            purchase_type=purchase_type,
-            amount_cents=amount_cents,
-            created_at=created_at,
+    seen = {p.source_id for p in payments if p.source_id}
+    added = 0
+    for r in rows:
+        sid = str(r.get("source_id") or "")
+        if sid and sid in seen:
+            continue
+        payments.append(
+            Payment(
+                telegram_id=int(r["telegram_id"]),
+                model_id=str(r.get("model_id") or ""),
+                purchase_type=str(r.get("purchase_type") or "unknown"),
+                amount_cents=int(r.get("amount_cents") or 0),
+                created_at=r.get("created_at") or datetime.utcnow(),
+                source_id=sid,
+            )
         )
-    )
-    _save_all(payments)
+        if sid:
+            seen.add(sid)
+        added += 1
+    if added:
+        _save_all(payments)
+    return added
 
 
 def _same_month(dt: datetime, year: int, month: int) -> bool:
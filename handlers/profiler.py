@@ -0,0 +1,181 @@
+# handlers/profiler.py
+"""
+Owner-only live diagnostics. Nothing here runs until a command starts it,
+so there is no overhead otherwise.
+
+/profile [seconds]   — sample every thread's stack (PROFILE_SAMPLE_MS) for N
+                       seconds (default 10, max 120) and send collapsed stacks
+                       ("frame;frame;frame count", ready for flamegraph.pl /
+                       speedscope) plus the top self-time functions.
+/memsnap             — start tracemalloc (if needed) and take a baseline snapshot
+/memsnap diff        — top allocation growth since the baseline, plus sizes of
+                       known long-lived structures, as a document
+/memsnap stop        — stop tracemalloc and drop the baseline
+"""
+import asyncio
+import io
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from pyrogram import Client, filters
+from pyrogram.types import Message
+from utils.roles import roles
+
+log = logging.getLogger(__name__)
+
+OWNER_ID = roles.owner_id
+SAMPLE_MS = float(os.getenv("PROFILE_SAMPLE_MS", "5"))
+MAX_SECONDS = 120
+TOP_N = int(os.getenv("PROFILE_TOP_N", "40"))
+
+# (module, attribute path) of structures worth watching for growth
+WATCHED: List[Tuple[str, str]] = [
+    ("handlers.welcome", "_recent"),
+    ("utils.anon_store", "anon_store._threads"),
+    ("handlers.requirements_panel", "STATE"),
+    ("handlers.requirements_panel", "PENDING_SPEND"),
+    ("handlers.requirements_panel", "PENDING_ATTRIB"),
+    ("handlers.stripe_tips", "_PENDING_TIP"),
+    ("handlers.stripe_tips", "_SESSIONS"),
+    ("handlers.xp", "_PENDING"),
+    ("handlers.sanctu_controls", "_known_chats"),
+]
+
+_profile_lock = asyncio.Lock()
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+# ---------- CPU sampling ----------
+
+def _frame_name(f) -> str:
+    code = f.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _sample(seconds: float) -> Tuple[Counter, Counter, int]:
+    """Runs in its own thread; returns (collapsed stacks, self-time, samples)."""
+    me = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks: Counter = Counter()
+    leaf: Counter = Counter()
+    samples = 0
+    interval = SAMPLE_MS / 1000.0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for tid, frame in sys._current_frames().items():
+            if tid == me:
+                continue
+            parts = []
+            f = frame
+            while f is not None:
+                parts.append(_frame_name(f))
+                f = f.f_back
+            if not parts:
+                continue
+            parts.append(names.get(tid, f"thread-{tid}"))
+            parts.reverse()
+            stacks[";".join(parts)] += 1
+            leaf[parts[-1]] += 1
+        samples += 1
+        time.sleep(interval)
+    return stacks, leaf, samples
+
+
+# ---------- memory ----------
+
+def _resolve(module: str, path: str):
+    obj = sys.modules.get(module)
+    for attr in path.split("."):
+        if obj is None:
+            return None
+        obj = getattr(obj, attr, None)
+    return obj
+
+
+def _watched_sizes() -> List[str]:
+    out = []
+    for module, path in WATCHED:
+        obj = _resolve(module, path)
+        if obj is None:
+            continue
+        try:
+            out.append(f"{module}.{path}: {len(obj)} entries")
+        except TypeError:
+            out.append(f"{module}.{path}: (no len)")
+    return out
+
+
+def _diff_report(current: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot) -> str:
+    lines = ["# watched structures"] + _watched_sizes() + ["", f"# top {TOP_N} allocation sites by growth"]
+    for stat in current.compare_to(baseline, "lineno")[:TOP_N]:
+        lines.append(str(stat))
+    lines += ["", "# biggest growth, full tracebacks (top 5)"]
+    for stat in current.compare_to(baseline, "traceback")[:5]:
+        lines.append(f"{stat.size_diff / 1024:+.1f} KiB, {stat.count_diff:+d} blocks")
+        lines.extend("    " + ln for ln in stat.traceback.format())
+    return "\n".join(lines)
+
+
+async def _send_text_doc(client: Client, chat_id: int, name: str, text: str, caption: str) -> None:
+    bio = io.BytesIO(text.encode("utf-8"))
+    bio.name = name
+    await client.send_document(chat_id, bio, file_name=name, caption=caption[:1024])
+
+
+def register(app: Client):
+
+    @app.on_message(filters.command("profile") & filters.user(OWNER_ID))
+    async def profile_cmd(client: Client, m: Message):
+        try:
+            seconds = float(m.command[1]) if len(m.command) > 1 else 10.0
+        except ValueError:
+            return await m.reply_text("Usage: /profile [seconds]")
+        seconds = max(1.0, min(seconds, MAX_SECONDS))
+        if _profile_lock.locked():
+            return await m.reply_text("A profile is already running.")
+        async with _profile_lock:
+            await m.reply_text(f"⏱ Sampling for {seconds:.0f}s…")
+            stacks, leaf, samples = await asyncio.to_thread(_sample, seconds)
+        folded = "\n".join(f"{stack} {n}" for stack, n in stacks.most_common())
+        total = sum(leaf.values()) or 1
+        top = "\n".join(f"{n * 100 / total:5.1f}% {name}" for name, n in leaf.most_common(10))
+        await _send_text_doc(
+            client, m.chat.id, f"profile-{int(time.time())}.folded", folded,
+            f"{samples} samples over {seconds:.0f}s\n{top}",
+        )
+
+    @app.on_message(filters.command("memsnap") & filters.user(OWNER_ID))
+    async def memsnap_cmd(client: Client, m: Message):
+        global _baseline
+        sub = m.command[1].lower() if len(m.command) > 1 else "start"
+
+        if sub == "stop":
+            _baseline = None
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            return await m.reply_text("🧹 tracemalloc stopped.")
+
+        if sub == "diff":
+            if _baseline is None or not tracemalloc.is_tracing():
+                return await m.reply_text("No baseline yet — run /memsnap first.")
+            current = await asyncio.to_thread(tracemalloc.take_snapshot)
+            report = await asyncio.to_thread(_diff_report, current, _baseline)
+            size, peak = tracemalloc.get_traced_memory()
+            return await _send_text_doc(
+                client, m.chat.id, f"memdiff-{int(time.time())}.txt", report,
+                f"traced {size / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)",
+            )
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv("TRACEMALLOC_FRAMES", "15")))
+        _baseline = await asyncio.to_thread(tracemalloc.take_snapshot)
+        sizes = "\n".join(_watched_sizes()) or "(no watched structures loaded)"
+        await m.reply_text(f"📸 Baseline taken. Run /memsnap diff later.\n\n<code>{sizes}</code>")
+
+    log.info("✅ handlers.profiler registered (/profile, /memsnap)")
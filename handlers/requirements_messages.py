@@ -24,6 +24,9 @@ from typing import Optional, List, Dict, Any, Tuple, Set
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
+from utils.callback_router import route_of
+from utils.roles import roles
+
 try:
     from pymongo import MongoClient, ASCENDING
 except Exception:  # pragma: no cover
@@ -34,21 +37,7 @@ log = logging.getLogger(__name__)
 
 # ────────────── ENV / CONFIG ──────────────
 
-OWNER_ID = int(os.getenv("OWNER_ID", os.getenv("BOT_OWNER_ID", "0")) or "0")
-
-def _parse_id_list(raw: str) -> Set[int]:
-    out: Set[int] = set()
-    for part in (raw or "").replace(" ", "").split(","):
-        if not part:
-            continue
-        try:
-            out.add(int(part))
-        except Exception:
-            continue
-    return out
-
-SUPER_ADMINS = _parse_id_list(os.getenv("SUPER_ADMINS", ""))
-MODELS = _parse_id_list(os.getenv("MODELS", ""))
+OWNER_ID = roles.owner_id
 
 REQUIRED_MIN_SPEND = float(os.getenv("REQUIREMENTS_MIN_SPEND", "20") or "20")
 
@@ -73,17 +62,10 @@ COLL_REQSTATE = os.getenv("REQ_STATE_COLLECTION", "requirements_state")  # used
 
 # ────────────── PERMISSIONS ──────────────
 
-def _is_owner(user_id: int) -> bool:
-    return bool(OWNER_ID and user_id == OWNER_ID)
-
-def _is_super_admin(user_id: int) -> bool:
-    return user_id in SUPER_ADMINS
-
-def _is_model(user_id: int) -> bool:
-    return user_id in MODELS
-
-def _is_admin_or_model(user_id: int) -> bool:
-    return _is_owner(user_id) or _is_super_admin(user_id) or _is_model(user_id)
+_is_owner = roles.is_owner
+_is_super_admin = roles.is_super_admin
+_is_model = roles.is_model
+_is_admin_or_model = roles.is_staff
 
 async def _must_be_owner_or_model_admin(app: Client, cq: CallbackQuery) -> bool:
     uid = cq.from_user.id if cq.from_user else 0
@@ -351,7 +333,8 @@ async def _send_dms_for_action(app: Client, cq: CallbackQuery, action: str, only
             try:
                 coll.update_one(
                     {"chat_id": chat_id, "user_id": uid},
-                    {"$set": {field: datetime.now(timezone.utc)}},
+                    {"$set": {field: datetime.now(timezone.utc)},
+                     "$setOnInsert": {"name_key": "~"}},
                     upsert=True,
                 )
             except Exception:
@@ -430,8 +413,8 @@ def register(app: Client):
             pass
         if not await _must_be_owner_or_model_admin(client, cq):
             return
-        action, page_s = cq.data.split(":")[1], cq.data.split(":")[3]
-        page = int(page_s)
+        route = route_of(cq)  # reqpick:<action>:page:<n>
+        action, page = route.action, route.args[1]
         admin_id = cq.from_user.id
         chat_id = cq.message.chat.id
         text, kb = _render_pick(action, admin_id, chat_id, page=page)
@@ -445,9 +428,8 @@ def register(app: Client):
             pass
         if not await _must_be_owner_or_model_admin(client, cq):
             return
-        parts = cq.data.split(":")
-        action = parts[1]
-        uid = int(parts[3])
+        route = route_of(cq)  # reqpick:<action>:toggle:<uid>
+        action, uid = route.action, route.args[1]
         admin_id = cq.from_user.id
         chat_id = cq.message.chat.id
 
@@ -470,14 +452,14 @@ def register(app: Client):
     async def _send_sel(client: Client, cq: CallbackQuery):
         if not await _must_be_owner_or_model_admin(client, cq):
             return
-        action = cq.data.split(":")[1]
+        action = route_of(cq).action
         await _send_dms_for_action(client, cq, action=action, only_selected=True)
 
     @app.on_callback_query(filters.regex(r"^reqpick:(reminder|final):send_all$"))
     async def _send_all(client: Client, cq: CallbackQuery):
         if not await _must_be_owner_or_model_admin(client, cq):
             return
-        action = cq.data.split(":")[1]
+        action = route_of(cq).action
         await _send_dms_for_action(client, cq, action=action, only_selected=False)
 
     @app.on_callback_query(filters.regex(r"^reqpick:noop$"))
@@ -1,10 +1,13 @@
 # handlers/requirements_panel.py
 
+import asyncio
 import os
 import logging
 import random
 import re
 import io
+from html import escape
+import time
 from datetime import datetime, timezone
 from typing import List, Set, Dict, Any, Optional, Tuple
 
@@ -20,6 +23,13 @@ from pyrogram.errors import MessageNotModified
 
 from pymongo import MongoClient, ASCENDING
 
+from utils import request_context
+from utils.roles import roles
+from utils.boot import on_init
+from utils.callback_router import route_of
+from utils.name_index import NameIndex, normalize as _norm
+from utils.ttl_cache import LRUCache
+
 log = logging.getLogger(__name__)
 
 # ────────────── ENV & CONSTANTS ──────────────
@@ -36,14 +46,199 @@ mongo = MongoClient(
 )
 
 db = mongo["Succubot"]
-members_coll = db["requirements_members"]
+
+
+def _name_key(first_name: Optional[str], username: Optional[str]) -> str:
+    # nameless members sort last ("~" > letters), in user_id order
+    return _norm(first_name) or _norm(username) or "~"
+
+
+def _with_name_keys(update: Any) -> Any:
+    """Keep name_key / username_lc in step whenever a write sets first_name."""
+    if not isinstance(update, dict) or "first_name" not in (update.get("$set") or {}):
+        return update
+    st = update["$set"]
+    keys = {"name_key": _name_key(st.get("first_name"), st.get("username"))}
+    if "username" in st:
+        keys["username_lc"] = _norm(st.get("username")) or None
+    return {**update, "$set": {**st, **keys}}
+
+
+def _invalidate(user_id: Optional[int] = None) -> None:
+    if user_id is None:
+        _MEMBER_CACHE.clear()
+        _INDEX_STALE[0] = True
+    else:
+        _MEMBER_CACHE.pop(user_id, None)
+    _PAGE_CACHE.clear()
+
+
+def _index_write(op: str, user_id: Any, update: Any) -> None:
+    """Mirror a single-member write into member_index (names only)."""
+    if not isinstance(user_id, int):
+        return
+    if op == "delete_one" or op == "find_one_and_delete":
+        member_index.remove(user_id)
+        return
+    st = (update or {}).get("$set") if isinstance(update, dict) else None
+    if not st or not ("first_name" in st or "username" in st):
+        return
+    first, uname = member_index.get(user_id) or ("", "")
+    member_index.put(user_id, st.get("first_name", first), st.get("username", uname))
+
+
+class _MembersCollection:
+    """
+    requirements_members with write-through invalidation of the member and
+    picker-page caches: every mutation made through it drops the affected user
+    (or the whole cache when the filter isn't a single user_id), and writes
+    that set first_name also set the normalised picker keys. Single-member
+    name changes go straight into member_index; wider writes mark it for a
+    reload. Reads pass straight through.
+    """
+
+    _WRITES = ("update_one", "update_many", "replace_one", "delete_one", "delete_many",
+               "find_one_and_update", "find_one_and_replace", "find_one_and_delete")
+
+    def __init__(self, coll):
+        self._coll = coll
+
+    def __getattr__(self, name):
+        attr = getattr(self._coll, name)
+        if name not in self._WRITES:
+            return attr
+
+        def write(filter, *args, **kwargs):
+            uid = filter.get("user_id") if isinstance(filter, dict) else None
+            if args and name in ("update_one", "find_one_and_update"):
+                args = (_with_name_keys(args[0]),) + args[1:]
+            try:
+                return attr(filter, *args, **kwargs)
+            finally:
+                single = isinstance(uid, int) and name.endswith("_one")
+                _invalidate(uid if single else None)
+                if single:
+                    _index_write(name, uid, args[0] if args else None)
+        return write
+
+    def insert_one(self, doc, *args, **kwargs):
+        try:
+            return self._coll.insert_one(doc, *args, **kwargs)
+        finally:
+            _invalidate(doc.get("user_id"))
+            _index_write("insert_one", doc.get("user_id"), {"$set": doc})
+
+    def insert_many(self, docs, *args, **kwargs):
+        try:
+            return self._coll.insert_many(docs, *args, **kwargs)
+        finally:
+            _invalidate()
+
+    def bulk_write(self, requests, *args, **kwargs):
+        try:
+            return self._coll.bulk_write(requests, *args, **kwargs)
+        finally:
+            _invalidate()
+
+
+members_coll = _MembersCollection(db["requirements_members"])
+
+# Names + usernames of every member, for inline search (handlers/member_search.py).
+# Loaded at boot, kept current by the proxy above, and fully reloaded after
+# bulk writes or every MEMBER_INDEX_REFRESH seconds (catches other writers).
+member_index = NameIndex()
+MEMBER_INDEX_REFRESH = float(os.getenv("REQ_MEMBER_INDEX_REFRESH", "900"))
+_INDEX_STALE = [True]
+
+
+def _load_member_index() -> int:
+    _INDEX_STALE[0] = False
+    n = member_index.load(members_coll.find({}, {"_id": 0, "user_id": 1, "first_name": 1, "username": 1}))
+    log.info("requirements_panel: member index loaded (%d members)", n)
+    return n
 pending_custom_coll = db["requirements_pending_custom_spend"]  # legacy, now unused for buttons-only
 meta_coll = db["requirements_meta"]
 
-members_coll.create_index([("user_id", ASCENDING)], unique=True)
-pending_custom_coll.create_index([("owner_id", ASCENDING)], unique=True)
+@on_init("requirements_panel.indexes")
+def _ensure_indexes():
+    members_coll.create_index([("user_id", ASCENDING)], unique=True)
+    # keyset pages for the member pickers + prefix search
+    members_coll.create_index([("name_key", ASCENDING), ("user_id", ASCENDING)])
+    members_coll.create_index([("username_lc", ASCENDING)])
+    members_coll.create_index([("groups", ASCENDING), ("dm_ready", ASCENDING),
+                               ("name_key", ASCENDING), ("user_id", ASCENDING)])
+    pending_custom_coll.create_index([("owner_id", ASCENDING)], unique=True)
+
+NAME_KEY_BACKFILL_SECONDS = float(os.getenv("REQ_NAME_KEY_BACKFILL_SECONDS", "300"))
+_NEEDS_NAME_KEY = {"$or": [
+    {"name_key": {"$exists": False}},
+    # inserted nameless ("~") by another module, named since without going through the proxy
+    {"name_key": "~", "$or": [{"first_name": {"$nin": [None, ""]}}, {"username": {"$nin": [None, ""]}}]},
+]}
+_backfill_task: Optional[asyncio.Task] = None
+
+
+def _backfill_name_keys() -> int:
+    """Give picker keys to members written without them (older docs, other modules)."""
+    from pymongo import UpdateOne
+
+    ops = [
+        UpdateOne({"_id": d["_id"]}, {"$set": {
+            "name_key": _name_key(d.get("first_name"), d.get("username")),
+            "username_lc": _norm(d.get("username")) or None,
+        }})
+        for d in members_coll.find(_NEEDS_NAME_KEY, {"first_name": 1, "username": 1, "user_id": 1})
+    ]
+    for i in range(0, len(ops), 1000):
+        members_coll.bulk_write(ops[i:i + 1000], ordered=False)
+    if ops:
+        log.info("requirements_panel: backfilled picker keys for %d members", len(ops))
+    return len(ops)
+
+@on_init("requirements_panel.name_keys")
+async def _keep_name_keys():
+    global _backfill_task
+    await asyncio.to_thread(_backfill_name_keys)
+
+    async def _backfill_forever():
+        while True:
+            await asyncio.sleep(NAME_KEY_BACKFILL_SECONDS)
+            try:
+                await asyncio.to_thread(_backfill_name_keys)
+            except Exception as e:
+                log.warning("requirements_panel: picker key backfill failed: %s", e)
+
+    _backfill_task = asyncio.get_running_loop().create_task(_backfill_forever())
+
+_index_task: Optional[asyncio.Task] = None
+
+@on_init("requirements_panel.member_index")
+async def _keep_member_index():
+    global _index_task
+    await asyncio.to_thread(_load_member_index)
+
+    async def _refresh_forever():
+        while True:
+            await asyncio.sleep(30)
+            if _INDEX_STALE[0] or time.time() - member_index.loaded_at > MEMBER_INDEX_REFRESH:
+                try:
+                    await asyncio.to_thread(_load_member_index)
+                except Exception as e:
+                    log.warning("requirements_panel: member index reload failed: %s", e)
 
-OWNER_ID = int(os.getenv("OWNER_ID", os.getenv("BOT_OWNER_ID", "6964994611")))
+    _index_task = asyncio.get_running_loop().create_task(_refresh_forever())
+
+# Owners with a leftover legacy custom-amount prompt. Nothing creates these any
+# more, so they're read once at boot instead of on every private text.
+_LEGACY_PENDING: Set[int] = set()
+
+@on_init("requirements_panel.legacy_pending")
+def _load_legacy_pending():
+    for d in pending_custom_coll.find({}, {"owner_id": 1, "_id": 0}):
+        if d.get("owner_id") is not None:
+            _LEGACY_PENDING.add(int(d["owner_id"]))
+
+OWNER_ID = roles.owner_id
 
 # Model names for attribution buttons
 RONI_NAME = os.getenv("RONI_NAME", "Roni")
@@ -58,22 +253,6 @@ MODEL_NAME_MAP: Dict[str, str] = {
     "savy": SAVY_NAME,
 }
 
-def _parse_id_list(val: str | None) -> Set[int]:
-    if not val:
-        return set()
-    out: Set[int] = set()
-    for part in val.replace(" ", "").split(","):
-        if not part:
-            continue
-        try:
-            out.add(int(part))
-        except ValueError:
-            log.warning("requirements_panel: bad ID in list: %r", part)
-    return out
-
-SUPER_ADMINS: Set[int] = _parse_id_list(os.getenv("SUPER_ADMINS"))
-MODELS: Set[int] = _parse_id_list(os.getenv("MODELS"))
-
 # Sanctuary group IDs to scan
 _group_ids_str = os.getenv("SANCTUARY_GROUP_IDS")
 if not _group_ids_str:
@@ -103,23 +282,27 @@ STATE: Dict[int, Dict[str, Any]] = {}
 PENDING_SPEND: Dict[int, Dict[str, Any]] = {}
 PENDING_ATTRIB: Dict[int, Dict[str, Any]] = {}
 
-# ────────────── Helper functions ──────────────
+request_context.register_flow("requirements.state", lambda uid: uid in STATE)
+request_context.register_flow("requirements.spend", lambda uid: uid in PENDING_SPEND or uid in PENDING_ATTRIB)
+request_context.register_flow("requirements.legacy_custom", lambda uid: uid in _LEGACY_PENDING)
 
-def _is_owner(user_id: int) -> bool:
-    return user_id == OWNER_ID
-
-def _is_super_admin(user_id: int) -> bool:
-    return user_id in SUPER_ADMINS or _is_owner(user_id)
+# ────────────── Helper functions ──────────────
 
-def _is_model(user_id: int) -> bool:
-    # Owner always counts as model+exempt for requirements
-    return user_id in MODELS or _is_owner(user_id)
+# Role checks live in utils.roles (owner counts as super admin and as model there)
+_is_owner = roles.is_owner
+_is_super_admin = roles.is_super_admin
+_is_model = roles.is_model
+_is_admin_or_model = roles.is_staff
 
-def _is_admin_or_model(user_id: int) -> bool:
-    return _is_super_admin(user_id) or _is_model(user_id)
+def _via_inline(cq: CallbackQuery) -> bool:
+    """Pressed on a message sent through inline mode (no chat message to go back to)."""
+    return cq.message is None and bool(cq.inline_message_id)
 
-async def _safe_edit_text(msg: Message, **kwargs):
+async def _safe_edit_text(msg, **kwargs):
+    # a CallbackQuery edits whatever it came from, inline-mode messages included
     try:
+        if isinstance(msg, CallbackQuery):
+            return await msg.edit_message_text(**kwargs)
         return await msg.edit_text(**kwargs)
     except MessageNotModified:
         return msg
@@ -136,32 +319,83 @@ async def _log_event(app: Client, text: str):
         return
     await _safe_send(app, LOG_GROUP_ID, f"[Requirements] {text}")
 
-def _member_doc(user_id: int) -> Dict[str, Any]:
+class MemberRecord:
     """
-    Load a member doc and apply derived fields:
+    One requirements_members doc with the derived fields worked out once.
+    Slotted (no per-instance dict) and read like the old member dict via
+    rec["key"] / rec.get("key") so status/format helpers take either.
     - Owner & models are always effectively exempt from requirements
     """
-    doc = members_coll.find_one({"user_id": user_id}) or {}
-    is_owner = user_id == OWNER_ID
-    is_model = user_id in MODELS or is_owner
-    db_exempt = bool(doc.get("is_exempt", False))
-    effective_exempt = db_exempt or is_model
-
-    return {
-        "user_id": user_id,
-        "first_name": doc.get("first_name", ""),
-        "username": doc.get("username"),
-        "manual_spend": float(doc.get("manual_spend", 0.0)),
-        "manual_spend_models": dict(doc.get("manual_spend_models", {})),
-        "is_exempt": effective_exempt,
-        "db_exempt": db_exempt,
-        "is_model": is_model,
-        "is_owner": is_owner,
-        "reminder_sent": bool(doc.get("reminder_sent", False)),
-        "dm_ready": bool(doc.get("dm_ready", False)),
-        "final_warning_sent": bool(doc.get("final_warning_sent", False)),
-        "last_updated": doc.get("last_updated"),
-    }
+
+    __slots__ = (
+        "user_id", "first_name", "username", "manual_spend", "manual_spend_models",
+        "db_exempt", "is_exempt", "is_model", "is_owner", "meets",
+        "reminder_sent", "dm_ready", "final_warning_sent", "last_updated",
+    )
+
+    def __init__(self, user_id: int, doc: Optional[Dict[str, Any]] = None):
+        doc = doc or {}
+        self.user_id = user_id
+        self.first_name = doc.get("first_name", "") or ""
+        self.username = doc.get("username")
+        self.manual_spend = float(doc.get("manual_spend", 0.0) or 0.0)
+        models = doc.get("manual_spend_models")
+        self.manual_spend_models = dict(models) if models else _NO_MODELS
+        self.db_exempt = bool(doc.get("is_exempt", False))
+        self.is_owner = roles.is_owner(user_id)
+        self.is_model = roles.is_model(user_id)
+        self.is_exempt = self.db_exempt or self.is_model
+        self.meets = self.is_exempt or self.manual_spend >= REQUIRED_MIN_SPEND
+        self.reminder_sent = bool(doc.get("reminder_sent", False))
+        self.dm_ready = bool(doc.get("dm_ready", False))
+        self.final_warning_sent = bool(doc.get("final_warning_sent", False))
+        self.last_updated = doc.get("last_updated")
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "MemberRecord":
+        return cls(int(doc["user_id"]), doc)
+
+    @property
+    def behind(self) -> bool:
+        return not self.meets
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+_NO_MODELS: Dict[str, float] = {}      # shared by the many members with no attributed spend
+MEMBER_CACHE_TTL = float(os.getenv("REQ_MEMBER_CACHE_TTL", "300"))
+_MEMBER_CACHE = LRUCache(int(os.getenv("REQ_MEMBER_CACHE", "5000")))   # user_id -> (loaded_at, MemberRecord)
+
+
+def _member_doc(user_id: int) -> MemberRecord:
+    """
+    The member's record, from the cache when fresh. Panel writes go through
+    members_coll, which invalidates; the TTL covers writers in other modules
+    (dm-ready mirror, age flag).
+    """
+    hit = _MEMBER_CACHE.get(user_id)
+    if hit is not None and time.monotonic() - hit[0] < MEMBER_CACHE_TTL:
+        return hit[1]
+    rec = MemberRecord(user_id, members_coll.find_one({"user_id": user_id}, {"_id": 0}))
+    _MEMBER_CACHE.put(user_id, (time.monotonic(), rec))
+    return rec
+
+
+def _member_record(doc: Dict[str, Any]) -> MemberRecord:
+    """Record for a doc already in hand (bulk reads); primes the cache, no DB access."""
+    rec = MemberRecord.from_doc(doc)
+    _MEMBER_CACHE.put(rec.user_id, (time.monotonic(), rec))
+    return rec
 
 def _format_member_status(doc: Dict[str, Any]) -> str:
     total = doc["manual_spend"]
@@ -303,24 +537,96 @@ def _back_to_admin_kb() -> InlineKeyboardMarkup:
 
 # ────────────── Member selection keyboards ──────────────
 
-def _member_select_keyboard(back_cb: str, title: str) -> InlineKeyboardMarkup:
+# Keyset pages over the (name_key, user_id) index: every page is one indexed
+# range read of PICKER_PAGE+1 docs however deep it is, so all members are
+# reachable. Buttons carry only the anchor user_id (callback_data is 64 bytes
+# max); an active prefix search lives in _PICKER_QUERY per admin.
+
+PICKER_PAGE = 25
+PAGE_CACHE_TTL = float(os.getenv("REQ_PICKER_CACHE_TTL", "60"))
+_PAGE_CACHE = LRUCache(256)        # (kind, query, direction, anchor) -> (built_at, rows)
+
+# picker kind -> (callback for a member, where Back goes)
+PICKERS: Dict[str, Tuple[str, str]] = {
+    "exempt": ("reqpanel:toggle_exempt_member", "reqpanel:home"),
+    "spend": ("reqpanel:spend_member", "reqpanel:home"),
+}
+_PICKER_QUERY: Dict[Tuple[int, str], str] = {}      # (admin_id, kind) -> search prefix
+_PICKER_TITLES = {
+    "exempt": "<b>Exempt / Un-exempt Member</b>\n\nTap a member below to flip their exempt status for this month.",
+    "spend": "<b>Add Manual Spend</b>\n\nTap a member below to credit offline payments for this month.",
+}
+
+_PAGE_FIELDS = {"_id": 0, "user_id": 1, "first_name": 1, "username": 1, "name_key": 1}
+
+
+def _prefix_filter(query: str) -> Dict[str, Any]:
+    if not query:
+        return {}
+    rx = {"$regex": "^" + re.escape(query)}
+    return {"$or": [{"name_key": rx}, {"username_lc": rx}]}
+
+
+def _keyset_page(base: Dict[str, Any], anchor: Optional[int], forward: bool,
+                 limit: int = PICKER_PAGE) -> Tuple[List[Dict[str, Any]], bool, bool]:
     """
-    Generic member selector (first 50, sorted by first_name).
+    One page of `base` in (name_key, user_id) order after (forward) or before
+    the anchor member. Returns (docs, has_prev, has_next).
     """
-    docs = list(members_coll.find().sort("first_name", ASCENDING).limit(50))
-    rows: List[List[InlineKeyboardButton]] = []
-
+    # docs without a key yet (another module just upserted them) would sort
+    # first and break the keyset; they show up once the backfill reaches them
+    keyed = {"name_key": {"$exists": True}}
+    query = {"$and": [base, keyed]}
+    if anchor is not None:
+        ref = members_coll.find_one({"user_id": anchor}, {"_id": 0, "name_key": 1}) or {}
+        key, op = ref.get("name_key") or "~", ("$gt" if forward else "$lt")
+        query = {"$and": [base, keyed, {"$or": [{"name_key": {op: key}},
+                                                {"name_key": key, "user_id": {op: anchor}}]}]}
+    order = ASCENDING if forward else -1
+    docs = list(members_coll.find(query, _PAGE_FIELDS)
+                .sort([("name_key", order), ("user_id", order)])
+                .limit(limit + 1))
+    more = len(docs) > limit
+    docs = docs[:limit]
+    if forward:
+        return docs, anchor is not None, more
+    docs.reverse()
+    return docs, more, True
+
+
+def _member_picker(kind: str, admin_id: int, *, direction: str = "n",
+                   anchor: Optional[int] = None) -> InlineKeyboardMarkup:
+    """A page of the `kind` picker (see PICKERS), searched by the admin's active prefix."""
+    member_cb, back_cb = PICKERS[kind]
+    query = _PICKER_QUERY.get((admin_id, kind), "")
+    ck = (kind, query, direction, anchor)
+    hit = _PAGE_CACHE.get(ck)
+    if hit is not None and time.monotonic() - hit[0] < PAGE_CACHE_TTL:
+        return InlineKeyboardMarkup(hit[1])
+
+    docs, has_prev, has_next = _keyset_page(_prefix_filter(query), anchor, direction == "n")
+    rows: List[List[InlineKeyboardButton]] = [
+        [InlineKeyboardButton(_display_name_for_doc(d) if d.get("first_name") or d.get("username")
+                              else str(d["user_id"]), callback_data=f"{member_cb}:{d['user_id']}")]
+        for d in docs
+    ]
     if not docs:
-        return InlineKeyboardMarkup(
-            [[InlineKeyboardButton("⬅ Back", callback_data=back_cb)]]
-        )
-
-    for d in docs:
-        uid = d["user_id"]
-        label = _display_name_for_doc(d)
-        rows.append([InlineKeyboardButton(label, callback_data=f"{title}:{uid}")])
+        rows.append([InlineKeyboardButton("No members match." if query else "No members yet.",
+                                          callback_data="reqpick:noop")])
+    nav: List[InlineKeyboardButton] = []
+    if docs and has_prev:
+        nav.append(InlineKeyboardButton("⬅ Prev", callback_data=f"reqpanel:mp:{kind}:p:{docs[0]['user_id']}"))
+    if docs and has_next:
+        nav.append(InlineKeyboardButton("Next ➡", callback_data=f"reqpanel:mp:{kind}:n:{docs[-1]['user_id']}"))
+    if nav:
+        rows.append(nav)
+    if query:
+        rows.append([InlineKeyboardButton(f"✖ Clear search “{query[:20]}”", callback_data=f"reqpanel:mpx:{kind}")])
+    else:
+        rows.append([InlineKeyboardButton("🔎 Search name / @username", callback_data=f"reqpanel:mps:{kind}")])
+    rows.append([InlineKeyboardButton("⬅ Back to Requirements Menu", callback_data=back_cb)])
 
-    rows.append([InlineKeyboardButton("⬅ Back to Requirements Menu", callback_data="reqpanel:home")])
+    _PAGE_CACHE.put(ck, (time.monotonic(), rows))
     return InlineKeyboardMarkup(rows)
 
 # ────────────── Core handlers ──────────────
@@ -329,8 +635,8 @@ def register(app: Client):
     log.info(
         "✅ handlers.requirements_panel registered (OWNER_ID=%s, super_admins=%s, models=%s, groups=%s)",
         OWNER_ID,
-        SUPER_ADMINS,
-        MODELS,
+        sorted(roles.table.super_admins),
+        sorted(roles.table.models),
         SANCTUARY_GROUP_IDS,
     )
 
@@ -341,7 +647,9 @@ def register(app: Client):
         STATE.pop(uid, None)
         PENDING_SPEND.pop(uid, None)
         PENDING_ATTRIB.pop(uid, None)
-        pending_custom_coll.delete_one({"owner_id": uid})
+        if uid in _LEGACY_PENDING:
+            _LEGACY_PENDING.discard(uid)
+            pending_custom_coll.delete_one({"owner_id": uid})
         await msg.reply_text("✅ Cancelled. You can use the buttons again.")
 
     # Entry point from main menu button
@@ -458,8 +766,8 @@ def register(app: Client):
         user_id = msg.from_user.id
 
         # Legacy custom-amount flow in Mongo (no longer used)
-        pending = pending_custom_coll.find_one({"owner_id": user_id})
-        if pending:
+        if user_id in _LEGACY_PENDING:
+            _LEGACY_PENDING.discard(user_id)
             pending_custom_coll.delete_one({"owner_id": user_id})
             await msg.reply_text(
                 "This custom-amount flow has been replaced with buttons. "
@@ -474,6 +782,22 @@ def register(app: Client):
         mode = state.get("mode")
 
         try:
+            # Member picker search (🔎 button) — prefix on name / @username
+            if mode == "picker_search":
+                kind = state.get("kind", "exempt")
+                query = _norm(msg.text.strip().lstrip("@"))[:32]
+                STATE.pop(user_id, None)
+                if query:
+                    _PICKER_QUERY[(user_id, kind)] = query
+                else:
+                    _PICKER_QUERY.pop((user_id, kind), None)
+                await msg.reply_text(
+                    _PICKER_TITLES[kind] + (f"\n\nSearch: <code>{escape(query)}</code>" if query else ""),
+                    reply_markup=_member_picker(kind, user_id),
+                    disable_web_page_preview=True,
+                )
+                return
+
             # LOOKUP FLOW (if you ever re-enable it)
             if mode == "lookup":
                 target_id: Optional[int] = None
@@ -482,7 +806,7 @@ def register(app: Client):
                     target_id = msg.forward_from.id
                 elif msg.text.startswith("@"):
                     username = msg.text[1:].strip().lower()
-                    doc = members_coll.find_one({"username": username})
+                    doc = members_coll.find_one({"username_lc": _norm(username)}, {"_id": 0, "user_id": 1})
                     if doc:
                         target_id = doc["user_id"]
                 else:
@@ -512,8 +836,8 @@ def register(app: Client):
                     await msg.reply_text("Please send just the numeric Telegram user ID.")
                     return
 
-                doc = members_coll.find_one({"user_id": target_id}) or {"user_id": target_id}
-                new_val = not bool(doc.get("is_exempt", False))
+                doc = _member_doc(target_id)
+                new_val = not doc.db_exempt
 
                 members_coll.update_one(
                     {"user_id": target_id},
@@ -531,7 +855,7 @@ def register(app: Client):
                 model_note = ""
                 if target_id == OWNER_ID:
                     model_note = " (OWNER – still exempt overall)"
-                elif target_id in MODELS:
+                elif roles.is_model(target_id):
                     model_note = " (MODEL – still exempt overall)"
 
                 await msg.reply_text(
@@ -593,21 +917,18 @@ def register(app: Client):
         else:
             out = ["<b>Member Status List (current members, first 50)</b>\n"]
             for d in docs:
-                uid = d["user_id"]
-                total = float(d.get("manual_spend", 0.0))
-                db_exempt = bool(d.get("is_exempt", False))
-                is_model = uid == OWNER_ID or uid in MODELS
-                if is_model:
+                md = _member_record(d)
+                if md.is_model:
                     status = "MODEL (EXEMPT)"
-                elif db_exempt:
+                elif md.db_exempt:
                     status = "EXEMPT"
-                elif total >= REQUIRED_MIN_SPEND:
+                elif md.meets:
                     status = "MET"
                 else:
                     status = "BEHIND"
 
-                display_name = _display_name_for_doc(d)
-                out.append(f"• {display_name} (<code>{uid}</code>) – {status} (${total:.2f})")
+                display_name = _display_name_for_doc(md)
+                out.append(f"• {display_name} (<code>{md.user_id}</code>) – {status} (${md.manual_spend:.2f})")
             text = "\n".join(out)
 
         await cq.answer()
@@ -618,6 +939,47 @@ def register(app: Client):
             disable_web_page_preview=True,
         )
 
+    # ────────────── Member picker paging / search ──────────────
+
+    async def _show_picker_page(cq: CallbackQuery, kb: InlineKeyboardMarkup):
+        await cq.answer()
+        try:
+            await cq.message.edit_reply_markup(kb)
+        except MessageNotModified:
+            pass
+
+    @app.on_callback_query(filters.regex(r"^reqpanel:mp:(exempt|spend):([np]):(\d+)$"))
+    async def reqpanel_picker_page_cb(_, cq: CallbackQuery):
+        user_id = cq.from_user.id
+        if not _is_admin_or_model(user_id):
+            await cq.answer("Only Roni and models can use this.", show_alert=True)
+            return
+        kind, direction, anchor = route_of(cq).args
+        await _show_picker_page(cq, _member_picker(kind, user_id, direction=direction, anchor=anchor))
+
+    @app.on_callback_query(filters.regex(r"^reqpanel:mpx:(exempt|spend)$"))
+    async def reqpanel_picker_clear_cb(_, cq: CallbackQuery):
+        user_id = cq.from_user.id
+        if not _is_admin_or_model(user_id):
+            await cq.answer("Only Roni and models can use this.", show_alert=True)
+            return
+        kind = route_of(cq).args[0]
+        _PICKER_QUERY.pop((user_id, kind), None)
+        await _show_picker_page(cq, _member_picker(kind, user_id))
+
+    @app.on_callback_query(filters.regex(r"^reqpanel:mps:(exempt|spend)$"))
+    async def reqpanel_picker_search_cb(_, cq: CallbackQuery):
+        user_id = cq.from_user.id
+        if not _is_admin_or_model(user_id):
+            await cq.answer("Only Roni and models can use this.", show_alert=True)
+            return
+        STATE[user_id] = {"mode": "picker_search", "kind": route_of(cq).args[0]}
+        await cq.answer()
+        await cq.message.reply_text(
+            "🔎 Send the first letters of a member’s name or @username (here in DM).\n"
+            "Send /cancel to stop."
+        )
+
     # ────────────── Toggle Exempt (BUTTONS ONLY) ──────────────
 
     @app.on_callback_query(filters.regex("^reqpanel:toggle_exempt$"))
@@ -627,10 +989,7 @@ def register(app: Client):
             await cq.answer("Only Roni and models can change exemptions.", show_alert=True)
             return
 
-        kb = _member_select_keyboard(
-            back_cb="reqpanel:home",
-            title="reqpanel:toggle_exempt_member",
-        )
+        kb = _member_picker("exempt", user_id)
 
         await cq.answer()
         await _safe_edit_text(
@@ -651,10 +1010,10 @@ def register(app: Client):
             await cq.answer("Only Roni and models can change exemptions.", show_alert=True)
             return
 
-        target_id = int(cq.data.split(":")[-1])
-        doc = members_coll.find_one({"user_id": target_id}) or {"user_id": target_id}
+        target_id = route_of(cq).args[0]
+        doc = _member_doc(target_id)
 
-        new_val = not bool(doc.get("is_exempt", False))
+        new_val = not doc.db_exempt
 
         members_coll.update_one(
             {"user_id": target_id},
@@ -672,45 +1031,34 @@ def register(app: Client):
         model_note = ""
         if target_id == OWNER_ID:
             model_note = " (OWNER – still exempt overall)"
-        elif target_id in MODELS:
+        elif roles.is_model(target_id):
             model_note = " (MODEL – still exempt overall)"
 
         await _log_event(client, f"Exempt toggled to {new_val} for {target_id} by {user_id}")
 
         await cq.answer("Saved.", show_alert=False)
+        if _via_inline(cq):
+            kb = InlineKeyboardMarkup([[InlineKeyboardButton(
+                "Un-exempt" if new_val else "Exempt",
+                callback_data=f"reqpanel:toggle_exempt_member:{target_id}",
+            )]])
+            more = ""
+        else:
+            kb, more = _member_picker("exempt", user_id), "\n\nTap another member to continue."
         await _safe_edit_text(
-            cq.message,
+            cq,
             text=(
                 "✅ <b>Saved</b>\n\n"
                 f"User <code>{target_id}</code> is now "
-                f"{'✅ EXEMPT' if new_val else '❌ NOT exempt'} for this month.{model_note}\n\n"
-                "Tap another member to continue."
-            ),
-            reply_markup=_member_select_keyboard(
-                back_cb="reqpanel:home",
-                title="reqpanel:toggle_exempt_member",
+                f"{'✅ EXEMPT' if new_val else '❌ NOT exempt'} for this month.{model_note}{more}"
             ),
+            reply_markup=kb,
             disable_web_page_preview=True,
         )
 
     # ────────────── Add Manual Spend (BUTTONS ONLY) ──────────────
 
-    def _member_select_keyboard_spend() -> InlineKeyboardMarkup:
-        docs = list(members_coll.find().sort("first_name", ASCENDING).limit(50))
-        rows: List[List[InlineKeyboardButton]] = []
-
-        if not docs:
-            return _back_to_admin_kb()
-
-        for d in docs:
-            uid = d["user_id"]
-            label = _display_name_for_doc(d)
-            rows.append([InlineKeyboardButton(label, callback_data=f"reqpanel:spend_member:{uid}")])
-
-        rows.append([InlineKeyboardButton("⬅ Back to Requirements Menu", callback_data="reqpanel:home")])
-        return InlineKeyboardMarkup(rows)
-
-    def _spend_keyboard(target_id: int) -> InlineKeyboardMarkup:
+    def _spend_keyboard(target_id: int, back: bool = True) -> InlineKeyboardMarkup:
         return InlineKeyboardMarkup(
             [
                 [
@@ -737,13 +1085,11 @@ def register(app: Client):
                 [
                     InlineKeyboardButton("✅ Confirm & Pick Model", callback_data=f"reqpanel:spend_confirm:{target_id}"),
                 ],
-                [
-                    InlineKeyboardButton("⬅ Back to Member List", callback_data="reqpanel:add_spend"),
-                ],
-            ]
+            ] + ([[InlineKeyboardButton("⬅ Back to Member List", callback_data="reqpanel:add_spend")]]
+                 if back else [])
         )
 
-    async def _render_spend_panel(message: Message, target_id: int, display_total: float):
+    async def _render_spend_panel(cq: CallbackQuery, target_id: int, display_total: float):
         doc = _member_doc(target_id)
         name_parts = []
         if doc.get("first_name"):
@@ -761,9 +1107,9 @@ def register(app: Client):
         )
 
         await _safe_edit_text(
-            message,
+            cq,
             text=text,
-            reply_markup=_spend_keyboard(target_id),
+            reply_markup=_spend_keyboard(target_id, back=not _via_inline(cq)),
             disable_web_page_preview=True,
         )
 
@@ -779,7 +1125,7 @@ def register(app: Client):
             await cq.answer("Only Roni and models can add spend.", show_alert=True)
             return
 
-        kb = _member_select_keyboard_spend()
+        kb = _member_picker("spend", user_id)
         await cq.answer()
         await _safe_edit_text(
             cq.message,
@@ -799,7 +1145,7 @@ def register(app: Client):
             await cq.answer("Only Roni and models can add spend.", show_alert=True)
             return
 
-        target_id = int(cq.data.split(":")[-1])
+        target_id = route_of(cq).args[0]
         doc = _member_doc(target_id)
         current_total = doc["manual_spend"]
 
@@ -810,7 +1156,7 @@ def register(app: Client):
         }
 
         await cq.answer()
-        await _render_spend_panel(cq.message, target_id, current_total)
+        await _render_spend_panel(cq, target_id, current_total)
 
     @app.on_callback_query(filters.regex(r"^reqpanel:spend_delta:(\d+):(-?\d+)$"))
     async def reqpanel_spend_delta_cb(_, cq: CallbackQuery):
@@ -820,13 +1166,8 @@ def register(app: Client):
                 await cq.answer("Only Roni and models can add spend.", show_alert=True)
                 return
 
-            m = re.match(r"^reqpanel:spend_delta:(\d+):(-?\d+)$", cq.data or "")
-            if not m:
-                await cq.answer("That button payload didn’t parse.", show_alert=True)
-                return
-
-            target_id = int(m.group(1))
-            delta = float(m.group(2))
+            target_id, delta = route_of(cq).args
+            delta = float(delta)
 
             state = PENDING_SPEND.get(user_id)
             if not state or state.get("target_id") != target_id:
@@ -844,7 +1185,7 @@ def register(app: Client):
             state["working_total"] = working
 
             await cq.answer()
-            await _render_spend_panel(cq.message, target_id, working)
+            await _render_spend_panel(cq, target_id, working)
 
         except Exception as e:
             log.exception("requirements_panel: spend_delta failed: %s", e)
@@ -862,7 +1203,7 @@ def register(app: Client):
             await cq.answer("Only Roni and models can add spend.", show_alert=True)
             return
 
-        target_id = int(cq.data.split(":")[-1])
+        target_id = route_of(cq).args[0]
 
         state = PENDING_SPEND.get(user_id)
         if not state or state.get("target_id") != target_id:
@@ -877,7 +1218,7 @@ def register(app: Client):
             state["working_total"] = 0.0
 
         await cq.answer("Cleared (preview). Tap Confirm to save.", show_alert=False)
-        await _render_spend_panel(cq.message, target_id, 0.0)
+        await _render_spend_panel(cq, target_id, 0.0)
 
     @app.on_callback_query(filters.regex(r"^reqpanel:spend_confirm:(\d+)$"))
     async def reqpanel_spend_confirm_cb(client: Client, cq: CallbackQuery):
@@ -886,7 +1227,7 @@ def register(app: Client):
             await cq.answer("Only Roni and models can add spend.", show_alert=True)
             return
 
-        target_id = int(cq.data.split(":")[-1])
+        target_id = route_of(cq).args[0]
         state = PENDING_SPEND.get(user_id)
         if not state or state.get("target_id") != target_id:
             await cq.answer("No pending changes for this member. Use the +/- buttons first.", show_alert=True)
@@ -900,7 +1241,7 @@ def register(app: Client):
             await cq.answer("No changes to save for this member.", show_alert=True)
             return
 
-        doc = members_coll.find_one({"user_id": target_id}) or {"user_id": target_id}
+        doc = _member_doc(target_id)
         members_coll.update_one(
             {"user_id": target_id},
             {
@@ -960,7 +1301,7 @@ def register(app: Client):
 
         await cq.answer()
         await _safe_edit_text(
-            cq.message,
+            cq,
             text=text,
             reply_markup=kb,
             disable_web_page_preview=True,
@@ -973,9 +1314,8 @@ def register(app: Client):
             await cq.answer("Only Roni and models can add spend.", show_alert=True)
             return
 
-        parts = cq.data.split(":")
-        target_id = int(parts[2])
-        slug = parts[3]
+        route = route_of(cq)  # reqpanel:spend_model:<uid>:<slug>
+        target_id, slug = route.args[0], route.tail(3)
 
         attrib = PENDING_ATTRIB.get(user_id)
         if not attrib or attrib.get("target_id") != target_id:
@@ -1023,16 +1363,16 @@ def register(app: Client):
             f"Member: {name} (<code>{target_id}</code>)\n"
             f"Change this edit: <b>{delta:+.2f}</b> credited to <b>{model_label}</b>.\n"
             f"New manual total for this month: <b>${new_total:.2f}</b>.\n\n"
-            "You can pick another member from the list to continue."
+            + ("" if _via_inline(cq) else "You can pick another member from the list to continue.")
         )
 
-        kb = InlineKeyboardMarkup(
+        kb = None if _via_inline(cq) else InlineKeyboardMarkup(
             [[InlineKeyboardButton("⬅ Back to Member List", callback_data="reqpanel:add_spend")]]
         )
 
         await cq.answer("Saved.", show_alert=False)
         await _safe_edit_text(
-            cq.message,
+            cq,
             text=text,
             reply_markup=kb,
             disable_web_page_preview=True,
@@ -1163,10 +1503,10 @@ def register(app: Client):
             uid = d.get("user_id")
             if not uid:
                 continue
-            md = _member_doc(uid)
-            if md["is_exempt"]:
+            md = _member_record(d)
+            if md.is_exempt:
                 exempt += 1
-            elif md["manual_spend"] >= REQUIRED_MIN_SPEND:
+            elif md.meets:
                 met += 1
             else:
                 behind += 1
@@ -1224,76 +1564,88 @@ def register(app: Client):
             disable_web_page_preview=True,
         )
 
-        @app.on_callback_query(filters.regex(r"^reqpanel:dm_ready_gid:(-?\d+)$"))
-        async def reqpanel_dm_ready_gid_cb(client: Client, cq: CallbackQuery):
-            user_id = cq.from_user.id
-            if not _is_admin_or_model(user_id):
-                await cq.answer("Admins only 💜", show_alert=True)
-                return
-
-            gid = int((cq.data or "").split(":")[-1])
-
-            # Pull everyone we know is in this group (from Scan Group Members),
-            # then split into DM-ready vs NOT DM-ready.
-            all_docs = list(members_coll.find({"groups": gid}).sort("first_name", ASCENDING))
-
-            ready_docs = [d for d in all_docs if d.get("dm_ready") is True]
-            not_ready_docs = [d for d in all_docs if d.get("dm_ready") is not True]
-
-            if not all_docs:
-                text = (
-                    f"💬 <b>DM Status (This Group)</b>\n"
-                    f"Group: <code>{gid}</code>\n\n"
-                    "• No members found for this group yet.\n\n"
-                    "Note: Run 📡 <b>Scan Group Members</b> first so the panel knows who is in the group."
-                )
-            else:
-                lines: List[str] = [
-                    "💬 <b>DM Status (This Group)</b>",
-                    f"Group: <code>{gid}</code>",
-                    "",
-                    f"✅ DM-Ready: <b>{len(ready_docs)}</b>",
-                ]
+    @app.on_callback_query(filters.regex(r"^reqpanel:dm_ready_gid:(-?\d+)$"))
+    async def reqpanel_dm_ready_gid_cb(client: Client, cq: CallbackQuery):
+        user_id = cq.from_user.id
+        if not _is_admin_or_model(user_id):
+            await cq.answer("Admins only 💜", show_alert=True)
+            return
 
-                # Show DM-ready list (cap to avoid Telegram limits)
-                for d in ready_docs[:80]:
-                    name = _display_name_for_doc(d)
-                    uid = d.get("user_id")
-                    lines.append(f"• {name} — <code>{uid}</code>")
+        gid = int((cq.data or "").split(":")[-1])
+        text, kb = _dm_ready_view(gid, "r")
+        await cq.answer()
+        await _safe_edit_text(cq.message, text=text, reply_markup=kb, disable_web_page_preview=True)
 
-                if len(ready_docs) > 80:
-                    lines.append(f"…and <b>{len(ready_docs) - 80}</b> more DM-ready.")
+    @app.on_callback_query(filters.regex(r"^reqpanel:dmr:(-?\d+):([rn]):([np]):(\d+)$"))
+    async def reqpanel_dm_ready_page_cb(client: Client, cq: CallbackQuery):
+        user_id = cq.from_user.id
+        if not _is_admin_or_model(user_id):
+            await cq.answer("Admins only 💜", show_alert=True)
+            return
 
-                lines.extend([
-                    "",
-                    f"🚫 NOT DM-Ready: <b>{len(not_ready_docs)}</b>",
-                ])
+        gid, which, direction, anchor = route_of(cq).args
+        text, kb = _dm_ready_view(gid, which, direction, anchor or None)
+        await cq.answer()
+        await _safe_edit_text(cq.message, text=text, reply_markup=kb, disable_web_page_preview=True)
 
-                for d in not_ready_docs[:80]:
-                    name = _display_name_for_doc(d)
-                    uid = d.get("user_id")
-                    lines.append(f"• {name} — <code>{uid}</code>")
 
-                if len(not_ready_docs) > 80:
-                    lines.append(f"…and <b>{len(not_ready_docs) - 80}</b> more not DM-ready.")
+DM_READY_PAGE = 40
 
-                lines.append("")
-                lines.append("Tip: DM-ready comes from <code>dm_ready=true</code> (users who have DM’d the bot).")
 
-                text = "\n".join(lines)
+def _dm_ready_view(gid: int, which: str, direction: str = "n",
+                   anchor: Optional[int] = None) -> Tuple[str, InlineKeyboardMarkup]:
+    """
+    Everyone Scan Group Members found in `gid`, split into DM-ready ("r") and
+    not ("n"); one keyset page of the chosen side plus both counts.
+    """
+    in_group = {"groups": gid}
+    total = members_coll.count_documents(in_group)
+    ready = members_coll.count_documents({"groups": gid, "dm_ready": True})
+    back_rows = [
+        [InlineKeyboardButton("⬅ Back", callback_data="reqpanel:dm_ready_group")],
+        [InlineKeyboardButton("🏠 Admin Panel", callback_data="reqpanel:admin")],
+    ]
 
-            await cq.answer()
-            await _safe_edit_text(
-                cq.message,
-                text=text,
-                reply_markup=InlineKeyboardMarkup(
-                    [
-                        [InlineKeyboardButton("⬅ Back", callback_data="reqpanel:dm_ready_group")],
-                        [InlineKeyboardButton("🏠 Admin Panel", callback_data="reqpanel:admin")],
-                    ]
-                ),
-                disable_web_page_preview=True,
-            )
+    if not total:
+        text = (
+            f"💬 <b>DM Status (This Group)</b>\n"
+            f"Group: <code>{gid}</code>\n\n"
+            "• No members found for this group yet.\n\n"
+            "Note: Run 📡 <b>Scan Group Members</b> first so the panel knows who is in the group."
+        )
+        return text, InlineKeyboardMarkup(back_rows)
+
+    base = {"groups": gid, "dm_ready": True if which == "r" else {"$ne": True}}
+    docs, has_prev, has_next = _keyset_page(base, anchor, direction == "n", DM_READY_PAGE)
+
+    lines: List[str] = [
+        "💬 <b>DM Status (This Group)</b>",
+        f"Group: <code>{gid}</code>",
+        "",
+        f"✅ DM-Ready: <b>{ready}</b>   🚫 NOT DM-Ready: <b>{total - ready}</b>",
+        "",
+        "<b>✅ DM-Ready</b>" if which == "r" else "<b>🚫 NOT DM-Ready</b>",
+    ]
+    for d in docs:
+        lines.append(f"• {_display_name_for_doc(d)} — <code>{d.get('user_id')}</code>")
+    if not docs:
+        lines.append("• none")
+    lines.append("")
+    lines.append("Tip: DM-ready comes from <code>dm_ready=true</code> (users who have DM’d the bot).")
+
+    other = "n" if which == "r" else "r"
+    rows = [[InlineKeyboardButton(
+        f"Show 🚫 NOT DM-Ready ({total - ready})" if which == "r" else f"Show ✅ DM-Ready ({ready})",
+        callback_data=f"reqpanel:dmr:{gid}:{other}:n:0",
+    )]]
+    nav: List[InlineKeyboardButton] = []
+    if docs and has_prev:
+        nav.append(InlineKeyboardButton("⬅ Prev", callback_data=f"reqpanel:dmr:{gid}:{which}:p:{docs[0]['user_id']}"))
+    if docs and has_next:
+        nav.append(InlineKeyboardButton("Next ➡", callback_data=f"reqpanel:dmr:{gid}:{which}:n:{docs[-1]['user_id']}"))
+    if nav:
+        rows.append(nav)
+    return "\n".join(lines), InlineKeyboardMarkup(rows + back_rows)
 
 def _fmt_user(d: Dict[str, Any]) -> str:
     name = (d.get("first_name") or "Unknown").strip()
@@ -1337,15 +1689,15 @@ async def _log_long(app: Client, title: str, lines: List[str]):
         docs = list(members_coll.find({}))
         targets = []
         for raw in docs:
-            md = _member_doc(raw)
-            if md.get("exempt"):
+            if not raw.get("user_id"):
                 continue
-            if md.get("manual_spend", 0) >= REQUIRED_MIN_SPEND:
+            md = _member_record(raw)
+            # for reminders: only "behind" (not met, not exempt) — same as above
+            if md.meets:
                 continue
-            # for reminders: only "behind" (not met) — same as above
-            targets.append(md)
+            targets.append(md.as_dict())
         # sort by spend asc then name
-        targets.sort(key=lambda m: (m.get("manual_spend", 0), (m.get("name") or "").lower()))
+        targets.sort(key=lambda m: (m.get("manual_spend", 0), (m.get("first_name") or "").lower()))
         return targets
 
     def _render_pick(action: str, admin_id: int, *, page: int = 0):
@@ -1445,7 +1797,7 @@ async def _log_long(app: Client, title: str, lines: List[str]):
             sent, reason = await _try_send_dm(app, uid, msg)
             if sent:
                 ok.append(md)
-                members_coll.update_one({"_id": md["_id"]}, {"$set": {flag_field: True}})
+                members_coll.update_one({"user_id": uid}, {"$set": {flag_field: True}})
             else:
                 fail.append((md, reason))
 
@@ -1466,7 +1818,7 @@ async def _log_long(app: Client, title: str, lines: List[str]):
             summary_lines.append("")
             summary_lines.append("<b>Failed:</b>")
             for m, r in fail[:50]:
-                summary_lines.append(f"• {_fmt_user(m)} — <code>{_escape(r)}</code>")
+                summary_lines.append(f"• {_fmt_user(m)} — <code>{escape(str(r))}</code>")
             if len(fail) > 50:
                 summary_lines.append(f"…and {len(fail)-50} more")
 
@@ -1517,13 +1869,13 @@ async def _log_long(app: Client, title: str, lines: List[str]):
     async def reqpick_toggle(app: Client, cq: CallbackQuery):
         if not await _must_be_owner_or_model_admin(app, cq):
             return
-        action, uid_s = cq.data.split(":")[1], cq.data.split(":")[3]
+        route = route_of(cq)  # reqpick:<action>:toggle:<uid>
+        action, uid = route.action, route.args[1]
         admin_id = cq.from_user.id
         st = _load_state(admin_id)
         key = _pick_key(action, admin_id)
         pstate = st.get(key) or {}
         selected = set(pstate.get("selected") or [])
-        uid = int(uid_s)
         if uid in selected:
             selected.remove(uid)
         else:
@@ -1539,8 +1891,8 @@ async def _log_long(app: Client, title: str, lines: List[str]):
     async def reqpick_page(app: Client, cq: CallbackQuery):
         if not await _must_be_owner_or_model_admin(app, cq):
             return
-        action = cq.data.split(":")[1]
-        page = int(cq.data.split(":")[3])
+        route = route_of(cq)  # reqpick:<action>:page:<n>
+        action, page = route.action, route.args[1]
         admin_id = cq.from_user.id
         text2, kb2 = _render_pick(action, admin_id, page=page)
         await cq.message.edit_text(text2, reply_markup=kb2, disable_web_page_preview=True)
@@ -1549,14 +1901,14 @@ async def _log_long(app: Client, title: str, lines: List[str]):
     async def reqpick_send_selected(app: Client, cq: CallbackQuery):
         if not await _must_be_owner_or_model_admin(app, cq):
             return
-        action = cq.data.split(":")[1]
+        action = route_of(cq).action
         await _send_dms_for_action(app, cq, action=action, only_selected=True)
 
     @app.on_callback_query(filters.regex(r"^reqpick:(reminder|final):send_all$"))
     async def reqpick_send_all(app: Client, cq: CallbackQuery):
         if not await _must_be_owner_or_model_admin(app, cq):
             return
-        action = cq.data.split(":")[1]
+        action = route_of(cq).action
         await _send_dms_for_action(app, cq, action=action, only_selected=False)
 
     @app.on_callback_query(filters.regex("^reqpick:noop$"))
@@ -0,0 +1,72 @@
+# handlers/roles_admin.py
+"""
+Owner-only role management on top of utils.roles. Grants are stored in Mongo
+(role_grants) and apply at once, no restart needed.
+
+/roles                      — current table: owner, super admins, admins, models
+/grant <role> <user_id>     — role is super_admin, admin or model
+/revoke <role> <user_id>    — removes a grant (roles set in env stay)
+/roles reload               — re-read role_grants now
+"""
+import asyncio
+import logging
+from typing import Iterable
+
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from utils.roles import ROLES, roles
+
+log = logging.getLogger(__name__)
+
+
+def _ids(ids: Iterable[int]) -> str:
+    return ", ".join(f"<code>{i}</code>" for i in sorted(ids)) or "—"
+
+
+def _table_text() -> str:
+    t = roles.table
+    return (
+        "<b>Roles</b>\n"
+        f"Owner: <code>{t.owner_id}</code>\n"
+        f"Super admins: {_ids(t.super_admins - {t.owner_id})}\n"
+        f"Admins: {_ids(t.admins - t.super_admins)}\n"
+        f"Models: {_ids(t.models - {t.owner_id})}"
+    )
+
+
+def _parse(m: Message):
+    if len(m.command) != 3 or m.command[1] not in ROLES or not m.command[2].lstrip("-").isdigit():
+        return None
+    return m.command[1], int(m.command[2])
+
+
+def register(app: Client):
+
+    @app.on_message(filters.command("roles") & filters.user(roles.owner_id))
+    async def roles_cmd(client: Client, m: Message):
+        if len(m.command) > 1 and m.command[1].lower() == "reload":
+            await asyncio.to_thread(roles.reload)
+        await m.reply_text(_table_text())
+
+    @app.on_message(filters.command(["grant", "revoke"]) & filters.user(roles.owner_id))
+    async def grant_cmd(client: Client, m: Message):
+        cmd = m.command[0].lower()
+        parsed = _parse(m)
+        if parsed is None:
+            return await m.reply_text(f"Usage: /{cmd} <{'|'.join(ROLES)}> <user_id>")
+        role, uid = parsed
+        try:
+            if cmd == "grant":
+                await asyncio.to_thread(roles.grant, uid, role, m.from_user.id)
+            else:
+                await asyncio.to_thread(roles.revoke, uid, role)
+        except Exception as e:
+            log.warning("roles_admin: /%s %s %s failed: %s", cmd, role, uid, e)
+            return await m.reply_text(f"❌ {cmd} failed: {e}")
+        note = ""
+        if cmd == "revoke" and role in roles.env_roles(uid):
+            note = "\n(still set in env — remove it there too)"
+        await m.reply_text(f"✅ {role} {'granted to' if cmd == 'grant' else 'revoked from'} <code>{uid}</code>.{note}\n\n{_table_text()}")
+
+    log.info("✅ handlers.roles_admin registered (/roles, /grant, /revoke)")
@@ -7,12 +7,13 @@ from pyrogram import Client, filters
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 
 from utils.menu_store import store
+from utils.roles import roles
 
 log = logging.getLogger(__name__)
 
 BOT_USERNAME = (os.getenv("BOT_USERNAME") or "YourBotUsernameHere").lstrip("@")
 RONI_USERNAME = (os.getenv("RONI_USERNAME") or "chaossub283").lstrip("@")
-RONI_OWNER_ID = 6964994611
+RONI_OWNER_ID = roles.owner_id
 
 TIP_RONI_LINK = (os.getenv("TIP_RONI_LINK") or "").strip()
 
@@ -6,11 +6,14 @@ from datetime import datetime, timezone
 from pyrogram import Client, filters
 from pyrogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
+from utils import request_context
 from utils.menu_store import store
+from utils.roles import roles
+from utils.user_profiles import profiles
 
 log = logging.getLogger(__name__)
 
-RONI_OWNER_ID = 6964994611
+RONI_OWNER_ID = roles.owner_id
 
 # --- Storage keys ---
 AGE_OK_PREFIX = "AGE_OK:"                # AGE_OK:<user_id> => "1"
@@ -97,12 +100,16 @@ def is_age_verified(user_id: int | None) -> bool:
     return user_id in _get_verified_index()
 
 
+request_context.set_age_source(is_age_verified)
+
+
 def _ensure_verified(user_id: int) -> None:
     store.set_menu(_age_key(user_id), "1")
     ids = _get_verified_index()
     if user_id not in ids:
         ids.append(user_id)
         _set_verified_index(ids)
+    request_context.save_fields(user_id, age_verified=True)
 
 
 def _remove_verified(user_id: int) -> None:
@@ -112,6 +119,7 @@ def _remove_verified(user_id: int) -> None:
         pass
     ids = [x for x in _get_verified_index() if x != user_id]
     _set_verified_index(ids)
+    request_context.save_fields(user_id, age_verified=False)
 
 
 def _remove_pending(user_id: int) -> None:
@@ -159,22 +167,9 @@ def _pending_controls(uid: int) -> InlineKeyboardMarkup:
 
 
 async def _resolve_users(client: Client, ids: list[int]) -> dict[int, tuple[str, str]]:
-    """uid -> (first_name, username) best-effort"""
-    out: dict[int, tuple[str, str]] = {}
-    if not ids:
-        return out
-    try:
-        users = await client.get_users(ids)
-        if not isinstance(users, list):
-            users = [users]
-        for u in users:
-            try:
-                out[int(u.id)] = (u.first_name or "User", u.username or "")
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return out
+    """uid -> (first_name, username) best-effort, from the shared profile cache"""
+    found = await profiles.resolve(client, ids)
+    return {uid: (p.get("first_name") or "User", p.get("username") or "") for uid, p in found.items()}
 
 
 async def _show_no_more_pending(cq: CallbackQuery):
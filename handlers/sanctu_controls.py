@@ -1,11 +1,12 @@
 # handlers/sanctu_controls.py
+import asyncio
 import logging
 import os
 import random
 from datetime import datetime, timezone
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple, Any
 
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, UpdateOne
 from pyrogram import Client, filters
 from pyrogram.types import (
     CallbackQuery,
@@ -17,6 +18,9 @@ from pyrogram.types import (
 )
 from pyrogram.errors import MessageNotModified
 
+from utils.boot import on_init, on_shutdown
+from utils.roles import roles
+
 log = logging.getLogger(__name__)
 
 # ────────────── ENV / DB ──────────────
@@ -30,17 +34,21 @@ db = mongo["Succubot"]
 
 # blacklisted users
 blacklist_coll = db["blacklist_users"]
-blacklist_coll.create_index([("user_id", ASCENDING)], unique=True)
 
 # groups the bot has seen (for Safety Sweep)
 chats_coll = db["sanctu_known_chats"]
-chats_coll.create_index([("chat_id", ASCENDING)], unique=True)
 
 # simple per-owner state for button flows
 state_coll = db["sanctu_state"]
-state_coll.create_index([("owner_id", ASCENDING)], unique=True)
 
-OWNER_ID = int(os.getenv("OWNER_ID", os.getenv("BOT_OWNER_ID", "6964994611") or "6964994611"))
+
+@on_init("sanctu_controls.indexes")
+def _ensure_indexes() -> None:
+    blacklist_coll.create_index([("user_id", ASCENDING)], unique=True)
+    chats_coll.create_index([("chat_id", ASCENDING)], unique=True)
+    state_coll.create_index([("owner_id", ASCENDING)], unique=True)
+
+OWNER_ID = roles.owner_id
 
 LOG_GROUP_ID: Optional[int] = None
 for key in (
@@ -99,7 +107,7 @@ LEAVE_MESSAGES: List[str] = [
 # ────────────── Helpers ──────────────
 
 def _is_owner(user_id: int) -> bool:
-    return user_id == OWNER_ID
+    return roles.is_owner(user_id)
 
 
 async def _safe_send(client: Client, chat_id: int, text: str):
@@ -138,24 +146,89 @@ def _format_user_line(doc) -> str:
     return f"- {name_part} (`{uid}`) — {reason} (added {ts_str})"
 
 
-def _track_chat(chat: Chat):
-    if chat.type not in ("group", "supergroup"):
-        return
+# ────────────── Tracked chats (write-behind) ──────────────
+# Every group message passes through _track_chat, so it must never hit Mongo.
+# We remember what we've already persisted and only queue a write when a chat
+# is new or its title/type changed; a background task flushes the queue.
+
+TRACK_FLUSH_SECONDS = float(os.getenv("SANCTU_TRACK_FLUSH_SECONDS", "30"))
+
+# chat_id -> (title, type) as last persisted (or queued)
+_known_chats: Dict[int, Tuple[str, str]] = {}
+# chat_id -> $set payload waiting for the next flush
+_dirty_chats: Dict[int, Dict[str, Any]] = {}
+_flush_task: Optional[asyncio.Task] = None
+_flush_lock = asyncio.Lock()
+
+
+def _chat_type_str(chat: Chat) -> str:
+    # pyrogram 2 gives ChatType enums; older code compared against plain strings
+    return str(getattr(chat.type, "value", chat.type) or "")
+
+
+def _load_known_chats() -> None:
+    for d in chats_coll.find({}, {"chat_id": 1, "title": 1, "type": 1}):
+        cid = d.get("chat_id")
+        if cid is not None and cid not in _known_chats:
+            _known_chats[cid] = (d.get("title") or "", d.get("type") or "")
+
+
+@on_shutdown("sanctu_controls.tracked_chats")
+async def _flush_tracked_chats() -> int:
+    """Write queued chat changes in one bulk_write (also on shutdown). Returns how many were flushed."""
+    async with _flush_lock:
+        if not _dirty_chats:
+            return 0
+        batch = dict(_dirty_chats)
+        _dirty_chats.clear()
+        ops = [UpdateOne({"chat_id": cid}, {"$set": doc}, upsert=True) for cid, doc in batch.items()]
+        try:
+            await asyncio.to_thread(chats_coll.bulk_write, ops, ordered=False)
+        except Exception as e:
+            log.warning("sanctu_controls: failed to flush %s tracked chats: %s", len(batch), e)
+            # re-queue anything that wasn't superseded while we were writing
+            for cid, doc in batch.items():
+                _dirty_chats.setdefault(cid, doc)
+            return 0
+        return len(batch)
+
+
+async def _flush_loop() -> None:
     try:
-        chats_coll.update_one(
-            {"chat_id": chat.id},
-            {
-                "$set": {
-                    "chat_id": chat.id,
-                    "title": chat.title or "",
-                    "type": chat.type,
-                    "updated_at": datetime.now(timezone.utc),
-                }
-            },
-            upsert=True,
-        )
+        await asyncio.to_thread(_load_known_chats)
     except Exception as e:
-        log.warning("sanctu_controls: failed to track chat %s: %s", chat.id, e)
+        log.warning("sanctu_controls: failed to preload tracked chats: %s", e)
+    while True:
+        await asyncio.sleep(TRACK_FLUSH_SECONDS)
+        await _flush_tracked_chats()
+
+
+def _ensure_flusher() -> None:
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        return
+    try:
+        _flush_task = asyncio.get_running_loop().create_task(_flush_loop())
+    except RuntimeError:
+        # no running loop (import time); the next tracked message starts it
+        _flush_task = None
+
+
+def _track_chat(chat: Chat):
+    ctype = _chat_type_str(chat)
+    if ctype not in ("group", "supergroup"):
+        return
+    _ensure_flusher()
+    title = chat.title or ""
+    if _known_chats.get(chat.id) == (title, ctype):
+        return
+    _known_chats[chat.id] = (title, ctype)
+    _dirty_chats[chat.id] = {
+        "chat_id": chat.id,
+        "title": title,
+        "type": ctype,
+        "updated_at": datetime.now(timezone.utc),
+    }
 
 
 def _set_owner_mode(mode: Optional[str]):
@@ -553,6 +626,8 @@ def register(app: Client):
 
         await cq.answer("Starting safety sweep…", show_alert=False)
 
+        # make sure recently seen groups are persisted before we read them back
+        await _flush_tracked_chats()
         docs = list(chats_coll.find({}))
         for d in docs:
             chat_id = d["chat_id"]
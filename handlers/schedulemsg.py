@@ -1,20 +1,30 @@
 # handlers/schedulemsg.py
-import os
+"""
+Owner-scheduled posts.
+
+Jobs live in the persistent scheduler (utils/scheduler.py → utils.mongo.scheduled_jobs)
+and fire on the bot's own event loop, so they survive restarts and posts that were
+due while the bot was down are caught up within SCHEDULEMSG_MISFIRE_GRACE_SECONDS.
+Photos are stored by file_id only.
+"""
 import asyncio
+import os
 from datetime import datetime
 
 import pytz
-from apscheduler.schedulers.background import BackgroundScheduler
 from pyrogram import filters
 from pyrogram.handlers import MessageHandler
 
+from utils.scheduler import scheduler
+from utils.roles import roles
+
 # ────────────── CONFIG ──────────────
 
-OWNER_ID = 6964994611  # Roni 💕
+OWNER_ID = roles.owner_id  # Roni 💕
 
-scheduler = BackgroundScheduler()
-MAIN_LOOP = None  # set by main.py
-SCHEDULED_MSGS = {}  # msg_id -> job
+LOCAL_TZ = pytz.timezone("America/Los_Angeles")
+JOB_KIND = "schedulemsg.post"
+MISFIRE_GRACE = float(os.getenv("SCHEDULEMSG_MISFIRE_GRACE_SECONDS", "3600"))
 
 
 def log_debug(msg: str) -> None:
@@ -39,11 +49,27 @@ def resolve_group_name(group: str) -> str:
     return group
 
 
-def set_main_loop(loop) -> None:
-    """Called from main.py so jobs can post back into the bot loop."""
-    global MAIN_LOOP
-    MAIN_LOOP = loop
-    log_debug("MAIN_LOOP set by set_main_loop()")
+def _chat_ref(group: str):
+    # numeric ids must be sent as ints; @usernames stay strings
+    try:
+        return int(group)
+    except ValueError:
+        return group
+
+
+# ────────────── JOB ──────────────
+
+@scheduler.task(JOB_KIND)
+async def post_scheduled(client, payload: dict):
+    group, msg_id = payload.get("group"), payload.get("msg_id")
+    text = payload.get("text") or ""
+    photo = payload.get("photo")
+    log_debug(f"posting {msg_id} to {group}")
+    if photo:
+        await client.send_photo(_chat_ref(group), photo, caption=text)
+    else:
+        await client.send_message(_chat_ref(group), text)
+    log_debug(f"posted {msg_id} to {group}")
 
 
 # ────────────── CORE HANDLERS ──────────────
@@ -63,7 +89,7 @@ async def schedulemsg_handler(client, message):
     # We allow:
     # /schedulemsg YYYY-MM-DD HH:MM GROUP TEXT...
     # /sm         YYYY-MM-DD HH:MM GROUP TEXT...
-    text_cmd = message.text or ""
+    text_cmd = message.text or message.caption or ""
     args = text_cmd.split(maxsplit=4)
 
     # Photo logic (message or reply)
@@ -73,7 +99,7 @@ async def schedulemsg_handler(client, message):
     elif message.reply_to_message and message.reply_to_message.photo:
         photo = message.reply_to_message.photo.file_id
 
-    if len(args) < 5 and not photo:
+    if len(args) < 4 or (len(args) < 5 and not photo):
         await message.reply(
             "Usage:\n"
             "/schedulemsg <YYYY-MM-DD HH:MM> <group> <text>\n"
@@ -88,98 +114,27 @@ async def schedulemsg_handler(client, message):
     time_str = f"{date_part} {time_part}"
 
     try:
-        local_tz = pytz.timezone("America/Los_Angeles")
-        post_time = local_tz.localize(
-            datetime.strptime(time_str, "%Y-%m-%d %H:%M")
-        )
+        post_time = LOCAL_TZ.localize(datetime.strptime(time_str, "%Y-%m-%d %H:%M"))
     except Exception as e:  # noqa: BLE001
         await message.reply(f"❌ Invalid time: {e}")
         return
 
     msg_id = f"{group}|{int(post_time.timestamp())}"
+    await asyncio.to_thread(
+        scheduler.schedule_at,
+        msg_id,
+        JOB_KIND,
+        post_time,
+        {"group": group, "text": text, "photo": photo, "msg_id": msg_id},
+        misfire_grace=MISFIRE_GRACE,
+    )
 
-    if photo:
-        job = scheduler.add_job(
-            func=run_post_photo,
-            trigger="date",
-            run_date=post_time,
-            args=[client, group, photo, text, msg_id],
-        )
-        SCHEDULED_MSGS[msg_id] = job
-        await message.reply(
-            f"✅ Photo scheduled for {post_time.strftime('%Y-%m-%d %H:%M %Z')} in {group}.\n"
-            f"ID: <code>{msg_id}</code>"
-        )
-        log_debug(f"Photo scheduled: {msg_id}")
-    else:
-        job = scheduler.add_job(
-            func=run_post_msg,
-            trigger="date",
-            run_date=post_time,
-            args=[client, group, text, msg_id],
-        )
-        SCHEDULED_MSGS[msg_id] = job
-        await message.reply(
-            f"✅ Message scheduled for {post_time.strftime('%Y-%m-%d %H:%M %Z')} in {group}.\n"
-            f"ID: <code>{msg_id}</code>"
-        )
-        log_debug(f"Message scheduled: {msg_id}")
-
-
-async def post_msg(client, group: str, text: str, msg_id: str):
-    log_debug(f"post_msg CALLED for {group}: {text} (msg_id={msg_id})")
-    try:
-        await client.send_message(group, text)
-        log_debug(f"Message posted to {group} (msg_id={msg_id})")
-    except Exception as e:  # noqa: BLE001
-        log_debug(f"Failed to post scheduled message: {e}")
-    SCHEDULED_MSGS.pop(msg_id, None)
-
-
-def run_post_msg(client, group: str, text: str, msg_id: str):
-    log_debug(f"run_post_msg CALLED for {group}: {text} (msg_id={msg_id})")
-    global MAIN_LOOP
-
-    if MAIN_LOOP is None:
-        log_debug("ERROR: MAIN_LOOP is not set!")
-        return
-
-    try:
-        fut = asyncio.run_coroutine_threadsafe(
-            post_msg(client, group, text, msg_id),
-            MAIN_LOOP,
-        )
-        log_debug(f"asyncio.run_coroutine_threadsafe called for post_msg (future={fut})")
-    except Exception as exc:  # noqa: BLE001
-        log_debug(f"ERROR in run_post_msg: {exc}")
-
-
-async def post_photo(client, group: str, photo: str, caption: str, msg_id: str):
-    log_debug(f"post_photo CALLED for {group}: {caption} (msg_id={msg_id})")
-    try:
-        await client.send_photo(group, photo, caption=caption)
-        log_debug(f"Photo posted to {group} (msg_id={msg_id})")
-    except Exception as e:  # noqa: BLE001
-        log_debug(f"Failed to post scheduled photo: {e}")
-    SCHEDULED_MSGS.pop(msg_id, None)
-
-
-def run_post_photo(client, group: str, photo: str, caption: str, msg_id: str):
-    log_debug(f"run_post_photo CALLED for {group}: {caption} (msg_id={msg_id})")
-    global MAIN_LOOP
-
-    if MAIN_LOOP is None:
-        log_debug("ERROR: MAIN_LOOP is not set!")
-        return
-
-    try:
-        fut = asyncio.run_coroutine_threadsafe(
-            post_photo(client, group, photo, caption, msg_id),
-            MAIN_LOOP,
-        )
-        log_debug(f"asyncio.run_coroutine_threadsafe called for post_photo (future={fut})")
-    except Exception as exc:  # noqa: BLE001
-        log_debug(f"ERROR in run_post_photo: {exc}")
+    what = "Photo" if photo else "Message"
+    await message.reply(
+        f"✅ {what} scheduled for {post_time.strftime('%Y-%m-%d %H:%M %Z')} in {group}.\n"
+        f"ID: <code>{msg_id}</code>"
+    )
+    log_debug(f"{what} scheduled: {msg_id}")
 
 
 async def cancelmsg_handler(client, message):
@@ -193,14 +148,7 @@ async def cancelmsg_handler(client, message):
         return
 
     msg_id = args[1].strip()
-    job = SCHEDULED_MSGS.get(msg_id)
-
-    if job:
-        try:
-            job.remove()
-        except Exception:
-            pass
-        SCHEDULED_MSGS.pop(msg_id, None)
+    if await asyncio.to_thread(scheduler.cancel, msg_id):
         await message.reply(f"✅ Scheduled message {msg_id} canceled.")
         log_debug(f"Canceled scheduled message: {msg_id}")
     else:
@@ -212,16 +160,20 @@ async def listmsgs_handler(client, message):
         await message.reply("Only the owner can list scheduled messages.")
         return
 
-    if not SCHEDULED_MSGS:
+    jobs = await asyncio.to_thread(scheduler.list_jobs, kind=JOB_KIND, limit=50)
+    if not jobs:
         await message.reply("No scheduled messages.")
         return
 
     lines = ["Scheduled messages:"]
-    for msg_id, job in SCHEDULED_MSGS.items():
-        group = msg_id.split("|", 1)[0]
-        rt = getattr(job, "next_run_time", None)
-        run_time = rt.strftime("%Y-%m-%d %H:%M:%S") if rt else "unknown"
-        lines.append(f"• <b>{group}</b> at <i>{run_time}</i> — <code>{msg_id}</code>")
+    for job in jobs:
+        payload = job.get("payload") or {}
+        rt = job["run_at"]
+        if rt.tzinfo is None:
+            rt = pytz.utc.localize(rt)
+        run_time = rt.astimezone(LOCAL_TZ).strftime("%Y-%m-%d %H:%M %Z")
+        kind = " 🖼" if payload.get("photo") else ""
+        lines.append(f"• <b>{payload.get('group')}</b>{kind} at <i>{run_time}</i> — <code>{job['_id']}</code>")
 
     await message.reply("\n".join(lines))
 
@@ -231,7 +183,7 @@ async def listmsgs_handler(client, message):
 def register(app):
     log_debug("Registering schedulemsg handlers")
 
-    # Normal command handler: /schedulemsg or /sm
+    # Normal command handler: /schedulemsg or /sm (photos carry it in the caption)
     app.add_handler(
         MessageHandler(
             schedulemsg_handler,
@@ -259,6 +211,5 @@ def register(app):
         group=0,
     )
 
-    if not scheduler.running:
-        scheduler.start()
-        log_debug("Scheduler started")
+    scheduler.attach(app)
+    log_debug("Scheduler attached to bot loop")
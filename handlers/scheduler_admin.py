@@ -0,0 +1,86 @@
+# handlers/scheduler_admin.py
+"""
+Owner view of the shared scheduler (utils/scheduler.py).
+
+/jobs [kind]     → pending/recurring jobs with next run, last run, duration, failures
+/runjob <job_id> → run a job right now (recurring jobs keep their schedule)
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from html import escape
+
+from pyrogram import Client, filters
+from pyrogram.types import Message
+
+from utils.scheduler import scheduler, DEFAULT_TZ
+from utils.roles import roles
+
+log = logging.getLogger(__name__)
+
+OWNER_ID = roles.owner_id
+
+try:
+    import pytz
+    _TZ = pytz.timezone(DEFAULT_TZ)
+except Exception:
+    _TZ = timezone.utc
+
+
+def _fmt_dt(dt) -> str:
+    if not isinstance(dt, datetime):
+        return "—"
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(_TZ).strftime("%Y-%m-%d %H:%M %Z")
+
+
+def _fmt_job(doc: dict) -> str:
+    kind = doc.get("kind") or "?"
+    sched = "cron " + ", ".join(f"{k}={v}" for k, v in (doc.get("cron") or {}).items()) if doc.get("cron") else "once"
+    lines = [
+        f"• <code>{escape(str(doc['_id']))}</code> — <b>{escape(kind)}</b> ({escape(sched)})",
+        f"   next: {_fmt_dt(doc.get('run_at'))} · status: {doc.get('status')}",
+    ]
+    if doc.get("last_run_at") or doc.get("last_status"):
+        dur = doc.get("last_duration")
+        dur_s = f"{dur:.2f}s" if isinstance(dur, (int, float)) else "—"
+        lines.append(
+            f"   last: {_fmt_dt(doc.get('last_run_at'))} · {doc.get('last_status') or '—'} · {dur_s}"
+            f" · runs {doc.get('runs', 0)} · failures {doc.get('failures', 0)}"
+        )
+    if doc.get("last_error"):
+        lines.append(f"   error: <i>{escape(str(doc['last_error'])[:200])}</i>")
+    return "\n".join(lines)
+
+
+def register(app: Client):
+    scheduler.attach(app)
+
+    @app.on_message(filters.command("jobs"))
+    async def jobs_cmd(client: Client, m: Message):
+        if not m.from_user or m.from_user.id != OWNER_ID:
+            return
+        kind = m.command[1] if len(m.command) > 1 else None
+        jobs = await asyncio.to_thread(
+            scheduler.list_jobs, kind, 40, ("scheduled", "running")
+        )
+        if not jobs:
+            return await m.reply_text("No scheduled jobs.")
+        text = "<b>Scheduled jobs</b>\n" + "\n".join(_fmt_job(d) for d in jobs)
+        await m.reply_text(text[:4000], disable_web_page_preview=True)
+
+    @app.on_message(filters.command("runjob"))
+    async def runjob_cmd(client: Client, m: Message):
+        if not m.from_user or m.from_user.id != OWNER_ID:
+            return
+        if len(m.command) < 2:
+            return await m.reply_text("Usage: /runjob <job_id>")
+        job_id = m.text.split(maxsplit=1)[1].strip()
+        await m.reply_text(f"▶️ Running <code>{escape(job_id)}</code>…")
+        doc = await scheduler.run_now(job_id)
+        if doc is None:
+            return await m.reply_text("❌ No such job, or it is already running / finished.")
+        await m.reply_text(_fmt_job(doc))
+
+    log.info("✅ handlers.scheduler_admin registered (/jobs, /runjob)")
@@ -0,0 +1,346 @@
+# handlers/stripe_tips.py
+"""
+Stripe tips.
+
+- Checkout Sessions are created off the event loop, on a small dedicated
+  thread pool whose threads keep their pooled HTTP connections to Stripe.
+- The same pending tip (user, model, amount) reuses its Checkout link for
+  STRIPE_SESSION_REUSE_SECONDS instead of creating a new session per retry;
+  the link is dropped as soon as the webhook sees that checkout completed,
+  so the next tip of the same amount gets a fresh session.
+- Completed checkouts come back through POST /stripe/webhook on the bundled
+  HTTP server (utils/http_server.py). The signature is verified, and rows
+  are written to the payments ledger in batches (group commit: the webhook
+  answers once its batch is on disk, so Stripe retries anything we lost).
+
+Not registered in main.py yet: nothing emits panels:tip:<slug> (model panels
+still show "Tip (coming soon)", see handlers/panels.py). To turn tips on,
+point that button at panels:tip:<slug> and add _try_register("stripe_tips").
+
+Deploy: Stripe has to reach the webhook, so run with HTTP_HOST=0.0.0.0 (the
+server binds 127.0.0.1 by default), register https://<your-app>/stripe/webhook
+as the endpoint in the Stripe dashboard, and set METRICS_TOKEN so /metrics
+isn't public (see utils/http_server.py).
+
+ENV:
+  STRIPE_SECRET_KEY, STRIPE_WEBHOOK_SECRET
+  STRIPE_API_BASE               (optional; point at a local stripe-mock for testing)
+  STRIPE_WORKERS                (default 4)
+  STRIPE_TIMEOUT_SECONDS        (default 20)
+  STRIPE_SESSION_REUSE_SECONDS  (default 600)
+  PAYMENTS_BATCH_SECONDS        (default 1.0)
+  PAYMENTS_BATCH_MAX            (default 50)
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import stripe
+from pyrogram import Client, filters
+from pyrogram.types import CallbackQuery, Message
+
+from . import payments
+from .panels import MODEL_CONFIG  # reuse model names/slugs
+from utils import request_context
+from utils.callback_router import route_of
+from utils.http_server import api
+from utils.ttl_cache import LRUCache, TTLSet
+
+log = logging.getLogger("stripe_tips")
+
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "").strip()
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "").strip()
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "").strip()
+
+STRIPE_WORKERS = int(os.getenv("STRIPE_WORKERS", "4"))
+STRIPE_TIMEOUT = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "20"))
+SESSION_REUSE_SECONDS = float(os.getenv("STRIPE_SESSION_REUSE_SECONDS", "600"))
+BATCH_SECONDS = float(os.getenv("PAYMENTS_BATCH_SECONDS", "1.0"))
+BATCH_MAX = int(os.getenv("PAYMENTS_BATCH_MAX", "50"))
+
+# Where Stripe sends the user after paying / cancelling
+TIP_SUCCESS_URL = os.getenv("TIP_SUCCESS_URL", "https://t.me/Succubot_bot")
+TIP_CANCEL_URL  = os.getenv("TIP_CANCEL_URL", "https://t.me/Succubot_bot")
+
+if STRIPE_SECRET_KEY:
+    stripe.api_key = STRIPE_SECRET_KEY
+    stripe.max_network_retries = 2
+    if STRIPE_API_BASE:
+        stripe.api_base = STRIPE_API_BASE
+    try:
+        # requests-based client keeps a pooled session per worker thread
+        stripe.default_http_client = stripe.http_client.RequestsClient(timeout=STRIPE_TIMEOUT)
+    except Exception as e:
+        log.warning("stripe_tips: using default HTTP client (%s)", e)
+else:
+    log.warning("STRIPE_SECRET_KEY is not set; tip checkout will not work.")
+
+_stripe_pool = ThreadPoolExecutor(max_workers=STRIPE_WORKERS, thread_name_prefix="stripe")
+
+# user_id -> model_slug we're waiting for a tip amount for
+_PENDING_TIP: Dict[int, str] = {}
+request_context.register_flow("stripe.tip", _PENDING_TIP.__contains__)
+
+# (user_id, slug, cents) -> (url, created_monotonic)
+_SESSIONS = LRUCache(maxsize=2048)
+_INFLIGHT: Dict[Tuple[int, str, int], asyncio.Future] = {}
+
+
+def _parse_amount(text: str) -> int | None:
+    """
+    Parse something like '25', '$25', '25.50' into cents (int).
+    Returns None if invalid.
+    """
+    t = text.strip().replace("$", "").replace(",", "")
+    if not t:
+        return None
+    try:
+        # support plain integers or 2-decimal floats
+        if "." in t:
+            dollars = float(t)
+            if dollars <= 0:
+                return None
+            cents = int(round(dollars * 100))
+        else:
+            dollars = int(t)
+            if dollars <= 0:
+                return None
+            cents = dollars * 100
+        return cents
+    except Exception:
+        return None
+
+
+# ────────────── Checkout ──────────────
+
+def _create_session(user_id: int, slug: str, name: str, cents: int) -> str:
+    session = stripe.checkout.Session.create(
+        mode="payment",
+        line_items=[
+            {
+                "price_data": {
+                    "currency": "usd",
+                    "product_data": {
+                        "name": f"Tip for {name}",
+                    },
+                    "unit_amount": cents,
+                },
+                "quantity": 1,
+            }
+        ],
+        client_reference_id=str(user_id),
+        metadata={"telegram_id": str(user_id), "model_id": slug, "purchase_type": "tip"},
+        success_url=TIP_SUCCESS_URL,
+        cancel_url=TIP_CANCEL_URL,
+    )
+    return session.url
+
+
+async def checkout_url(user_id: int, slug: str, name: str, cents: int) -> str:
+    """Checkout link for this tip, reusing a recent identical one; never blocks the loop."""
+    key = (user_id, slug, cents)
+    hit = _SESSIONS.get(key)
+    if hit and time.monotonic() - hit[1] < SESSION_REUSE_SECONDS:
+        return hit[0]
+
+    fut = _INFLIGHT.get(key)
+    if fut is not None:
+        return await asyncio.shield(fut)
+
+    loop = asyncio.get_running_loop()
+    fut = loop.run_in_executor(_stripe_pool, _create_session, user_id, slug, name, cents)
+    _INFLIGHT[key] = fut
+    try:
+        url = await fut
+    finally:
+        _INFLIGHT.pop(key, None)
+    _SESSIONS.put(key, (url, time.monotonic()))
+    return url
+
+
+def _forget_session(obj: dict) -> None:
+    """A completed checkout's link must not be handed out again."""
+    meta = obj.get("metadata") or {}
+    uid = meta.get("telegram_id") or obj.get("client_reference_id")
+    if uid and str(uid).isdigit():
+        _SESSIONS.pop((int(uid), meta.get("model_id") or "", int(obj.get("amount_total") or 0)), None)
+
+
+# ────────────── Webhook → ledger (batched) ──────────────
+
+_SEEN_EVENTS = TTLSet(ttl=24 * 3600, maxsize=20_000)
+_batch: List[Tuple[dict, asyncio.Future]] = []
+_batch_task: Optional[asyncio.Task] = None
+
+
+def _row_from_session(obj: dict, event_id: str) -> Optional[dict]:
+    meta = obj.get("metadata") or {}
+    uid = meta.get("telegram_id") or obj.get("client_reference_id")
+    if not uid or obj.get("payment_status") not in ("paid", "no_payment_required"):
+        return None
+    return {
+        "telegram_id": int(uid),
+        "model_id": meta.get("model_id") or "",
+        "purchase_type": meta.get("purchase_type") or "tip",
+        "amount_cents": int(obj.get("amount_total") or 0),
+        "created_at": datetime.fromtimestamp(int(obj.get("created") or time.time()), tz=timezone.utc).replace(tzinfo=None),
+        "source_id": obj.get("id") or event_id,
+    }
+
+
+async def _flush_batch() -> None:
+    global _batch_task
+    await asyncio.sleep(BATCH_SECONDS)
+    while _batch:
+        chunk, _batch[:] = _batch[:BATCH_MAX], _batch[BATCH_MAX:]
+        try:
+            added = await asyncio.to_thread(payments.record_payments, [row for row, _ in chunk])
+            log.info("stripe_tips: wrote %d payment(s) (%d new)", len(chunk), added)
+            for _, f in chunk:
+                if not f.done():
+                    f.set_result(True)
+        except Exception as e:
+            log.exception("stripe_tips: ledger write failed")
+            for _, f in chunk:
+                if not f.done():
+                    f.set_exception(e)
+    _batch_task = None
+
+
+async def _enqueue(row: dict) -> None:
+    """Queue a ledger row and wait until its batch has been written."""
+    global _batch_task
+    fut = asyncio.get_running_loop().create_future()
+    _batch.append((row, fut))
+    if _batch_task is None:
+        _batch_task = asyncio.get_running_loop().create_task(_flush_batch())
+    await fut
+
+
+if api is not None:
+    from fastapi import Request
+    from fastapi.responses import JSONResponse
+
+    @api.post("/stripe/webhook")
+    async def stripe_webhook(request: Request):
+        if not STRIPE_WEBHOOK_SECRET:
+            return JSONResponse({"error": "webhook not configured"}, status_code=503)
+        payload = await request.body()
+        try:
+            event = stripe.Webhook.construct_event(
+                payload, request.headers.get("stripe-signature", ""), STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return JSONResponse({"error": "bad signature"}, status_code=400)
+
+        if event["type"] not in ("checkout.session.completed", "checkout.session.async_payment_succeeded"):
+            return {"ok": True, "ignored": event["type"]}
+        if event["id"] in _SEEN_EVENTS:
+            return {"ok": True, "duplicate": True}
+        _forget_session(event["data"]["object"])
+
+        row = _row_from_session(event["data"]["object"], event["id"])
+        if row is None:
+            return {"ok": True, "pending": True}
+        try:
+            await _enqueue(row)
+        except Exception:
+            # 5xx makes Stripe retry later
+            return JSONResponse({"error": "ledger unavailable"}, status_code=500)
+        _SEEN_EVENTS.seen(event["id"])
+        return {"ok": True}
+
+
+# ────────────── Handlers ──────────────
+
+def _tip_pending(_, __, m: Message) -> bool:
+    return bool(m.from_user and m.from_user.id in _PENDING_TIP)
+
+
+def register(app: Client):
+    log.info("✅ handlers.stripe_tips registered (webhook=%s)", bool(api is not None and STRIPE_WEBHOOK_SECRET))
+
+    # 1) Tip button pressed: panels:tip:<slug>
+    @app.on_callback_query(filters.regex(r"^panels:tip:(.+)$"))
+    async def tip_button_cb(_, cq: CallbackQuery):
+        if not STRIPE_SECRET_KEY:
+            await cq.answer("Stripe is not configured yet. Ask Roni to finish setup 💔", show_alert=True)
+            return
+
+        slug = route_of(cq).tail(2)
+        cfg = MODEL_CONFIG.get(slug)
+        if not cfg:
+            await cq.answer("Unknown model for tipping.", show_alert=True)
+            return
+
+        user_id = cq.from_user.id if cq.from_user else None
+        if user_id is None:
+            await cq.answer()
+            return
+
+        _PENDING_TIP[user_id] = slug
+
+        name = cfg["name"]
+        msg = (
+            f"💸 <b>Tip {name}</b>\n\n"
+            f"Send me the amount you’d like to tip in USD.\n"
+            f"Example: <code>25</code> or <code>25.50</code>\n\n"
+            f"Once you send the amount, I’ll give you a secure Stripe link. 💕"
+        )
+        try:
+            await cq.message.reply_text(msg, disable_web_page_preview=True)
+        except Exception:
+            pass
+        await cq.answer()
+
+    # 2) Collect amount and create Checkout Session
+    #    (only for users in the tip flow, so other private-text handlers still run)
+    @app.on_message(filters.private & filters.text & filters.create(_tip_pending))
+    async def tip_amount_collect(_, m: Message):
+        user_id = m.from_user.id
+        slug = _PENDING_TIP[user_id]
+        cfg = MODEL_CONFIG.get(slug)
+        if not cfg:
+            _PENDING_TIP.pop(user_id, None)
+            await m.reply_text("I lost track of who you were tipping, sorry. Please tap the Tip button again.")
+            return
+
+        cents = _parse_amount(m.text or "")
+        if cents is None:
+            await m.reply_text(
+                "I couldn’t read that amount, sweetheart.\n"
+                "Please send just a number like <code>20</code> or <code>15.50</code>.",
+                disable_web_page_preview=True,
+            )
+            return
+
+        name = cfg["name"]
+
+        if not STRIPE_SECRET_KEY:
+            _PENDING_TIP.pop(user_id, None)
+            await m.reply_text("Stripe isn’t configured yet. Ask Roni to finish setup 💔")
+            return
+
+        try:
+            url = await checkout_url(user_id, slug, name, cents)
+        except Exception as e:
+            log.exception("Error creating Stripe Checkout session: %s", e)
+            _PENDING_TIP.pop(user_id, None)
+            await m.reply_text(
+                "❌ I couldn’t create the payment link right now.\n"
+                "Please try again in a moment or let Roni know.",
+            )
+            return
+
+        _PENDING_TIP.pop(user_id, None)
+
+        text = (
+            f"✨ Here’s your secure tip link for <b>{name}</b>:\n"
+            f"{url}\n\n"
+            f"Thank you for supporting our models, you’re amazing 💖"
+        )
+        await m.reply_text(text, disable_web_page_preview=True)
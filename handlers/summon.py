@@ -1,36 +1,18 @@
 # handlers/summon.py
-import os
 import logging
-from typing import Set, List
+from typing import List
 
 from pyrogram import Client, filters
 from pyrogram.enums import ChatType
 from pyrogram.types import Message
 
-log = logging.getLogger(__name__)
-
-
-def _parse_id_set(val: str | None) -> Set[int]:
-    if not val:
-        return set()
-    out: Set[int] = set()
-    for part in val.replace(" ", "").split(","):
-        if not part:
-            continue
-        try:
-            out.add(int(part))
-        except ValueError:
-            log.warning("summon: bad ID in list: %r", part)
-    return out
-
+from utils.roles import roles
 
-OWNER_ID = int(os.getenv("OWNER_ID", os.getenv("BOT_OWNER_ID", "6964994611")))
-SUPER_ADMINS: Set[int] = _parse_id_set(os.getenv("SUPER_ADMINS"))
-MODELS: Set[int] = _parse_id_set(os.getenv("MODELS"))
+log = logging.getLogger(__name__)
 
 
 def _can_use_summon(user_id: int) -> bool:
-    return user_id == OWNER_ID or user_id in SUPER_ADMINS or user_id in MODELS
+    return roles.is_staff(user_id)
 
 
 def _chunk(items: List[str], size: int) -> List[List[str]]:
@@ -40,9 +22,9 @@ def _chunk(items: List[str], size: int) -> List[List[str]]:
 def register(app: Client) -> None:
     log.info(
         "✅ handlers.summon registered (OWNER_ID=%s SUPER_ADMINS=%s MODELS=%s)",
-        OWNER_ID,
-        len(SUPER_ADMINS),
-        len(MODELS),
+        roles.owner_id,
+        len(roles.table.super_admins),
+        len(roles.table.models),
     )
 
     @app.on_message(filters.command(["summonall", "summon"], prefixes=["/", "!"]))
@@ -1,16 +1,12 @@
 # handlers/test_send.py
 from __future__ import annotations
-import os
 import asyncio
 from typing import Iterable, List, Set
 
 from pyrogram import Client, filters
 from pyrogram.types import Message
 
-# ---- Admins who can use /test ------------------------------------------------
-OWNER_IDS = {int(x) for x in os.getenv("OWNER_IDS", "").replace(" ", "").split(",") if x.isdigit()}
-SUPER_ADMIN_IDS = {int(x) for x in os.getenv("SUPER_ADMIN_IDS", "").replace(" ", "").split(",") if x.isdigit()}
-ADMINS = OWNER_IDS | SUPER_ADMIN_IDS
+from utils.roles import roles
 
 # ---- ReqStore (your project’s data access) -----------------------------------
 try:
@@ -97,7 +93,7 @@ def register(app: Client):
     @app.on_message(filters.private & filters.command(["test"]))
     async def send_test_to_dm_ready_not_qualified(client: Client, m: Message):
         # auth
-        if not m.from_user or m.from_user.id not in ADMINS:
+        if not m.from_user or not roles.is_super_admin(m.from_user.id):  # owner + super admins
             return await m.reply_text("Not authorized.")
 
         if STORE is None:
@@ -2,6 +2,8 @@ import os
 from pyrogram import filters
 from pyrogram.types import Message
 
+from utils.roles import roles
+
 def resolve_group_name(group):
     if group.startswith('-') or group.startswith('@'):
         return group
@@ -11,7 +13,7 @@ def resolve_group_name(group):
     return group
 
 def register(app):
-    @app.on_message(filters.command("warmup") & filters.user(6964994611))  # Only owner can use
+    @app.on_message(filters.command("warmup") & filters.user(roles.owner_id))  # Only owner can use
     async def warmup_handler(client, message: Message):
         args = message.text.split(maxsplit=1)
         if len(args) < 2:
@@ -3,6 +3,7 @@ import logging
 from pymongo import MongoClient
 from pyrogram import filters
 from pyrogram.types import Message
+from utils.roles import roles
 
 logging.basicConfig(level=logging.INFO)
 
@@ -14,7 +15,7 @@ mongo_client = MongoClient(MONGO_URI)
 db = mongo_client["succubot"]
 warnings_collection = db["warnings"]
 
-OWNER_ID = 6964994611
+OWNER_ID = roles.owner_id
 
 def is_admin(chat_member, user_id):
     return user_id == OWNER_ID or (chat_member and chat_member.status in ("administrator", "creator"))
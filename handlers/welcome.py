@@ -3,10 +3,9 @@
 # Also unsets DM-ready when a user leaves / is kicked / banned in Sanctuary groups.
 
 import os
-import time
 import random
 import contextlib
-from typing import Tuple, Dict, Optional, Set
+from typing import Optional, Set
 
 from pyrogram import Client, filters  # <-- this import fixes the NameError
 from pyrogram.types import (
@@ -18,6 +17,10 @@ from pyrogram.types import (
 )
 from pyrogram.enums import ChatType, ChatMemberStatus
 
+from utils.ttl_cache import TTLSet
+from utils.media_registry import registry as _media
+from utils.roles import roles
+
 # ── DM-ready store (JSON-persisted) ───────────────────────────────────────────
 try:
     from utils.dmready_store import DMReadyStore
@@ -32,7 +35,7 @@ except Exception:
             return False
     _dm = _MemDM()
 
-OWNER_ID = int(os.getenv("OWNER_ID", "0") or "0")
+OWNER_ID = roles.owner_id
 
 # Groups where membership matters (comma/space separated IDs)
 # Example: SANCTUARY_GROUP_IDS="-1002823762054, -1001234567890"
@@ -52,9 +55,9 @@ GOODBYE_ENABLE = os.getenv("GOODBYE_ENABLE", "1") == "1"
 WELCOME_DELETE_SERVICE = os.getenv("WELCOME_DELETE_SERVICE", "0") == "1"
 GOODBYE_DELETE_SERVICE = os.getenv("GOODBYE_DELETE_SERVICE", "0") == "1"
 
-# optional media
-WELCOME_PHOTO = os.getenv("WELCOME_PHOTO")  # file_id or URL
-GOODBYE_PHOTO = os.getenv("GOODBYE_PHOTO")  # file_id or URL
+# optional media (URLs/paths are uploaded once, then reused by file_id)
+WELCOME_PHOTO = os.getenv("WELCOME_PHOTO")  # file_id, URL or local path
+GOODBYE_PHOTO = os.getenv("GOODBYE_PHOTO")  # file_id, URL or local path
 
 # Button labels
 BTN_MENU   = os.getenv("BTN_MENU",  "💕 Menus")
@@ -86,21 +89,12 @@ GOODBYE_BANNED = [
 ]
 
 # ── De-dupe (avoid double fires from service + member_updated) ────────────────
-_recent: Dict[Tuple[int, int, str], float] = {}
 DEDUP_WINDOW = 90.0  # seconds
+# time-ordered, so expiry only touches the oldest entries (no full scan per event)
+_recent = TTLSet(DEDUP_WINDOW, maxsize=int(os.getenv("WELCOME_DEDUP_MAX", "50000")))
 
 def _seen(chat_id: int, user_id: int, kind: str) -> bool:
-    now = time.time()
-    key = (chat_id, user_id, kind)
-    last = _recent.get(key, 0.0)
-    if now - last < DEDUP_WINDOW:
-        return True
-    _recent[key] = now
-    # prune stale
-    for k, ts in list(_recent.items()):
-        if now - ts > 5 * DEDUP_WINDOW:
-            _recent.pop(k, None)
-    return False
+    return _recent.seen((chat_id, user_id, kind))
 
 def _mention(user: Optional[User]) -> str:
     if not user:
@@ -122,18 +116,27 @@ def _kb(dm_username: Optional[str]) -> InlineKeyboardMarkup:
     ])
     return InlineKeyboardMarkup(rows)
 
+# Bot identity never changes while running; build the welcome keyboard once.
+_WELCOME_KB: Optional[InlineKeyboardMarkup] = None
+
+async def _welcome_kb(client: Client) -> InlineKeyboardMarkup:
+    global _WELCOME_KB
+    if _WELCOME_KB is None:
+        me = getattr(client, "me", None) or await client.get_me()
+        _WELCOME_KB = _kb(me.username)
+    return _WELCOME_KB
+
 async def _send_welcome(client: Client, chat_id: int, user: Optional[User], reply_to: Optional[int] = None):
     if not WELCOME_ENABLE or (user and user.is_bot):
         return
-    me = await client.get_me()
-    kb = _kb(me.username)
+    kb = await _welcome_kb(client)
     text = random.choice(WELCOME_LINES).format(
         mention=_mention(user),
         first=(user.first_name if user else "there"),
     )
     try:
         if WELCOME_PHOTO:
-            await client.send_photo(chat_id, WELCOME_PHOTO, caption=text, reply_markup=kb)
+            await _media.send_photo(client, chat_id, WELCOME_PHOTO, caption=text, reply_markup=kb)
         else:
             await client.send_message(chat_id, text, reply_markup=kb, reply_to_message_id=reply_to or 0)
     except Exception:
@@ -154,7 +157,7 @@ async def _send_goodbye(client: Client, chat_id: int, user: Optional[User], reas
     )
     try:
         if GOODBYE_PHOTO:
-            await client.send_photo(chat_id, GOODBYE_PHOTO, caption=text)
+            await _media.send_photo(client, chat_id, GOODBYE_PHOTO, caption=text)
         else:
             await client.send_message(chat_id, text)
     except Exception:
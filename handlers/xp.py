@@ -1,9 +1,14 @@
 import os
 import random
+import asyncio
 import logging
-from pymongo import MongoClient
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
 from pyrogram import filters
 from pyrogram.types import Message, User
+from utils.boot import on_shutdown
+from utils.roles import roles
 
 logger = logging.getLogger(__name__)
 
@@ -17,25 +22,176 @@ mongo = MongoClient(MONGO_URI)
 db = mongo[DB_NAME]
 xp_collection = db["xp"]
 
-OWNER_ID = 6964994611
+OWNER_ID = roles.owner_id
 
-def add_xp(chat_id: int, user_id: int, amount: int):
-    xp_collection.update_one(
-        {"chat_id": chat_id, "user_id": user_id},
-        {"$inc": {"xp": amount}},
-        upsert=True
-    )
+# Write-behind: interactions only bump in-memory counters; a background task
+# flushes them with one bulk_write every XP_FLUSH_SECONDS.
+XP_FLUSH_SECONDS = float(os.getenv("XP_FLUSH_SECONDS", "5"))
+XP_TOPK = int(os.getenv("XP_TOPK", "25"))
 
-def get_leaderboard(chat_id: int, limit: int = 10):
-    return list(
+# (chat_id, user_id) -> xp not yet written to Mongo
+_PENDING: Dict[Tuple[int, int], int] = {}
+_flush_task: Optional[asyncio.Task] = None
+_flush_lock = asyncio.Lock()
+_indexes_ready = False
+
+
+class _TopK:
+    """Highest-K persisted XP totals for one chat. XP only grows, so offering
+    every freshly flushed total keeps this exact without rescanning."""
+
+    __slots__ = ("k", "scores")
+
+    def __init__(self, k: int):
+        self.k = k
+        self.scores: Dict[int, int] = {}
+
+    def offer(self, user_id: int, xp: int) -> None:
+        scores = self.scores
+        if user_id in scores or len(scores) < self.k:
+            scores[user_id] = xp
+            return
+        low_uid = min(scores, key=scores.__getitem__)
+        if xp > scores[low_uid]:
+            del scores[low_uid]
+            scores[user_id] = xp
+
+    def ranked(self, chat_id: int, limit: int) -> List[dict]:
+        rows = [
+            {"chat_id": chat_id, "user_id": uid, "xp": xp + _PENDING.get((chat_id, uid), 0)}
+            for uid, xp in self.scores.items()
+        ]
+        rows.sort(key=lambda d: d["xp"], reverse=True)
+        return rows[:limit]
+
+
+# chat_id -> leaderboard (only chats we've loaded this process)
+_BOARDS: Dict[int, _TopK] = {}
+
+
+def _ensure_indexes() -> None:
+    global _indexes_ready
+    if _indexes_ready:
+        return
+    xp_collection.create_index([("chat_id", ASCENDING), ("xp", DESCENDING)])
+    xp_collection.create_index([("chat_id", ASCENDING), ("user_id", ASCENDING)])
+    _indexes_ready = True
+
+
+def _load_board(chat_id: int) -> _TopK:
+    board = _TopK(XP_TOPK)
+    cur = (
         xp_collection
-        .find({"chat_id": chat_id})
+        .find({"chat_id": chat_id}, {"user_id": 1, "xp": 1, "_id": 0})
         .sort("xp", -1)
-        .limit(limit)
+        .limit(XP_TOPK)
     )
+    for d in cur:
+        board.offer(int(d["user_id"]), int(d.get("xp", 0)))
+    return board
+
+
+def _fetch_totals(by_chat: Dict[int, List[int]]) -> Dict[int, List[dict]]:
+    out: Dict[int, List[dict]] = {}
+    for chat_id, uids in by_chat.items():
+        out[chat_id] = list(xp_collection.find(
+            {"chat_id": chat_id, "user_id": {"$in": uids}},
+            {"user_id": 1, "xp": 1, "_id": 0},
+        ))
+    return out
+
 
-def reset_xp(chat_id: int):
-    xp_collection.delete_many({"chat_id": chat_id})
+@on_shutdown("xp.flush")
+async def flush_xp() -> int:
+    """Write pending increments in one bulk_write and refresh loaded boards (also on shutdown)."""
+    async with _flush_lock:
+        if not _PENDING:
+            return 0
+        batch = dict(_PENDING)
+        _PENDING.clear()
+        ops = [
+            UpdateOne({"chat_id": c, "user_id": u}, {"$inc": {"xp": amt}}, upsert=True)
+            for (c, u), amt in batch.items()
+        ]
+        try:
+            await asyncio.to_thread(xp_collection.bulk_write, ops, ordered=False)
+        except Exception as e:
+            logger.warning(f"xp: flush of {len(ops)} counters failed, will retry: {e}")
+            for key, amt in batch.items():
+                _PENDING[key] = _PENDING.get(key, 0) + amt
+            return 0
+
+        by_chat: Dict[int, List[int]] = {}
+        for c, u in batch:
+            if c in _BOARDS:
+                by_chat.setdefault(c, []).append(u)
+        if by_chat:
+            try:
+                totals = await asyncio.to_thread(_fetch_totals, by_chat)
+            except Exception as e:
+                logger.warning(f"xp: failed refreshing leaderboards: {e}")
+                for c in by_chat:
+                    _BOARDS.pop(c, None)  # reload lazily next read
+            else:
+                for c, docs in totals.items():
+                    board = _BOARDS.get(c)
+                    if board is None:
+                        continue
+                    for d in docs:
+                        board.offer(int(d["user_id"]), int(d.get("xp", 0)))
+        return len(ops)
+
+
+async def _flush_loop() -> None:
+    try:
+        await asyncio.to_thread(_ensure_indexes)
+    except Exception as e:
+        logger.warning(f"xp: index creation failed: {e}")
+    while True:
+        await asyncio.sleep(XP_FLUSH_SECONDS)
+        await flush_xp()
+
+
+def _ensure_flusher() -> None:
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        return
+    try:
+        _flush_task = asyncio.get_running_loop().create_task(_flush_loop())
+    except RuntimeError:
+        _flush_task = None
+
+
+def add_xp(chat_id: int, user_id: int, amount: int):
+    key = (chat_id, user_id)
+    _PENDING[key] = _PENDING.get(key, 0) + amount
+    _ensure_flusher()
+
+
+def get_leaderboard(chat_id: int, limit: int = 10):
+    board = _BOARDS.get(chat_id)
+    if board is None:
+        board = _BOARDS[chat_id] = _load_board(chat_id)
+    return board.ranked(chat_id, limit)
+
+
+async def get_leaderboard_async(chat_id: int, limit: int = 10):
+    """Same as get_leaderboard, but loads a cold board off the event loop."""
+    board = _BOARDS.get(chat_id)
+    if board is None:
+        board = await asyncio.to_thread(_load_board, chat_id)
+        board = _BOARDS.setdefault(chat_id, board)
+    return board.ranked(chat_id, limit)
+
+
+async def reset_xp(chat_id: int):
+    """Wipe a chat's XP. Holds _flush_lock so an in-flight flush (or its
+    retry re-queue) can't write the old counters back after the delete."""
+    async with _flush_lock:
+        for key in [k for k in _PENDING if k[0] == chat_id]:
+            _PENDING.pop(key, None)
+        await asyncio.to_thread(xp_collection.delete_many, {"chat_id": chat_id})
+        _BOARDS[chat_id] = _TopK(XP_TOPK)
 
 def is_admin(member):
     return member and member.status in ("administrator", "creator")
@@ -52,19 +208,20 @@ def register(app):
 
     @app.on_message(filters.command("naughtystats") & filters.group)
     async def naughtystats(client, message: Message):
-        board = get_leaderboard(message.chat.id)
+        board = await get_leaderboard_async(message.chat.id)
         if not board:
             return await message.reply_text("No XP recorded yet.")
+        mentions: Dict[int, str] = {}
+        try:
+            users: List[User] = await client.get_users([doc["user_id"] for doc in board])
+            mentions = {u.id: u.mention for u in users}
+        except Exception as e:
+            logger.warning(f"Could not fetch leaderboard users: {e}")
         lines = ["📊 Naughty XP Stats:"]
         for i, doc in enumerate(board, start=1):
             uid = doc["user_id"]
             xp = doc["xp"]
-            try:
-                user: User = await client.get_users(uid)
-                mention = user.mention
-            except Exception as e:
-                logger.warning(f"Could not fetch user {uid}: {e}")
-                mention = f"<code>{uid}</code>"
+            mention = mentions.get(uid) or f"<code>{uid}</code>"
             lines.append(f"{i}. {mention} — {xp} XP")
         await message.reply_text(
             "\n".join(lines),
@@ -77,5 +234,5 @@ def register(app):
         member = await client.get_chat_member(message.chat.id, message.from_user.id)
         if message.from_user.id != OWNER_ID and not is_admin(member):
             return await message.reply_text("❌ Only admins can reset XP.")
-        reset_xp(message.chat.id)
+        await reset_xp(message.chat.id)
         await message.reply_text("✅ XP leaderboard has been reset.")
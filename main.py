@@ -4,12 +4,24 @@
 # - Keeps the bot running as long as core credentials are present.
 
 import os
+import time
 import logging
-from typing import Set, Optional
 
-from pyrogram import Client
+# first: hooks Mongo command monitoring before any MongoClient is created
+from utils import metrics
+
+from pyrogram import Client, idle
 from pyrogram.enums import ParseMode
 
+from utils import boot
+from utils import callback_router
+from utils import http_server
+from utils import loop_watchdog
+from utils import request_context
+from utils import roles
+from utils import update_recorder
+from utils import user_profiles
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
@@ -24,24 +36,6 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 if not API_ID or not API_HASH or not BOT_TOKEN:
     raise ValueError("Missing API_ID / API_HASH / BOT_TOKEN")
 
-OWNER_ID = int(os.getenv("OWNER_ID", os.getenv("BOT_OWNER_ID", "6964994611")))
-
-def _parse_id_list(val: Optional[str]) -> Set[int]:
-    if not val:
-        return set()
-    out: Set[int] = set()
-    for part in val.replace(" ", "").split(","):
-        if not part:
-            continue
-        try:
-            out.add(int(part))
-        except ValueError:
-            log.warning("main: bad ID in list: %r", part)
-    return out
-
-SUPER_ADMINS: Set[int] = _parse_id_list(os.getenv("SUPER_ADMINS"))
-MODELS: Set[int] = _parse_id_list(os.getenv("MODELS"))
-
 app = Client(
     "SuccuBot",
     api_id=API_ID,
@@ -56,15 +50,37 @@ def _try_register(module_path: str):
     NEVER raises — logs exceptions instead, so one broken handler won't crash the worker.
     """
     mod_name = f"handlers.{module_path}"
+    t0 = time.perf_counter()
+    t_import = t_register = 0.0
     try:
         mod = __import__(mod_name, fromlist=["register"])
+        t_import = time.perf_counter() - t0
         if hasattr(mod, "register"):
             mod.register(app)
             log.info("✅ Registered %s", mod_name)
         else:
             log.warning("⚠️ %s has no register()", mod_name)
+        t_register = time.perf_counter() - t0 - t_import
+        boot.record_module(mod_name, t_import, t_register, True)
     except Exception as e:
         log.exception("❌ FAILED registering %s: %s", mod_name, e)
+        if not t_import:
+            t_import = time.perf_counter() - t0
+        boot.record_module(mod_name, t_import, time.perf_counter() - t0 - t_import, False, str(e))
+
+async def _serve():
+    """Phase 2: start the client, then run deferred init hooks concurrently."""
+    await app.start()
+    http_server.start(app)
+    roles.roles.attach(app)
+    user_profiles.profiles.attach(app)
+    loop_watchdog.start(app)
+    log.info("Callback router: %d button handler(s) indexed", len(callback_router.router))
+    await boot.run_init_hooks()
+    await idle()
+    user_profiles.profiles.flush()
+    await boot.run_shutdown_hooks()
+    await app.stop()
 
 def main():
     log.info("💋 Starting SuccuBot (safe boot)…")
@@ -74,10 +90,28 @@ def main():
     except Exception:
         pass
 
-    log.info("IDs loaded: OWNER_ID=%s SUPER_ADMINS=%s MODELS=%s", OWNER_ID, SUPER_ADMINS, MODELS)
+    # env roles only; Mongo grants are merged by the roles.grants init hook
+    table = roles.roles.table
+    log.info("IDs loaded: OWNER_ID=%s SUPER_ADMINS=%s MODELS=%s",
+             table.owner_id, sorted(table.super_admins), sorted(table.models))
+
+    # Opt-in traffic capture for offline replay (UPDATE_RECORD_PATH); sees raw updates
+    update_recorder.install(app)
+    # Load each private sender's profile once per update, shared by every handler group
+    request_context.install(app)
+    # Drop cached chat-admin status when a member is promoted/demoted
+    roles.install(app)
+    # Names/usernames of everyone the bot sees, so lists and reminders skip get_users
+    user_profiles.install(app)
+    # One trie-indexed router for all regex callback buttons (must precede registration)
+    callback_router.install(app)
+    # Time every handler (routed buttons included)
+    metrics.install(app)
 
     # Register EVERYTHING non-fatally (prevents Render restart-loop)
     _try_register("health")
+    _try_register("profiler")
+    _try_register("roles_admin")
     _try_register("panels")
 
     # Warmup /hi
@@ -109,34 +143,19 @@ def main():
     _try_register("fun")
 
     _try_register("schedulemsg")
+    _try_register("scheduler_admin")
 
     _try_register("flyer")
     _try_register("flyer_scheduler")
 
     _try_register("requirements_panel")
+    _try_register("member_search")
     _try_register("requirements_messages")
     _try_register("kick_requirements")
 
-    # Pass loop into schedulers if present (non-fatal)
-    try:
-        from handlers import flyer_scheduler as _fs
-        if hasattr(_fs, "set_main_loop"):
-            _fs.set_main_loop(app.loop)
-            log.info("✅ Set main loop for flyer_scheduler")
-    except Exception:
-        log.exception("Could not set main loop for flyer_scheduler")
-
-    try:
-        from handlers import schedulemsg as _sm
-        if hasattr(_sm, "set_main_loop"):
-            _sm.set_main_loop(app.loop)
-            log.info("✅ Set main loop for schedulemsg")
-    except Exception:
-        log.exception("Could not set main loop for schedulemsg")
-
-    # Run the bot
+    # Run the bot (phase 2 init hooks run right after app.start)
     try:
-        app.run()
+        app.run(_serve())
     except Exception as e:
         log.exception("❌ Bot crashed during app.run(): %s", e)
         raise
@@ -9,6 +9,8 @@ import time
 from dataclasses import dataclass, asdict, field
 from typing import Dict, List, Optional, Tuple
 
+from utils.boot import add_init_hook
+
 # ---------- Optional Mongo backend for DM-ready ----------
 _MONGO_URI = os.getenv("MONGO_URI") or os.getenv("MONGO_URL")
 _MONGO_DB  = os.getenv("MONGO_DB_NAME", "succubot")
@@ -18,13 +20,25 @@ _mongo_col = None
 if _MONGO_URI:
     try:
         from pymongo import MongoClient
-        _client = MongoClient(_MONGO_URI)
+        _client = MongoClient(_MONGO_URI)  # lazy: no round-trip until first use
         _db = _client[_MONGO_DB]
         _mongo_col = _db[_MONGO_COL]
+    except Exception:
+        _mongo_col = None  # any error -> fall back to JSON for DM-ready
+
+def _ensure_indexes():
+    # deferred to boot phase 2; if Mongo can't even build indexes, use JSON for DM-ready
+    global _mongo_col
+    if _mongo_col is None:
+        return
+    try:
         _mongo_col.create_index("user_id", unique=True, name="uniq_user_id")
         _mongo_col.create_index("since", name="idx_since")
     except Exception:
-        _mongo_col = None  # any error -> fall back to JSON for DM-ready
+        _mongo_col = None
+        raise
+
+add_init_hook("req_store.indexes", _ensure_indexes)
 
 # ---------- JSON file (existing behavior) ----------
 DEFAULT_PATH = os.getenv("REQ_STORE_PATH", "data/req_store.json")
@@ -1,33 +1,22 @@
 # utils/admin_check.py
-# Back-compat admin helpers + decorator.
+# Back-compat admin helpers + decorator (role data lives in utils.roles).
 
-import os
-from typing import Set, Callable, Awaitable, Union
+from typing import Callable, Awaitable, Union
 from pyrogram import Client
 from pyrogram.types import User, Message
 
-def _ids(env: str) -> Set[int]:
-    raw = os.getenv(env, "") or ""
-    s: Set[int] = set()
-    for tok in raw.replace(";", ",").split(","):
-        tok = tok.strip()
-        if not tok: continue
-        try: s.add(int(tok))
-        except: pass
-    return s
+from utils.roles import roles
 
-OWNER_ID = int(os.getenv("OWNER_ID", "0") or "0")
-SUPER_ADMINS = _ids("SUPER_ADMINS")
-ADMINS = _ids("ADMINS")
+OWNER_ID = roles.owner_id
 
 def is_owner_id(user_id: int) -> bool:
-    return OWNER_ID and user_id == OWNER_ID
+    return roles.is_owner(user_id)
 
 def is_super_admin_id(user_id: int) -> bool:
-    return user_id in SUPER_ADMINS or is_owner_id(user_id)
+    return roles.is_super_admin(user_id)
 
 def is_admin_id(user_id: int) -> bool:
-    return user_id in ADMINS or is_super_admin_id(user_id)
+    return roles.is_admin(user_id)
 
 # Back-compat names used across various handlers
 def is_owner_or_admin_id(user_id: int) -> bool:
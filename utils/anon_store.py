@@ -0,0 +1,185 @@
+# utils/anon_store.py
+"""
+Persistent state for contact_admins' anonymous threads.
+
+- anon_threads:   thread_id -> real user_id, expired by a Mongo TTL index
+- anon_state:     who is composing an anon / which thread the owner is replying to
+- anon_counters:  atomic counter so thread ids never repeat across restarts
+
+Active threads are kept in a bounded LRU in front of Mongo, and the small
+compose/reply state is mirrored in memory so the private-message router never
+touches the database. Without Mongo everything stays in memory (and thread
+ids are seeded from the clock so restarts still don't reuse them).
+
+Env:
+  MONGO_URI / MONGO_URL, MONGO_DB_NAME   (default "succubot")
+  ANON_THREAD_TTL_DAYS                   (default 30)
+  ANON_STATE_TTL_HOURS                   (default 24)
+  ANON_THREAD_CACHE                      (default 512 threads in memory)
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+from utils.boot import on_init
+from utils.ttl_cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+_MONGO_URI = os.getenv("MONGO_URI") or os.getenv("MONGO_URL")
+_MONGO_DB = os.getenv("MONGO_DB_NAME", "succubot")
+
+THREAD_TTL = timedelta(days=float(os.getenv("ANON_THREAD_TTL_DAYS", "30")))
+STATE_TTL = timedelta(hours=float(os.getenv("ANON_STATE_TTL_HOURS", "24")))
+THREAD_CACHE = int(os.getenv("ANON_THREAD_CACHE", "512"))
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class AnonThreadStore:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._threads = LRUCache(THREAD_CACHE)          # thread_id -> user_id
+        self._pending: Set[int] = set()                 # users composing an anon
+        self._reply_target: Dict[int, int] = {}         # owner_id -> thread_id
+        self._fallback_counter = int(time.time() * 1000)
+        self._threads_col = self._state_col = self._counters_col = None
+
+        if _MONGO_URI:
+            try:
+                from pymongo import MongoClient
+
+                db = MongoClient(_MONGO_URI)[_MONGO_DB]
+                self._threads_col = db["anon_threads"]
+                self._state_col = db["anon_state"]
+                self._counters_col = db["anon_counters"]
+            except Exception as e:
+                log.warning("AnonThreadStore: Mongo unavailable, keeping threads in memory: %s", e)
+                self._threads_col = self._state_col = self._counters_col = None
+
+    def load(self) -> None:
+        """Indexes + persisted compose/reply state (boot phase 2; see utils/boot.py)."""
+        if self._threads_col is None:
+            return
+        from pymongo import ASCENDING
+
+        try:
+            self._threads_col.create_index([("thread_id", ASCENDING)], unique=True)
+            self._threads_col.create_index("expires_at", expireAfterSeconds=0)
+            self._state_col.create_index("expires_at", expireAfterSeconds=0)
+            self._load_state()
+        except Exception as e:
+            log.warning("AnonThreadStore: Mongo unavailable, keeping threads in memory: %s", e)
+            self._threads_col = self._state_col = self._counters_col = None
+
+    def uses_mongo(self) -> bool:
+        return self._threads_col is not None
+
+    # ---------- threads ----------
+
+    def _next_id(self) -> int:
+        if self._counters_col is not None:
+            from pymongo import ReturnDocument
+
+            doc = self._counters_col.find_one_and_update(
+                {"_id": "anon_thread"},
+                {"$inc": {"seq": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return int(doc["seq"])
+        with self._lock:
+            self._fallback_counter += 1
+            return self._fallback_counter
+
+    def new_thread(self, user_id: int) -> int:
+        thread_id = self._next_id()
+        if self._threads_col is not None:
+            now = _now()
+            self._threads_col.insert_one({
+                "thread_id": thread_id,
+                "user_id": user_id,
+                "created_at": now,
+                "expires_at": now + THREAD_TTL,
+            })
+        with self._lock:
+            self._threads.put(thread_id, user_id)
+        return thread_id
+
+    def thread_user(self, thread_id: int) -> Optional[int]:
+        with self._lock:
+            uid = self._threads.get(thread_id)
+        if uid is not None or self._threads_col is None:
+            return uid
+        doc = self._threads_col.find_one({"thread_id": thread_id}, {"user_id": 1, "_id": 0})
+        if not doc:
+            return None
+        uid = int(doc["user_id"])
+        with self._lock:
+            self._threads.put(thread_id, uid)
+        return uid
+
+    # ---------- compose / reply state ----------
+
+    def _load_state(self) -> None:
+        for d in self._state_col.find({"expires_at": {"$gt": _now()}}):
+            uid = int(d["user_id"])
+            with self._lock:
+                if d.get("mode") == "compose":
+                    self._pending.add(uid)
+                elif d.get("mode") == "reply" and d.get("thread_id") is not None:
+                    self._reply_target.setdefault(uid, int(d["thread_id"]))
+
+    def _persist_state(self, user_id: int, mode: Optional[str], thread_id: Optional[int] = None) -> None:
+        if self._state_col is None:
+            return
+        try:
+            if mode is None:
+                self._state_col.delete_one({"user_id": user_id})
+            else:
+                self._state_col.update_one(
+                    {"user_id": user_id},
+                    {"$set": {"user_id": user_id, "mode": mode, "thread_id": thread_id,
+                              "expires_at": _now() + STATE_TTL}},
+                    upsert=True,
+                )
+        except Exception as e:
+            log.warning("AnonThreadStore: failed to persist state for %s: %s", user_id, e)
+
+    def is_pending(self, user_id: int) -> bool:
+        return user_id in self._pending
+
+    def set_pending(self, user_id: int, pending: bool) -> None:
+        with self._lock:
+            if pending:
+                self._pending.add(user_id)
+            elif user_id in self._pending:
+                self._pending.discard(user_id)
+            else:
+                return
+        self._persist_state(user_id, "compose" if pending else None)
+
+    def reply_target(self, owner_id: int) -> Optional[int]:
+        return self._reply_target.get(owner_id)
+
+    def set_reply_target(self, owner_id: int, thread_id: Optional[int]) -> None:
+        with self._lock:
+            if thread_id is None:
+                if self._reply_target.pop(owner_id, None) is None:
+                    return
+            else:
+                self._reply_target[owner_id] = thread_id
+        self._persist_state(owner_id, "reply" if thread_id is not None else None, thread_id)
+
+
+anon_store = AnonThreadStore()
+
+
+@on_init("anon_store.load")
+def _load():
+    anon_store.load()
@@ -0,0 +1,154 @@
+# utils/boot.py
+"""
+Two-phase boot.
+
+Phase 1 (before app.start): main._try_register imports each handler module
+and calls register(app). This must stay cheap — no index builds, pings or
+cache preloads at import time.
+
+Phase 2 (right after app.start): every init hook registered with @on_init
+runs concurrently (sync hooks in worker threads), each bounded by
+BOOT_INIT_TIMEOUT_SECONDS, so cold start costs the slowest dependency rather
+than the sum of all of them.
+
+Per-module import/register times and per-hook init times are logged and
+kept in `timings()` (shown by the owner /boot command).
+
+Shutdown: hooks registered with @on_shutdown run after idle() returns and
+before app.stop(), so write-behind buffers are flushed instead of lost.
+
+Usage:
+    from utils.boot import on_init
+
+    @on_init("req_store.indexes")
+    def _ensure_indexes():
+        col.create_index("user_id", unique=True)
+
+    @on_shutdown("xp.flush")
+    async def _flush():
+        await flush_xp()
+"""
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+INIT_TIMEOUT = float(os.getenv("BOOT_INIT_TIMEOUT_SECONDS", "30"))
+
+_hooks: List[Tuple[str, Callable[[], Any]]] = []
+_shutdown_hooks: List[Tuple[str, Callable[[], Any]]] = []
+_modules: Dict[str, Dict[str, Any]] = {}   # module -> {import_s, register_s, ok}
+_inits: Dict[str, Dict[str, Any]] = {}     # hook -> {seconds, status, error}
+_phase2: Dict[str, Optional[float]] = {"started_at": None, "seconds": None}
+_t0 = time.perf_counter()
+
+
+def on_init(name: str):
+    """Decorator: run fn() (sync or async) in phase 2."""
+    def deco(fn: Callable[[], Any]):
+        add_init_hook(name, fn)
+        return fn
+    return deco
+
+
+def on_shutdown(name: str):
+    """Decorator: run fn() (sync or async) on shutdown, before app.stop()."""
+    def deco(fn: Callable[[], Any]):
+        _shutdown_hooks.append((name, fn))
+        return fn
+    return deco
+
+
+def add_init_hook(name: str, fn: Callable[[], Any]) -> None:
+    _hooks.append((name, fn))
+    if _phase2["started_at"] is not None:
+        # registered after phase 2 started (late import): run it right away
+        try:
+            asyncio.get_running_loop().create_task(_run_hook(name, fn))
+        except RuntimeError:
+            log.warning("boot: init hook %s registered too late and no loop is running", name)
+
+
+def record_module(module: str, import_s: float, register_s: float, ok: bool, error: str = "") -> None:
+    _modules[module] = {"import_s": import_s, "register_s": register_s, "ok": ok, "error": error}
+    log.info("boot: %-45s import %6.3fs  register %6.3fs%s",
+             module, import_s, register_s, "" if ok else "  FAILED")
+
+
+async def _run_hook(name: str, fn: Callable[[], Any]) -> None:
+    t0 = time.perf_counter()
+    status, error = "ok", ""
+    try:
+        if inspect.iscoroutinefunction(fn):
+            await asyncio.wait_for(fn(), timeout=INIT_TIMEOUT)
+        else:
+            await asyncio.wait_for(asyncio.to_thread(fn), timeout=INIT_TIMEOUT)
+    except asyncio.TimeoutError:
+        status, error = "timeout", f">{INIT_TIMEOUT:.0f}s"
+        log.warning("boot: init hook %s timed out after %.0fs", name, INIT_TIMEOUT)
+    except Exception as e:
+        status, error = "failed", f"{type(e).__name__}: {e}"
+        log.exception("boot: init hook %s failed", name)
+    dt = time.perf_counter() - t0
+    _inits[name] = {"seconds": dt, "status": status, "error": error}
+    log.info("boot: init %-40s %6.3fs %s", name, dt, status)
+
+
+async def run_init_hooks() -> None:
+    """Phase 2: run every registered init hook concurrently."""
+    _phase2["started_at"] = time.perf_counter() - _t0
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_run_hook(n, fn) for n, fn in list(_hooks)))
+    _phase2["seconds"] = time.perf_counter() - t0
+    log.info("boot: phase 2 finished %d init hook(s) in %.3fs (%.3fs since process start)",
+             len(_hooks), _phase2["seconds"], time.perf_counter() - _t0)
+
+
+async def run_shutdown_hooks() -> None:
+    """Run every shutdown hook concurrently, each bounded by BOOT_INIT_TIMEOUT_SECONDS."""
+
+    async def _one(name: str, fn: Callable[[], Any]) -> None:
+        t0 = time.perf_counter()
+        try:
+            if inspect.iscoroutinefunction(fn):
+                await asyncio.wait_for(fn(), timeout=INIT_TIMEOUT)
+            else:
+                await asyncio.wait_for(asyncio.to_thread(fn), timeout=INIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            log.warning("boot: shutdown hook %s timed out after %.0fs", name, INIT_TIMEOUT)
+            return
+        except Exception:
+            log.exception("boot: shutdown hook %s failed", name)
+            return
+        log.info("boot: shutdown %-36s %6.3fs", name, time.perf_counter() - t0)
+
+    await asyncio.gather(*(_one(n, fn) for n, fn in list(_shutdown_hooks)))
+
+
+def timings() -> Dict[str, Any]:
+    return {
+        "modules": dict(_modules),
+        "inits": dict(_inits),
+        "phase2_started_at": _phase2["started_at"],
+        "phase2_seconds": _phase2["seconds"],
+    }
+
+
+def format_report(top: int = 10) -> str:
+    mods = sorted(_modules.items(), key=lambda kv: kv[1]["import_s"] + kv[1]["register_s"], reverse=True)
+    inits = sorted(_inits.items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+    phase1 = sum(v["import_s"] + v["register_s"] for v in _modules.values())
+    lines = [f"<b>Boot</b> — phase 1: {phase1:.2f}s over {len(_modules)} module(s)"]
+    for name, v in mods[:top]:
+        flag = "" if v["ok"] else " ❌"
+        lines.append(f"• <code>{name}</code> import {v['import_s']:.3f}s / register {v['register_s']:.3f}s{flag}")
+    p2 = _phase2["seconds"]
+    lines.append(f"\nphase 2: {'running' if p2 is None else f'{p2:.2f}s'} over {len(_hooks)} hook(s)")
+    for name, v in inits[:top]:
+        flag = "" if v["status"] == "ok" else f" ⚠️ {v['status']} {v['error']}"
+        lines.append(f"• <code>{name}</code> {v['seconds']:.3f}s{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,290 @@
+# utils/callback_router.py
+"""
+Central router for callback-query buttons.
+
+Every handler registered as `@app.on_callback_query(filters.regex(...))`
+used to be its own dispatcher entry, so each button press ran dozens of
+regex filters. install(app) intercepts those registrations and indexes them
+in a character trie keyed by the literal prefix of the pattern
+("reqpanel:spend_delta:", "sanctu:blacklist:", …). A press:
+
+  1. parses callback_data once into `cq.route` (prefix, action, typed args;
+     handlers read it with route_of(cq) instead of splitting cq.data again),
+  2. walks the trie along the data, collecting only handlers whose literal
+     prefix matches, and tests just those patterns in registration order,
+  3. runs exactly one handler per group (same rule as pyrogram's dispatcher),
+     with `cq.matches` filled in as filters.regex would,
+  4. answers the query once if the handler didn't, and marks it answered so
+     health's safety net doesn't answer it a second time.
+
+CallbackQueryHandlers with any other filter (e.g. `regex & user`) added to
+the router's own group would be shadowed by its catch-all entry there, so
+they are routed too and checked on every press. In other groups they are
+left to the normal dispatcher.
+"""
+import asyncio
+import inspect
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyrogram import ContinuePropagation, StopPropagation
+from pyrogram.handlers import CallbackQueryHandler
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+_META = set(".^$*+?{}[]\\|()")
+_QUANT = set("*+?{")
+
+
+def literal_prefix(pattern: str) -> str:
+    """
+    Longest literal string every match of an anchored pattern must start with.
+    Unanchored or top-level-alternation patterns get "" (checked for every press).
+    """
+    if not pattern.startswith("^"):
+        return ""
+    depth, i = 0, 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            return ""
+        i += 1
+    out = []
+    body = pattern[1:]
+    for i, ch in enumerate(body):
+        if ch in _META:
+            # a quantifier applies to the previous literal char, so drop it
+            if ch in _QUANT and out:
+                out.pop()
+            break
+        out.append(ch)
+    return "".join(out)
+
+
+def _coerce(tok: str):
+    if tok.lstrip("-").isdigit():
+        try:
+            return int(tok)
+        except ValueError:
+            pass
+    return tok
+
+
+@dataclass(frozen=True)
+class CallbackRoute:
+    """callback_data split once: 'reqpanel:spend_delta:123:-5' → prefix, action, (123, -5)."""
+    data: str
+    prefix: str
+    action: str
+    args: Tuple[Any, ...]
+    parts: Tuple[str, ...]
+
+    @classmethod
+    def parse(cls, data: str) -> "CallbackRoute":
+        parts = data.split(":")
+        return cls(
+            data=data,
+            prefix=parts[0],
+            action=parts[1] if len(parts) > 1 else "",
+            args=tuple(_coerce(p) for p in parts[2:]),
+            parts=tuple(parts),
+        )
+
+    def tail(self, i: int) -> str:
+        """Raw text from part i on, ':' kept: free-form names, HH:MM times, digit-only slugs."""
+        return ":".join(self.parts[i:])
+
+
+def route_of(cq) -> CallbackRoute:
+    """The query's parsed callback_data; parsed here if it didn't come through the router."""
+    route = getattr(cq, "route", None)
+    if route is None:
+        route = cq.route = CallbackRoute.parse(cq.data or "")
+    return route
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.entries: List["_Entry"] = []
+
+
+class _Entry:
+    __slots__ = ("seq", "group", "pattern", "prefix", "callback", "handler")
+
+    def __init__(self, seq: int, group: int, pattern, prefix: str, callback, handler):
+        self.seq = seq
+        self.group = group
+        self.pattern = pattern
+        self.prefix = prefix
+        self.callback = callback
+        self.handler = handler
+
+
+def mark_answered(cq) -> None:
+    cq._succu_answered = True
+
+
+def was_answered(cq) -> bool:
+    return bool(getattr(cq, "_succu_answered", False))
+
+
+class CallbackRouter:
+    def __init__(self):
+        self._root = _Node()
+        self._seq = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, pattern, callback: Callable, group: int = 0, handler=None) -> None:
+        """Index a handler; pattern None means "run handler.check on every press"."""
+        node = self._root
+        if pattern is None or pattern.flags & re.IGNORECASE:
+            prefix = ""
+        else:
+            prefix = literal_prefix(pattern.pattern)
+        for ch in prefix:
+            node = node.children.setdefault(ch, _Node())
+        self._seq += 1
+        self._count += 1
+        node.entries.append(_Entry(self._seq, group, pattern, prefix, callback, handler))
+
+    def remove(self, handler, group: int) -> bool:
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for e in node.entries:
+                if e.handler is handler and e.group == group:
+                    node.entries.remove(e)
+                    self._count -= 1
+                    return True
+            stack.extend(node.children.values())
+        return False
+
+    def candidates(self, data: str) -> List[_Entry]:
+        node, found = self._root, list(self._root.entries)
+        for ch in data:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            found.extend(node.entries)
+        found.sort(key=lambda e: (e.group, e.seq))
+        return found
+
+    async def dispatch(self, client, cq) -> None:
+        data = cq.data
+        if not isinstance(data, str):
+            return
+        cq.route = CallbackRoute.parse(data)
+
+        # track answers made by the handler itself
+        original_answer = cq.answer
+
+        async def answer(*args, **kwargs):
+            mark_answered(cq)
+            return await original_answer(*args, **kwargs)
+
+        cq.answer = answer
+
+        # metrics label: the matched handler's literal prefix, never raw
+        # client-sent data (that would mint a histogram per crafted press)
+        label = "unmatched"
+        t0, failed = time.perf_counter(), False
+        try:
+            done_group: Optional[int] = None
+            for entry in self.candidates(data):
+                if entry.group == done_group:
+                    continue
+                if entry.pattern is None:
+                    try:
+                        if not await entry.handler.check(client, cq):
+                            continue
+                    except Exception:
+                        log.exception("callback filter failed in %s", getattr(entry.callback, "__qualname__", entry.callback))
+                        continue
+                    if label == "unmatched":
+                        label = metrics.handler_name(entry.callback)
+                else:
+                    matches = list(entry.pattern.finditer(data))
+                    if not matches:
+                        continue
+                    cq.matches = matches
+                    if label == "unmatched":
+                        label = entry.prefix or entry.pattern.pattern
+                try:
+                    if inspect.iscoroutinefunction(entry.callback):
+                        await entry.callback(client, cq)
+                    else:
+                        await asyncio.to_thread(entry.callback, client, cq)
+                except ContinuePropagation:
+                    continue
+                except StopPropagation:
+                    raise
+                except Exception:
+                    failed = True
+                    log.exception("callback %r failed in %s", data, getattr(entry.callback, "__qualname__", entry.callback))
+                done_group = entry.group
+        finally:
+            metrics.observe("callback", label, time.perf_counter() - t0, failed)
+            if not was_answered(cq):
+                try:
+                    await answer(cache_time=0)
+                except Exception as e:
+                    mark_answered(cq)  # expired/invalid: nothing left to answer
+                    if "QUERY_ID_INVALID" not in str(e):
+                        log.debug("callback router answer: %s", e)
+
+
+router = CallbackRouter()
+
+
+def _is_regex_filter(flt) -> bool:
+    return type(flt).__name__ == "RegexFilter" and isinstance(getattr(flt, "p", None), re.Pattern)
+
+
+def install(app, group: int = 0) -> CallbackRouter:
+    """
+    Route every regex-filtered CallbackQueryHandler added to `app` through
+    `router`, plus any other CallbackQueryHandler added to `group`.
+    """
+    if getattr(app, "_succu_callback_router", None) is router:
+        return router
+    add_handler, remove_handler = app.add_handler, app.remove_handler
+
+    def routed_add_handler(handler, group_: int = 0):
+        if isinstance(handler, CallbackQueryHandler):
+            if _is_regex_filter(handler.filters):
+                router.add(handler.filters.p, handler.callback, group_, handler)
+                return handler, group_
+            if group_ == group:
+                # behind the router's catch-all this one would never fire
+                router.add(None, handler.callback, group_, handler)
+                return handler, group_
+        return add_handler(handler, group_)
+
+    def routed_remove_handler(handler, group_: int = 0):
+        if isinstance(handler, CallbackQueryHandler) and router.remove(handler, group_):
+            return
+        return remove_handler(handler, group_)
+
+    app.add_handler = routed_add_handler
+    app.remove_handler = routed_remove_handler
+    add_handler(CallbackQueryHandler(router.dispatch), group)
+    app._succu_callback_router = router
+    return router
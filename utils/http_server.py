@@ -0,0 +1,92 @@
+# utils/http_server.py
+"""
+Small local HTTP server started next to the bot, on the bot's event loop.
+
+  GET /healthz  → {"ok": bool, "connected": bool, "leader": bool, "uptime": s}
+  GET /metrics  → Prometheus text from utils.metrics
+                  (Authorization: Bearer $METRICS_TOKEN, or ?token=, when set)
+
+Other modules can add routes to `api` before start() is called
+(handlers/stripe_tips.py adds POST /stripe/webhook).
+
+On a host that exposes the server (HTTP_HOST=0.0.0.0, as the Stripe webhook
+needs on Render) set METRICS_TOKEN: without it /metrics answers only on a
+loopback bind, and 404s otherwise.
+
+Env:
+  HTTP_ENABLED   (default 1)
+  HTTP_HOST      (default 127.0.0.1 — set 0.0.0.0 to expose it)
+  HTTP_PORT      (default $PORT or 8080)
+  METRICS_TOKEN  (required for /metrics when HTTP_HOST isn't loopback)
+"""
+import hmac
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+HTTP_ENABLED = os.getenv("HTTP_ENABLED", "1").lower() in ("1", "true", "yes", "on")
+HTTP_HOST = os.getenv("HTTP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.getenv("HTTP_PORT") or os.getenv("PORT") or "8080")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip()
+_LOOPBACK = HTTP_HOST in ("127.0.0.1", "localhost", "::1")
+
+_started = time.time()
+_client = None
+
+try:
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, PlainTextResponse
+
+    api = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+    @api.get("/healthz")
+    async def healthz():
+        from utils.leader import leader
+
+        connected = bool(_client is not None and getattr(_client, "is_connected", False))
+        body = {
+            "ok": connected,
+            "connected": connected,
+            "leader": leader.is_leader(),
+            "uptime": round(time.time() - _started, 1),
+        }
+        return JSONResponse(body, status_code=200 if connected else 503)
+
+    def _metrics_allowed(request: Request) -> bool:
+        if not METRICS_TOKEN:
+            return _LOOPBACK
+        auth = request.headers.get("authorization", "")
+        given = auth[7:] if auth.lower().startswith("bearer ") else request.query_params.get("token", "")
+        return hmac.compare_digest(given.encode(), METRICS_TOKEN.encode())
+
+    @api.get("/metrics")
+    async def metrics_endpoint(request: Request):
+        from utils import metrics
+
+        if not _metrics_allowed(request):
+            return PlainTextResponse("not found", status_code=404)
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+except ImportError:  # fastapi not installed: bot runs without the HTTP side
+    api = None
+
+
+def start(client) -> None:
+    """Serve `api` with uvicorn as a task on the client's loop (no-op if disabled)."""
+    global _client
+    _client = client
+    if not HTTP_ENABLED or api is None:
+        log.info("http_server: disabled (enabled=%s, fastapi=%s)", HTTP_ENABLED, api is not None)
+        return
+    try:
+        import uvicorn
+    except ImportError:
+        log.warning("http_server: uvicorn not installed, skipping")
+        return
+
+    server = uvicorn.Server(uvicorn.Config(api, host=HTTP_HOST, port=HTTP_PORT, log_level="warning", access_log=False))
+    # pyrogram's idle() owns SIGINT/SIGTERM
+    server.install_signal_handlers = lambda: None
+    client.loop.create_task(server.serve())
+    log.info("http_server: listening on http://%s:%s (/healthz, /metrics)", HTTP_HOST, HTTP_PORT)
@@ -0,0 +1,166 @@
+# utils/leader.py
+"""
+Mongo-backed leader lease so only one worker runs singleton background work.
+
+During deploys and crash loops two workers overlap; both serve interactive
+handlers, but only the lease holder may run the scheduler (monthly sweeps,
+reminder DMs, scheduled posts, flyer campaigns).
+
+Lease doc (collection `leader_leases`):
+    {_id: LEADER_LEASE_NAME, holder, token, expires_at, acquired_at, renewed_at}
+
+- The holder renews every LEADER_HEARTBEAT_SECONDS; the lease lasts
+  LEADER_LEASE_TTL_SECONDS, so a dead worker is replaced within one TTL.
+- `token` is a fencing token, incremented on every change of holder. Work
+  claimed under an old token can be recognised (and its writes rejected)
+  after a takeover; `verify()` re-reads the lease before side effects.
+- Locally, leadership is assumed to lapse a little before the lease does,
+  so a worker that stops heartbeating stops acting before anyone else starts.
+
+Usage:
+    from utils.leader import leader
+    leader.attach(app)
+    if leader.is_leader(): ...
+    if await leader.verify(): ...   # before destructive work
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+log = logging.getLogger(__name__)
+
+LEASE_NAME = os.getenv("LEADER_LEASE_NAME", "succubot")
+LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL_SECONDS", "30"))
+HEARTBEAT = float(os.getenv("LEADER_HEARTBEAT_SECONDS", "10"))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _instance_id() -> str:
+    base = os.getenv("RENDER_INSTANCE_ID") or socket.gethostname()
+    return f"{base}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class LeaderLease:
+    def __init__(self, name: str = LEASE_NAME, ttl: float = LEASE_TTL,
+                 heartbeat: float = HEARTBEAT, collection=None):
+        self.name = name
+        self.ttl = float(ttl)
+        self.heartbeat = min(float(heartbeat), self.ttl / 2)
+        self.instance_id = _instance_id()
+        self.token: Optional[int] = None
+        self._col = collection
+        self._valid_until = 0.0
+        self._runner: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[bool], None]] = []
+
+    def _coll(self):
+        if self._col is None:
+            from utils.mongo import db
+
+            self._col = db["leader_leases"]
+        return self._col
+
+    # ---------- public ----------
+
+    def is_leader(self) -> bool:
+        return self.token is not None and time.monotonic() < self._valid_until
+
+    def on_change(self, fn: Callable[[bool], None]) -> None:
+        """Call fn(is_leader) whenever leadership is gained or lost."""
+        self._listeners.append(fn)
+
+    def attach(self, client) -> None:
+        """Start heartbeating on the bot loop (idempotent)."""
+        if self._runner is not None and not self._runner.done():
+            return
+        self._runner = client.loop.create_task(self._run_forever())
+
+    async def verify(self) -> bool:
+        """Re-read the lease: True only if we still hold it under our current token."""
+        if not self.is_leader():
+            return False
+        try:
+            doc = await asyncio.to_thread(self._coll().find_one, {"_id": self.name})
+        except Exception:
+            log.exception("leader: verify failed")
+            return False
+        if not doc or doc.get("holder") != self.instance_id or doc.get("token") != self.token:
+            return False
+        exp = doc.get("expires_at")
+        if exp is not None and exp.tzinfo is None:
+            exp = exp.replace(tzinfo=timezone.utc)
+        return exp is None or exp > _utcnow()
+
+    # ---------- lease ----------
+
+    def _try_acquire(self) -> Optional[int]:
+        col = self._coll()
+        now = _utcnow()
+        expires = now + timedelta(seconds=self.ttl)
+
+        if self.token is not None:
+            doc = col.find_one_and_update(
+                {"_id": self.name, "holder": self.instance_id, "token": self.token},
+                {"$set": {"expires_at": expires, "renewed_at": now}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc:
+                return int(doc["token"])
+
+        try:
+            doc = col.find_one_and_update(
+                {"_id": self.name, "expires_at": {"$lt": now}},
+                {"$set": {"holder": self.instance_id, "expires_at": expires,
+                          "acquired_at": now, "renewed_at": now},
+                 "$inc": {"token": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # lease exists and is held by someone else
+            return None
+        return int(doc["token"]) if doc else None
+
+    def _set_state(self, token: Optional[int], started: float) -> None:
+        was = self.is_leader()
+        self.token = token
+        # stop trusting the lease a bit before it actually runs out
+        self._valid_until = started + self.ttl - self.heartbeat if token is not None else 0.0
+        now = self.is_leader()
+        if now != was:
+            if now:
+                log.info("leader: %s acquired lease %r (token %s)", self.instance_id, self.name, token)
+            else:
+                log.warning("leader: %s lost lease %r", self.instance_id, self.name)
+            for fn in self._listeners:
+                try:
+                    fn(now)
+                except Exception:
+                    log.exception("leader: listener failed")
+
+    async def _run_forever(self) -> None:
+        log.info("leader: instance %s contending for %r (ttl=%ss)", self.instance_id, self.name, self.ttl)
+        while True:
+            started = time.monotonic()
+            try:
+                token = await asyncio.to_thread(self._try_acquire)
+            except Exception:
+                # keep what we have; it simply lapses if Mongo stays unreachable
+                log.exception("leader: heartbeat failed")
+            else:
+                self._set_state(token, started)
+            await asyncio.sleep(self.heartbeat)
+
+
+leader = LeaderLease()
@@ -0,0 +1,88 @@
+# utils/loop_watchdog.py
+"""
+Event-loop lag watchdog.
+
+A heartbeat coroutine ticks every LOOP_WATCHDOG_INTERVAL seconds on the bot
+loop; a daemon thread watches the tick. When the loop hasn't ticked for
+LOOP_LAG_THRESHOLD_SECONDS, something is blocking it (sync pymongo, a JSON
+rewrite, the Stripe SDK…), so the thread grabs the loop thread's current
+stack, finds the innermost frame that belongs to a known handler or job
+(utils.metrics.label_code), and:
+
+  - logs the stall with that name and the stack,
+  - counts it in metrics as `stall{name=...}`.
+
+Every tick also records the measured lag in the `loop{name="lag"}` histogram.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from utils import metrics
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.getenv("LOOP_WATCHDOG_ENABLED", "1").lower() in ("1", "true", "yes", "on")
+THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_SECONDS", "0.5"))
+INTERVAL = float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.1"))
+STACK_LIMIT = int(os.getenv("LOOP_WATCHDOG_STACK_LIMIT", "12"))
+
+_last_beat = time.monotonic()
+_loop_thread_id: Optional[int] = None
+_started = False
+
+
+def _attribute(frame) -> str:
+    """Name of the innermost known handler/job frame on the stack."""
+    f = frame
+    while f is not None:
+        label = metrics.code_label(f.f_code)
+        if label:
+            return label
+        f = f.f_back
+    return "unknown"
+
+
+async def _heartbeat() -> None:
+    global _last_beat, _loop_thread_id
+    _loop_thread_id = threading.get_ident()
+    while True:
+        before = time.monotonic()
+        _last_beat = before
+        await asyncio.sleep(INTERVAL)
+        lag = max(0.0, time.monotonic() - before - INTERVAL)
+        metrics.observe("loop", "lag", lag)
+
+
+def _watch() -> None:
+    reported_beat = None
+    while True:
+        time.sleep(INTERVAL / 2)
+        beat = _last_beat
+        stalled = time.monotonic() - beat
+        if stalled < THRESHOLD or beat == reported_beat or _loop_thread_id is None:
+            continue
+        reported_beat = beat  # one report per stall
+        frame = sys._current_frames().get(_loop_thread_id)
+        if frame is None:
+            continue
+        label = _attribute(frame)
+        metrics.incr("stall", label)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+        log.warning("event loop blocked for %.2fs+ in %s\n%s", stalled, label, stack)
+
+
+def start(client) -> None:
+    """Start heartbeat (on the bot loop) and watcher thread; idempotent."""
+    global _started
+    if _started or not ENABLED:
+        return
+    _started = True
+    client.loop.create_task(_heartbeat())
+    threading.Thread(target=_watch, name="loop-watchdog", daemon=True).start()
+    log.info("loop_watchdog: threshold=%.2fs interval=%.2fs", THRESHOLD, INTERVAL)
@@ -0,0 +1,181 @@
+# utils/media_registry.py
+"""
+Upload-once registry for bot media (welcome/goodbye photos, menu photos, flyers).
+
+Telegram re-downloads a URL (or we re-upload a local file) on every send.
+After the first successful send we remember the resulting file_id and reuse
+it; if Telegram later rejects that id as stale we re-upload once and store
+the fresh one.
+
+- Uses MongoDB when available (collection MEDIA_COLLECTION, default "media_file_ids").
+- Falls back to an atomic JSON file at MEDIA_REGISTRY_PATH (default data/media_ids.json).
+
+Usage:
+    from utils.media_registry import registry
+    await registry.send_photo(client, chat_id, WELCOME_PHOTO, caption=text)
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from pyrogram.errors import RPCError
+
+from utils.boot import on_init
+
+log = logging.getLogger(__name__)
+
+_MONGO_URI = os.getenv("MONGO_URI") or os.getenv("MONGO_URL")
+_MONGO_DB = os.getenv("MONGO_DB_NAME", "succubot")
+_MONGO_COL = os.getenv("MEDIA_COLLECTION", "media_file_ids")
+_JSON_PATH = os.getenv("MEDIA_REGISTRY_PATH", "data/media_ids.json")
+
+# Error IDs that mean "this file_id is no good any more", not "this chat is broken"
+_STALE_IDS = ("MEDIA_EMPTY", "FILE_ID_INVALID", "FILE_REFERENCE_", "PHOTO_INVALID", "WEBPAGE_MEDIA_EMPTY")
+
+_KINDS = ("photo", "video", "animation", "document", "audio", "voice", "sticker")
+
+
+def _is_source(src: str) -> bool:
+    """URLs and local paths need uploading; anything else is already a file_id."""
+    s = (src or "").strip()
+    return s.startswith(("http://", "https://")) or os.path.isfile(s)
+
+
+def _is_stale(e: Exception) -> bool:
+    if isinstance(e, ValueError):  # malformed/undecodable file_id
+        return True
+    ident = str(getattr(e, "ID", "") or "")
+    return isinstance(e, RPCError) and any(ident.startswith(p) for p in _STALE_IDS)
+
+
+class MediaRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # source -> {"file_id": ..., "kind": ..., "updated_at": ...}
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._upload_locks: Dict[str, asyncio.Lock] = {}
+        self._col = None
+
+        if _MONGO_URI:
+            try:
+                from pymongo import MongoClient
+
+                self._col = MongoClient(_MONGO_URI)[_MONGO_DB][_MONGO_COL]
+            except Exception as e:
+                log.warning("MediaRegistry: Mongo unavailable, using JSON: %s", e)
+                self._col = None
+
+    def load(self) -> None:
+        """Fill the cache from the store (boot phase 2; ids remembered before then win)."""
+        if self._col is not None:
+            try:
+                loaded = {d["source"]: d for d in self._col.find({}, {"_id": 0})
+                          if d.get("source") and d.get("file_id")}
+            except Exception as e:
+                log.warning("MediaRegistry: Mongo unavailable, using JSON: %s", e)
+                self._col = None
+        if self._col is None:
+            loaded = self._load_json()
+        with self._lock:
+            self._cache = {**loaded, **self._cache}
+
+    # ---------- public ----------
+
+    def get(self, source: str, kind: str = "photo") -> Optional[str]:
+        rec = self._cache.get(source)
+        if rec and rec.get("kind", "photo") == kind:
+            return rec.get("file_id")
+        return None
+
+    def remember(self, source: str, file_id: str, kind: str = "photo") -> None:
+        rec = {"source": source, "file_id": file_id, "kind": kind, "updated_at": time.time()}
+        with self._lock:
+            self._cache[source] = rec
+            if self._col is not None:
+                try:
+                    self._col.update_one({"source": source}, {"$set": rec}, upsert=True)
+                    return
+                except Exception as e:
+                    log.warning("MediaRegistry: failed to persist %s: %s", source, e)
+            self._save_json()
+
+    def forget(self, source: str) -> None:
+        with self._lock:
+            if self._cache.pop(source, None) is None:
+                return
+            if self._col is not None:
+                try:
+                    self._col.delete_one({"source": source})
+                    return
+                except Exception:
+                    pass
+            self._save_json()
+
+    async def send(self, client, chat_id, source: str, kind: str = "photo", **kwargs):
+        """
+        Send `source` (file_id, URL or local path) as `kind` via client.send_<kind>.
+        URLs/paths are uploaded at most once; later sends reuse the stored file_id.
+        """
+        if kind not in _KINDS:
+            raise ValueError(f"unsupported media kind: {kind}")
+        send = getattr(client, f"send_{kind}")
+
+        if not _is_source(source):
+            return await send(chat_id, source, **kwargs)
+
+        cached = self.get(source, kind)
+        if cached:
+            try:
+                return await send(chat_id, cached, **kwargs)
+            except Exception as e:
+                if not _is_stale(e):
+                    raise
+                log.info("MediaRegistry: stale file_id for %s (%s), re-uploading", source, e)
+                await asyncio.to_thread(self.forget, source)
+
+        lock = self._upload_locks.setdefault(source, asyncio.Lock())
+        async with lock:
+            # another send may have uploaded while we waited
+            cached = self.get(source, kind)
+            if cached:
+                return await send(chat_id, cached, **kwargs)
+            msg = await send(chat_id, source, **kwargs)
+            media = getattr(msg, kind, None)
+            file_id = getattr(media, "file_id", None)
+            if file_id:
+                await asyncio.to_thread(self.remember, source, file_id, kind)
+            return msg
+
+    async def send_photo(self, client, chat_id, source: str, **kwargs):
+        return await self.send(client, chat_id, source, "photo", **kwargs)
+
+    # ---------- json helpers ----------
+
+    def _load_json(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(_JSON_PATH, "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            log.warning("MediaRegistry: failed to load JSON: %s", e)
+            return {}
+
+    def _save_json(self) -> None:
+        os.makedirs(os.path.dirname(_JSON_PATH) or ".", exist_ok=True)
+        tmp = _JSON_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, _JSON_PATH)
+
+
+registry = MediaRegistry()
+
+
+@on_init("media_registry.load")
+def _load():
+    registry.load()
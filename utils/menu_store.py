@@ -20,6 +20,8 @@ import re
 import logging
 from typing import Dict, Optional, List
 
+from utils.boot import add_init_hook
+
 log = logging.getLogger(__name__)
 
 _MONGO_URL = os.getenv("MONGO_URL") or os.getenv("MONGO_URI")
@@ -68,17 +70,11 @@ class MenuStore:
             try:
                 from pymongo import MongoClient
 
+                # lazy client: the ping + index build run in boot phase 2 (_check_mongo)
                 self._mc = MongoClient(_MONGO_URL, serverSelectionTimeoutMS=3000)
-                self._mc.admin.command("ping")
                 self._col = self._mc[_MONGO_DB][_MENU_COLL]
-                # helpful index on display name if you ever want to search
-                self._col.create_index("name", unique=False)
                 self._use_mongo = True
-                log.info(
-                    "MenuStore: Mongo OK db=%s coll=%s",
-                    _MONGO_DB,
-                    _MENU_COLL,
-                )
+                add_init_hook("menu_store.mongo", self._check_mongo)
             except Exception as e:
                 log.warning(
                     "MenuStore: Mongo unavailable, falling back to JSON: %s", e
@@ -90,6 +86,19 @@ class MenuStore:
             self._load_json()
             log.info("MenuStore: JSON at %s", _JSON_PATH)
 
+    def _check_mongo(self) -> None:
+        try:
+            self._mc.admin.command("ping")
+            # helpful index on display name if you ever want to search
+            self._col.create_index("name", unique=False)
+            log.info("MenuStore: Mongo OK db=%s coll=%s", _MONGO_DB, _MENU_COLL)
+        except Exception as e:
+            log.warning("MenuStore: Mongo unavailable, falling back to JSON: %s", e)
+            with self._lock:
+                self._use_mongo = False
+                os.makedirs(os.path.dirname(_JSON_PATH) or ".", exist_ok=True)
+                self._load_json()
+
     # ---------- public ----------
 
     def set_menu(self, model: str, text: str) -> None:
@@ -0,0 +1,268 @@
+# utils/metrics.py
+"""
+In-process metrics: counts, errors and latency histograms.
+
+Families:
+  handler   — every registered pyrogram handler (install(app) wraps callbacks)
+  callback  — button presses, per matched handler prefix (fed by callback_router)
+  mongo     — every Mongo command, per collection:command (pymongo command
+              monitoring, so all MongoClients created after import are covered)
+
+Exposed as Prometheus text by utils/http_server.py (/metrics) and summarised
+by the owner /stats command.
+
+Import this module before anything creates a MongoClient (main.py does it first).
+"""
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from html import escape
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from pyrogram import ContinuePropagation, StopPropagation
+    _FLOW = (StopPropagation, ContinuePropagation)
+except ImportError:  # metrics stays usable without pyrogram (tools, tests)
+    _FLOW = ()
+
+# upper bounds in seconds; the last bucket is +Inf
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_started = time.time()
+
+
+class Histogram:
+    __slots__ = ("count", "errors", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float, error: bool) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if error:
+            self.errors += 1
+        for i, ub in enumerate(BUCKETS):
+            if seconds <= ub:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing the q-quantile (coarse but cheap)."""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+
+_hists: Dict[Tuple[str, str], Histogram] = {}
+_counters: Dict[Tuple[str, str], int] = {}
+# code object -> handler/job name, so the loop watchdog can attribute stalls
+_code_labels: Dict[Any, str] = {}
+
+
+def observe(family: str, name: str, seconds: float, error: bool = False) -> None:
+    with _lock:
+        h = _hists.get((family, name))
+        if h is None:
+            h = _hists[(family, name)] = Histogram()
+        h.observe(seconds, error)
+
+
+def incr(family: str, name: str, n: int = 1) -> None:
+    with _lock:
+        _counters[(family, name)] = _counters.get((family, name), 0) + n
+
+
+@contextmanager
+def timed(family: str, name: str):
+    t0 = time.perf_counter()
+    error = False
+    try:
+        yield
+    except _FLOW:
+        raise  # handler flow control, not a failure
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe(family, name, time.perf_counter() - t0, error)
+
+
+def label_code(fn: Callable, label: str) -> None:
+    code = getattr(inspect.unwrap(fn), "__code__", None)
+    if code is not None:
+        _code_labels[code] = label
+
+
+def code_label(code) -> Optional[str]:
+    return _code_labels.get(code)
+
+
+def handler_name(fn: Callable) -> str:
+    mod = getattr(fn, "__module__", "") or ""
+    qual = (getattr(fn, "__qualname__", "") or repr(fn)).replace("<locals>.", "")
+    if qual.startswith("register."):
+        qual = qual[len("register."):]
+    return f"{mod}.{qual}" if mod else qual
+
+
+def instrument(fn: Callable, family: str = "handler", name: Optional[str] = None) -> Callable:
+    """Wrap a handler callback (sync or async) so every call is timed."""
+    if getattr(fn, "__succu_instrumented__", False):
+        return fn
+    label = name or handler_name(fn)
+    label_code(fn, label)
+
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with timed(family, label):
+                return await fn(*args, **kwargs)
+    else:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(family, label):
+                return fn(*args, **kwargs)
+    wrapper.__succu_instrumented__ = True
+    return wrapper
+
+
+def install(app) -> None:
+    """Time every handler added to `app` from now on."""
+    if getattr(app, "_succu_metrics", False):
+        return
+    add_handler = app.add_handler
+
+    def timed_add_handler(handler, group: int = 0):
+        handler.callback = instrument(handler.callback)
+        return add_handler(handler, group)
+
+    app.add_handler = timed_add_handler
+    app._succu_metrics = True
+
+
+# ---------- Mongo command monitoring ----------
+
+try:
+    from pymongo import monitoring
+
+    class _MongoListener(monitoring.CommandListener):
+        # request_id -> "collection:command"; commands without a collection are skipped
+        def __init__(self):
+            self._pending: Dict[Any, str] = {}
+
+        def started(self, event):
+            coll = event.command.get(event.command_name)
+            if isinstance(coll, str):
+                self._pending[(event.connection_id, event.request_id)] = f"{coll}:{event.command_name}"
+
+        def _done(self, event, error: bool):
+            label = self._pending.pop((event.connection_id, event.request_id), None)
+            if label:
+                observe("mongo", label, event.duration_micros / 1e6, error)
+
+        def succeeded(self, event):
+            self._done(event, False)
+
+        def failed(self, event):
+            self._done(event, True)
+
+    monitoring.register(_MongoListener())
+except ImportError:  # pymongo not installed
+    pass
+
+
+# ---------- export ----------
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        hists = {k: (h.count, h.errors, h.total, h.max, list(h.buckets), h.quantile(0.95))
+                 for k, h in _hists.items()}
+        counters = dict(_counters)
+    return {"uptime": time.time() - _started, "histograms": hists, "counters": counters}
+
+
+def reset() -> None:
+    """Forget all counts and histograms (code labels are kept). Used by bench/."""
+    with _lock:
+        _hists.clear()
+        _counters.clear()
+
+
+def _esc(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def render_prometheus() -> str:
+    snap = snapshot()
+    lines: List[str] = [
+        "# TYPE succubot_uptime_seconds gauge",
+        f"succubot_uptime_seconds {snap['uptime']:.0f}",
+    ]
+    seen_families = set()
+    for (family, name), (count, errors, total, _mx, buckets, _p95) in sorted(snap["histograms"].items()):
+        metric = f"succubot_{family}_seconds"
+        if family not in seen_families:
+            seen_families.add(family)
+            lines.append(f"# TYPE {metric} histogram")
+            lines.append(f"# TYPE succubot_{family}_errors_total counter")
+        lbl = f'name="{_esc(name)}"'
+        cum = 0
+        for ub, n in zip(BUCKETS, buckets):
+            cum += n
+            lines.append(f'{metric}_bucket{{{lbl},le="{ub}"}} {cum}')
+        lines.append(f'{metric}_bucket{{{lbl},le="+Inf"}} {count}')
+        lines.append(f"{metric}_sum{{{lbl}}} {total:.6f}")
+        lines.append(f"{metric}_count{{{lbl}}} {count}")
+        lines.append(f"succubot_{family}_errors_total{{{lbl}}} {errors}")
+    for (family, name), n in sorted(snap["counters"].items()):
+        lines.append(f'succubot_{family}_total{{name="{_esc(name)}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+
+def format_top(family: Optional[str] = None, top: int = 10, limit: int = 4000) -> str:
+    """
+    Owner /stats text (HTML): busiest entries by total time, per family.
+    Names are escaped, and lines that would push it past `limit` characters
+    are dropped whole so no tag is cut in half.
+    """
+    snap = snapshot()
+    fams = [family] if family else sorted({f for f, _ in snap["histograms"]})
+    out = [f"<b>Stats</b> — up {snap['uptime'] / 3600:.1f}h"]
+    for fam in fams:
+        rows = [(n, v) for (f, n), v in snap["histograms"].items() if f == fam]
+        if not rows:
+            continue
+        rows.sort(key=lambda r: r[1][2], reverse=True)
+        out.append(f"\n<b>{escape(fam)}</b> (count · err · avg · p95 · max)")
+        for name, (count, errors, total, mx, _b, p95) in rows[:top]:
+            avg = total / count if count else 0.0
+            out.append(f"• <code>{escape(name)}</code> {count} · {errors} · {avg * 1000:.0f}ms · ≤{p95 * 1000:.0f}ms · {mx * 1000:.0f}ms")
+    counters = [(k, v) for k, v in snap["counters"].items() if not family or k[0] == family]
+    if counters:
+        out.append("\n<b>counters</b>")
+        for (fam, name), n in sorted(counters, key=lambda kv: kv[1], reverse=True)[:top]:
+            out.append(f"• {escape(fam)} <code>{escape(name)}</code> {n}")
+    text, size = [], 0
+    for line in out:
+        size += len(line) + 1
+        if size > limit:
+            text.append("…")
+            break
+        text.append(line)
+    return "\n".join(text)
@@ -0,0 +1,129 @@
+# utils/name_index.py
+"""
+In-memory prefix search over people's names and usernames.
+
+Every name word, the whole name and the username are stored as
+(token, user_id) pairs in one sorted list. A search is a bisect to the first
+token >= the query plus a short scan while tokens still start with it, so it
+costs O(log n + results) and needs no I/O. That keeps it well inside
+Telegram's inline-answer deadline with hundreds of thousands of people.
+
+load() builds a new list off to the side and swaps it in with one
+assignment; put()/remove() keep it current between loads.
+
+Usage:
+    from utils.name_index import NameIndex
+
+    idx = NameIndex()
+    idx.load(coll.find({}, {"user_id": 1, "first_name": 1, "username": 1}))
+    idx.put(123, "Roni", "roni_x")
+    idx.search("ro", limit=20)     # [(123, "Roni", "roni_x")]
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+Entry = Tuple[int, str, str]      # (user_id, first_name, username)
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, accent-insensitive-ish, single-spaced: the form names are matched on."""
+    return " ".join((text or "").casefold().split())
+
+
+def _tokens(first_name: str, username: str) -> Set[str]:
+    name = normalize(first_name)
+    out = set(name.split())
+    if name:
+        out.add(name)                # "mary ann" matches as a phrase too
+    uname = normalize(username)
+    if uname:
+        out.add(uname)
+    return out
+
+
+class NameIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, int]] = []          # sorted (token, user_id)
+        self._names: Dict[int, Tuple[str, str]] = {}     # user_id -> (first_name, username)
+        self.loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def get(self, user_id: int) -> Optional[Tuple[str, str]]:
+        return self._names.get(user_id)
+
+    # ---------- writes ----------
+
+    def load(self, docs: Iterable[Dict[str, Any]]) -> int:
+        """Rebuild from {user_id, first_name, username} docs; nameless ones are skipped."""
+        keys: List[Tuple[str, int]] = []
+        names: Dict[int, Tuple[str, str]] = {}
+        for d in docs:
+            uid = d.get("user_id")
+            first, uname = d.get("first_name") or "", d.get("username") or ""
+            if not isinstance(uid, int) or not (first or uname):
+                continue
+            names[uid] = (first, uname)
+            keys.extend((t, uid) for t in _tokens(first, uname))
+        keys.sort()
+        with self._lock:
+            self._keys, self._names = keys, names
+            self.loaded_at = time.time()
+        return len(names)
+
+    def put(self, user_id: int, first_name: Optional[str], username: Optional[str]) -> None:
+        first, uname = first_name or "", username or ""
+        with self._lock:
+            if self._names.get(user_id) == (first, uname):
+                return
+            self._drop(user_id)
+            if not (first or uname):
+                return
+            self._names[user_id] = (first, uname)
+            for t in _tokens(first, uname):
+                insort(self._keys, (t, user_id))
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            self._drop(user_id)
+
+    def _drop(self, user_id: int) -> None:
+        old = self._names.pop(user_id, None)
+        if old is None:
+            return
+        for t in _tokens(*old):
+            i = bisect_left(self._keys, (t, user_id))
+            if i < len(self._keys) and self._keys[i] == (t, user_id):
+                del self._keys[i]
+
+    # ---------- reads ----------
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[List[Entry], bool]:
+        """
+        People with a name word, full name or username starting with `query`
+        (a leading "@" is ignored), in token order. Returns (entries, has_more).
+        """
+        q = normalize(query).lstrip("@")
+        if not q:
+            return [], False
+        out: List[Entry] = []
+        seen: Set[int] = set()
+        with self._lock:
+            keys, names = self._keys, self._names
+            i = bisect_left(keys, (q, -1 << 63))
+            while i < len(keys) and keys[i][0].startswith(q):
+                uid = keys[i][1]
+                i += 1
+                if uid in seen:
+                    continue
+                seen.add(uid)
+                if len(seen) <= offset:
+                    continue
+                if len(out) == limit:
+                    return out, True
+                out.append((uid, *names[uid]))
+        return out, False
@@ -0,0 +1,78 @@
+# utils/rate_limit.py
+"""
+Tiny asyncio helpers for fanning Telegram API calls out to many chats
+without tripping flood limits.
+
+Usage:
+    limiter = RateLimiter(rate=20, concurrency=8)
+
+    async def one(chat_id):
+        async with limiter:
+            return await call_with_floodwait(client.ban_chat_member, chat_id, user_id)
+
+    results = await asyncio.gather(*(one(c) for c in chat_ids), return_exceptions=True)
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from pyrogram.errors import FloodWait
+
+log = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Token bucket (`rate` calls per second, bursting up to `burst`) combined with
+    a semaphore capping how many calls are in flight at once.
+    """
+
+    def __init__(self, rate: float = 20.0, burst: int = 5, concurrency: int = 8):
+        self.rate = max(0.1, float(rate))
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+    async def _take(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        try:
+            await self._take()
+        except BaseException:
+            self._sem.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._sem.release()
+        return False
+
+
+async def call_with_floodwait(
+    fn: Callable[..., Awaitable[Any]], *args, retries: int = 2, **kwargs
+) -> Any:
+    """Await fn(*args, **kwargs), sleeping through FloodWait up to `retries` times."""
+    attempt = 0
+    while True:
+        try:
+            return await fn(*args, **kwargs)
+        except FloodWait as e:
+            attempt += 1
+            if attempt > retries:
+                raise
+            wait = int(getattr(e, "value", 1) or 1)
+            log.info("rate_limit: FloodWait %ss on %s (attempt %s)", wait, getattr(fn, "__name__", fn), attempt)
+            await asyncio.sleep(wait)
@@ -0,0 +1,218 @@
+# utils/request_context.py
+"""
+Per-update request context: who is this user, loaded once and shared by
+every handler group the update passes through.
+
+install(app) adds one handler in an early group that builds the context for
+each private message (the path where several handlers used to look the same
+user up). Other updates get it lazily the first time a handler asks:
+
+    from utils import request_context
+
+    ctx = await request_context.get(m)      # Message or CallbackQuery
+    if ctx.dm_ready: ...
+    if ctx.in_flow("stripe.tip"): ...
+
+Building a context costs at most one Mongo read: the user's
+requirements_members doc (off the loop, cached per user for
+CONTEXT_TTL_SECONDS). Everything else comes from it or from memory:
+
+  role          owner / super_admin / model / admin / member (utils.roles)
+  dm_ready      mirrored into the member doc by dmready_bridge
+  age_verified  mirrored into the member doc by roni_portal_age; users from
+                before the mirror are resolved once through the registered
+                age source and backfilled
+  flows         pending multi-step flows, probed live from the in-memory
+                state each module registers with register_flow()
+
+Writers keep the cache honest with remember() / save_fields().
+
+Env:
+  MONGODB_URI / MONGO_URI
+  CONTEXT_TTL_SECONDS     (default 60)
+  CONTEXT_PROFILE_CACHE   (default 5000 users)
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+from utils.roles import roles
+from utils.ttl_cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+TTL = float(os.getenv("CONTEXT_TTL_SECONDS", "60"))
+PROFILE_CACHE = int(os.getenv("CONTEXT_PROFILE_CACHE", "5000"))
+# after the update recorder (-1000), before everything else
+CONTEXT_GROUP = -500
+
+_ATTR = "_succu_ctx"
+
+
+# Requirements panel uses db="Succubot" and coll="requirements_members"
+_MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI")
+_members = None
+if _MONGO_URI:
+    try:
+        from pymongo import MongoClient
+
+        _members = MongoClient(_MONGO_URI, serverSelectionTimeoutMS=5000)["Succubot"]["requirements_members"]
+    except Exception as e:
+        log.warning("request_context: Mongo unavailable, contexts carry no member doc: %s", e)
+        _members = None
+
+_profiles = LRUCache(PROFILE_CACHE)          # user_id -> (loaded_at, doc)
+_flows: Dict[str, Callable[[int], bool]] = {}
+_age_source: Optional[Callable[[int], bool]] = None
+
+
+def role_of(user_id: int) -> str:
+    return roles.role_of(user_id)
+
+
+@dataclass
+class RequestContext:
+    user_id: int
+    chat_id: Optional[int]
+    role: str
+    member: Dict[str, Any] = field(default_factory=dict)
+    dm_ready: bool = False
+    age_verified: bool = False
+
+    @property
+    def is_staff(self) -> bool:
+        return roles.is_staff(self.user_id)
+
+    def in_flow(self, name: str) -> bool:
+        probe = _flows.get(name)
+        try:
+            return bool(probe and probe(self.user_id))
+        except Exception:
+            return False
+
+    @property
+    def flows(self) -> FrozenSet[str]:
+        return frozenset(name for name in _flows if self.in_flow(name))
+
+
+# ---------- registration (called by handler modules at import) ----------
+
+def register_flow(name: str, probe: Callable[[int], bool]) -> None:
+    """`probe(user_id)` says whether the user is mid-way through flow `name`. Must be cheap and in-memory."""
+    _flows[name] = probe
+
+
+def set_age_source(fn: Callable[[int], bool]) -> None:
+    """Fallback for users whose member doc has no age_verified flag yet (sync, may hit the DB)."""
+    global _age_source
+    _age_source = fn
+
+
+# ---------- profile cache ----------
+
+def _fetch(user_id: int) -> Dict[str, Any]:
+    if _members is None:
+        return {}
+    try:
+        return _members.find_one({"user_id": user_id}, {"_id": 0}) or {}
+    except Exception as e:
+        log.warning("request_context: member lookup failed for %s: %s", user_id, e)
+        return {}
+
+
+async def _profile(user_id: int) -> Dict[str, Any]:
+    hit = _profiles.get(user_id)
+    if hit is not None and time.monotonic() - hit[0] < TTL:
+        return hit[1]
+    doc = await asyncio.to_thread(_fetch, user_id)
+    _profiles.put(user_id, (time.monotonic(), doc))
+    return doc
+
+
+def remember(user_id: int, **fields) -> None:
+    """Merge fields the caller just wrote into the cached profile (no DB access)."""
+    hit = _profiles.get(user_id)
+    if hit is not None:
+        hit[1].update(fields)
+
+
+def forget(user_id: int) -> None:
+    _profiles.pop(user_id, None)
+
+
+def save_fields(user_id: int, **fields) -> None:
+    """
+    Write fields to the user's member doc and to the cache. Sync; call from a
+    thread or sync code. Only an existing doc is updated: anyone who DMs the
+    bot passes through here, and a doc of their own would make them count as
+    a sanctuary member in the requirement scans and reminders.
+    """
+    if _members is not None:
+        try:
+            _members.update_one({"user_id": user_id}, {"$set": fields})
+        except Exception as e:
+            log.warning("request_context: failed to save %s for %s: %s", sorted(fields), user_id, e)
+            return
+    remember(user_id, **fields)
+
+
+# ---------- building ----------
+
+async def _build(update) -> RequestContext:
+    from pyrogram.types import CallbackQuery
+
+    user = getattr(update, "from_user", None)
+    uid = user.id if user else 0
+    msg = update.message if isinstance(update, CallbackQuery) else update
+    chat = getattr(msg, "chat", None)
+    doc = await _profile(uid) if uid else {}
+
+    age = doc.get("age_verified")
+    if age is None and uid and _age_source is not None:
+        try:
+            age = bool(await asyncio.to_thread(_age_source, uid))
+            await asyncio.to_thread(save_fields, uid, age_verified=age)
+        except Exception as e:
+            log.warning("request_context: age lookup failed for %s: %s", uid, e)
+            age = False
+
+    return RequestContext(
+        user_id=uid,
+        chat_id=chat.id if chat else None,
+        role=role_of(uid),
+        member=doc,
+        dm_ready=bool(doc.get("dm_ready")),
+        age_verified=bool(age),
+    )
+
+
+async def get(update) -> RequestContext:
+    """The update's context, built on first use and reused by every later handler."""
+    ctx = getattr(update, _ATTR, None)
+    if ctx is None:
+        ctx = await _build(update)
+        setattr(update, _ATTR, ctx)
+    return ctx
+
+
+def peek(update) -> Optional[RequestContext]:
+    """The context if one was already built (for sync filters); never loads."""
+    return getattr(update, _ATTR, None)
+
+
+def install(app) -> None:
+    """Prefetch the context for every private message, ahead of all handler groups."""
+    if getattr(app, "_succu_request_context", False):
+        return
+    from pyrogram import filters
+    from pyrogram.handlers import MessageHandler
+
+    async def _prefetch(client, m):
+        if m.from_user:
+            await get(m)
+
+    app.add_handler(MessageHandler(_prefetch, filters.private), CONTEXT_GROUP)
+    app._succu_request_context = True
@@ -0,0 +1,269 @@
+# utils/roles.py
+"""
+One role table for every permission check.
+
+The table is immutable and made of frozensets: each check is one set
+lookup, and a reload swaps the whole table in one assignment, so a check
+never sees a half-updated table.
+
+Roles (each includes the ones above it where noted):
+  owner        OWNER_ID / BOT_OWNER_ID
+  super_admin  SUPER_ADMINS (+ legacy SUPER_ADMIN_ID) + owner
+  admin        ADMINS + super admins
+  model        MODELS + owner (owner always counts as a model for requirements)
+  staff        super admins + models — who may run panels, summons, reminders
+
+Sources:
+  env    read once at import
+  Mongo  role_grants {user_id, role, added_by, added_at}; merged on top of env
+         (grants only add) by the "roles.grants" init hook after app.start,
+         then every ROLES_RELOAD_SECONDS by attach(client) and immediately by
+         grant()/revoke()
+
+Telegram chat-admin status (for group commands) is cached per (chat, user) for
+ROLES_CHAT_ADMIN_TTL seconds; install(app) drops entries when a member's status
+changes, so promotions and demotions apply at once.
+
+Env:
+  OWNER_ID / BOT_OWNER_ID, SUPER_ADMINS, SUPER_ADMIN_ID, ADMINS, MODELS
+  MONGODB_URI / MONGO_URI / MONGO_URL, MONGO_DB_NAME   (default "succubot")
+  ROLES_RELOAD_SECONDS                     (default 60)
+  ROLES_CHAT_ADMIN_TTL                     (default 300)
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from utils.boot import on_init
+from utils.ttl_cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+DEFAULT_OWNER_ID = 6964994611
+ROLES = ("super_admin", "admin", "model")
+RELOAD_SECONDS = float(os.getenv("ROLES_RELOAD_SECONDS", "60"))
+CHAT_ADMIN_TTL = float(os.getenv("ROLES_CHAT_ADMIN_TTL", "300"))
+# after the update recorder and request context, before handler modules
+ROLES_GROUP = -400
+
+_MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or os.getenv("MONGO_URL")
+_MONGO_DB = os.getenv("MONGO_DB_NAME", "succubot")
+
+
+def parse_ids(raw: Optional[str]) -> Set[int]:
+    """Comma/semicolon/space separated ids; junk is skipped."""
+    out: Set[int] = set()
+    for tok in (raw or "").replace(";", ",").replace(" ", ",").split(","):
+        tok = tok.strip()
+        if tok.lstrip("-").isdigit():
+            out.add(int(tok))
+        elif tok:
+            log.warning("roles: bad ID in list: %r", tok)
+    return out
+
+
+@dataclass(frozen=True)
+class RoleTable:
+    owner_id: int
+    super_admins: FrozenSet[int]
+    admins: FrozenSet[int]
+    models: FrozenSet[int]
+    staff: FrozenSet[int]
+
+    @classmethod
+    def build(cls, owner_id: int, super_admins: Iterable[int] = (), admins: Iterable[int] = (),
+              models: Iterable[int] = ()) -> "RoleTable":
+        owner = {owner_id} if owner_id else set()
+        sup = frozenset(set(super_admins) | owner)
+        adm = frozenset(set(admins) | sup)
+        mod = frozenset(set(models) | owner)
+        return cls(owner_id=owner_id, super_admins=sup, admins=adm, models=mod, staff=sup | mod)
+
+    def role_of(self, user_id: int) -> str:
+        if user_id and user_id == self.owner_id:
+            return "owner"
+        if user_id in self.super_admins:
+            return "super_admin"
+        if user_id in self.models:
+            return "model"
+        if user_id in self.admins:
+            return "admin"
+        return "member"
+
+
+def _env_table() -> RoleTable:
+    owner = os.getenv("OWNER_ID") or os.getenv("BOT_OWNER_ID")
+    return RoleTable.build(
+        owner_id=int(owner) if owner and owner.strip().lstrip("-").isdigit() else DEFAULT_OWNER_ID,
+        super_admins=parse_ids(os.getenv("SUPER_ADMINS")) | parse_ids(os.getenv("SUPER_ADMIN_ID")),
+        admins=parse_ids(os.getenv("ADMINS")),
+        models=parse_ids(os.getenv("MODELS")),
+    )
+
+
+class RoleService:
+    def __init__(self):
+        self._env = _env_table()
+        self.table = self._env
+        self.loaded_at = 0.0
+        self._chat_admins = LRUCache(20_000)     # (chat_id, user_id) -> (checked_at, is_admin)
+        self._task = None
+        self._col = None
+        if _MONGO_URI:
+            try:
+                from pymongo import MongoClient
+
+                self._col = MongoClient(_MONGO_URI, serverSelectionTimeoutMS=5000)[_MONGO_DB]["role_grants"]
+            except Exception as e:
+                log.warning("roles: Mongo unavailable, env roles only: %s", e)
+                self._col = None
+
+    # ---------- checks (O(1), no I/O) ----------
+
+    @property
+    def owner_id(self) -> int:
+        return self.table.owner_id
+
+    def is_owner(self, user_id: Optional[int]) -> bool:
+        return bool(user_id) and user_id == self.table.owner_id
+
+    def is_super_admin(self, user_id: Optional[int]) -> bool:
+        return user_id in self.table.super_admins
+
+    def is_admin(self, user_id: Optional[int]) -> bool:
+        return user_id in self.table.admins
+
+    def is_model(self, user_id: Optional[int]) -> bool:
+        return user_id in self.table.models
+
+    def is_staff(self, user_id: Optional[int]) -> bool:
+        return user_id in self.table.staff
+
+    def role_of(self, user_id: Optional[int]) -> str:
+        return self.table.role_of(user_id or 0)
+
+    # ---------- Mongo grants ----------
+
+    def reload(self) -> RoleTable:
+        """Rebuild the table from env + role_grants (sync; one find). Keeps the old table on error."""
+        if self._col is None:
+            return self.table
+        try:
+            extra: Dict[str, Set[int]] = {r: set() for r in ROLES}
+            for d in self._col.find({}, {"_id": 0, "user_id": 1, "role": 1}):
+                if d.get("role") in extra and d.get("user_id") is not None:
+                    extra[d["role"]].add(int(d["user_id"]))
+        except Exception as e:
+            log.warning("roles: reload failed, keeping current table: %s", e)
+            return self.table
+        env = self._env
+        table = RoleTable.build(
+            owner_id=env.owner_id,
+            super_admins=env.super_admins | extra["super_admin"],
+            admins=env.admins | extra["admin"],
+            models=env.models | extra["model"],
+        )
+        if table != self.table:
+            log.info("roles: table reloaded (super_admins=%d admins=%d models=%d)",
+                     len(table.super_admins), len(table.admins), len(table.models))
+        self.table = table
+        self.loaded_at = time.time()
+        return table
+
+    def grant(self, user_id: int, role: str, by: Optional[int] = None) -> RoleTable:
+        if role not in ROLES:
+            raise ValueError(f"unknown role {role!r}; expected one of {', '.join(ROLES)}")
+        if self._col is None:
+            raise RuntimeError("role grants need Mongo")
+        self._col.update_one(
+            {"user_id": int(user_id), "role": role},
+            {"$set": {"user_id": int(user_id), "role": role, "added_by": by,
+                      "added_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+        return self.reload()
+
+    def revoke(self, user_id: int, role: str) -> RoleTable:
+        """Removes a Mongo grant; roles that come from env stay."""
+        if self._col is None:
+            raise RuntimeError("role grants need Mongo")
+        self._col.delete_one({"user_id": int(user_id), "role": role})
+        return self.reload()
+
+    def grants(self) -> List[dict]:
+        if self._col is None:
+            return []
+        return list(self._col.find({}, {"_id": 0}).sort([("role", 1), ("user_id", 1)]))
+
+    def env_roles(self, user_id: int) -> Set[str]:
+        env, out = self._env, set()
+        if user_id in env.super_admins:
+            out.add("super_admin")
+        if user_id in env.admins:
+            out.add("admin")
+        if user_id in env.models:
+            out.add("model")
+        return out
+
+    async def _reload_forever(self) -> None:
+        # the first merge is the "roles.grants" init hook
+        while True:
+            await asyncio.sleep(RELOAD_SECONDS)
+            await asyncio.to_thread(self.reload)
+
+    def attach(self, client) -> None:
+        """Start periodic reloads on the client's loop (idempotent)."""
+        if self._task is None and self._col is not None:
+            self._task = client.loop.create_task(self._reload_forever())
+
+    # ---------- Telegram chat admins ----------
+
+    async def is_chat_admin(self, client, chat_id: int, user_id: int) -> bool:
+        """Staff, or an administrator/creator of `chat_id` (cached)."""
+        if self.is_super_admin(user_id):
+            return True
+        key = (chat_id, user_id)
+        hit = self._chat_admins.get(key)
+        if hit is not None and time.monotonic() - hit[0] < CHAT_ADMIN_TTL:
+            return hit[1]
+        from pyrogram.enums import ChatMemberStatus
+
+        try:
+            member = await client.get_chat_member(chat_id, user_id)
+            ok = member.status in (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+        except Exception as e:
+            log.debug("roles: get_chat_member(%s, %s) failed: %s", chat_id, user_id, e)
+            return False
+        self._chat_admins.put(key, (time.monotonic(), ok))
+        return ok
+
+    def forget_chat_admin(self, chat_id: int, user_id: int) -> None:
+        self._chat_admins.pop((chat_id, user_id), None)
+
+
+roles = RoleService()
+
+
+@on_init("roles.grants")
+def _load_grants() -> None:
+    # env roles apply from import; Mongo grants are merged once the client is up
+    roles.reload()
+
+
+def install(app) -> None:
+    """Drop cached chat-admin status whenever a member's status changes."""
+    if getattr(app, "_succu_roles", False):
+        return
+    from pyrogram.handlers import ChatMemberUpdatedHandler
+
+    async def _on_member_change(client, ev):
+        member = ev.new_chat_member or ev.old_chat_member
+        if member and member.user:
+            roles.forget_chat_admin(ev.chat.id, member.user.id)
+
+    app.add_handler(ChatMemberUpdatedHandler(_on_member_change), ROLES_GROUP)
+    app._succu_roles = True
@@ -0,0 +1,416 @@
+# utils/scheduler.py
+"""
+The bot's one scheduler: asyncio-native, persistent, running on the bot loop.
+
+Every timed thing (schedulemsg posts, flyers, requirement reminders/sweeps)
+goes through the `scheduler` singleton below, so there is a single event
+loop, a single job store (utils.mongo.scheduled_jobs) and one place to look
+when a job did or didn't run (/jobs, see handlers/scheduler_admin.py).
+
+Job documents:
+
+    {_id, kind, payload, status, run_at (UTC, = next run), misfire_grace,
+     cron, tz,                                   # recurring jobs only
+     runs, failures, last_run_at, last_duration, last_status, last_error,
+     created_at, finished_at}
+
+A job's `kind` names a coroutine registered with @scheduler.task(kind); it is
+called as `await fn(client, payload)`. Nothing is pickled.
+
+Misfires:
+  - one-off jobs found more than `misfire_grace` seconds late (e.g. the bot
+    was down) are marked "missed"; anything less late is caught up on boot.
+  - recurring jobs coalesce: however many fire times were missed, they run
+    at most once (if the newest is within grace) and are rescheduled at the
+    next future fire time. A cron with no future fire time is "finished".
+
+Only the leader-lease holder (utils/leader.py) claims and runs due jobs, and
+each claim is stamped with the lease's fencing token and the claiming
+process: after a takeover the new leader requeues jobs another process left
+"running" under an older token (its own in-flight jobs are left alone when
+it merely renews under a new token), and a stale worker's late result write
+no longer matches the job and is dropped. Manual /runjob triggers run
+wherever the command lands; their claims carry no token and are never
+requeued.
+
+Usage:
+    from utils.scheduler import scheduler
+
+    @scheduler.task("schedulemsg.post")
+    async def post(client, payload): ...
+
+    scheduler.attach(app)                # from register(app); idempotent
+    scheduler.schedule_at("id", "schedulemsg.post", run_at, {...})
+    scheduler.recurring("enforce.sweep", "enforce.sweep", {"day": 1, "hour": 0, "minute": 10})
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from pymongo import ASCENDING, ReturnDocument
+
+from utils import metrics
+from utils.boot import on_init
+from utils.leader import leader
+
+log = logging.getLogger(__name__)
+
+POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "30"))
+MISFIRE_GRACE_SECONDS = float(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "3600"))
+DEFAULT_TZ = os.getenv("TZ", "America/Los_Angeles")
+
+TaskFn = Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    # pymongo hands back naive UTC datetimes unless tz_aware=True
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def next_fire_time(cron: Dict[str, Any], tz: str, after: Optional[datetime] = None) -> Optional[datetime]:
+    """Next fire time (UTC) of a cron spec, e.g. {"day": "last", "hour": 18}."""
+    from apscheduler.triggers.cron import CronTrigger
+
+    trig = CronTrigger(timezone=tz, **cron)
+    nxt = trig.get_next_fire_time(None, after or _utcnow())
+    return nxt.astimezone(timezone.utc) if nxt else None
+
+
+class Scheduler:
+    def __init__(self, collection=None):
+        self._col = collection
+        self._tasks: Dict[str, TaskFn] = {}
+        self._client = None
+        self._runner: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._running: Set[asyncio.Task] = set()   # strong refs, or the loop may GC a job mid-run
+
+    # ---------- wiring ----------
+
+    def _coll(self):
+        if self._col is None:
+            from utils.mongo import scheduled_jobs
+
+            self._col = scheduled_jobs
+        return self._col
+
+    def ensure_indexes(self) -> None:
+        col = self._coll()
+        col.create_index([("status", ASCENDING), ("run_at", ASCENDING)])
+        col.create_index([("kind", ASCENDING), ("status", ASCENDING), ("run_at", ASCENDING)])
+
+    def task(self, kind: str):
+        """Decorator: register the coroutine that runs jobs of this kind."""
+        def deco(fn: TaskFn) -> TaskFn:
+            self._tasks[kind] = fn
+            metrics.label_code(fn, f"job:{kind}")
+            return fn
+        return deco
+
+    def attach(self, client) -> None:
+        """Bind the bot client and start the run loop on its event loop (idempotent)."""
+        self._client = client
+        if self._runner is not None and not self._runner.done():
+            return
+        leader.on_change(lambda _is_leader: self._poke())
+        leader.attach(client)
+        self._runner = client.loop.create_task(self._run_forever())
+
+    # ---------- jobs ----------
+
+    def schedule_at(
+        self,
+        job_id: str,
+        kind: str,
+        run_at: datetime,
+        payload: Optional[Dict[str, Any]] = None,
+        *,
+        misfire_grace: Optional[float] = None,
+    ) -> None:
+        """Create or replace a one-off job."""
+        self._coll().update_one(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "kind": kind,
+                    "run_at": _aware(run_at).astimezone(timezone.utc),
+                    "payload": payload or {},
+                    "status": "scheduled",
+                    "misfire_grace": MISFIRE_GRACE_SECONDS if misfire_grace is None else float(misfire_grace),
+                    "created_at": _utcnow(),
+                    "last_error": None,
+                },
+                "$unset": {"cron": "", "tz": ""},
+            },
+            upsert=True,
+        )
+        self._poke()
+
+    def recurring(
+        self,
+        job_id: str,
+        kind: str,
+        cron: Dict[str, Any],
+        payload: Optional[Dict[str, Any]] = None,
+        *,
+        tz: str = DEFAULT_TZ,
+        misfire_grace: Optional[float] = None,
+    ) -> None:
+        """
+        Declare a cron job (APScheduler CronTrigger fields). Safe to call on every
+        boot: the stored next run is kept when the schedule is unchanged, so a run
+        that fell due while the bot was down is still caught up.
+        """
+        col = self._coll()
+        existing = col.find_one({"_id": job_id}, {"cron": 1, "tz": 1, "status": 1})
+        fields: Dict[str, Any] = {
+            "kind": kind,
+            "cron": dict(cron),
+            "tz": tz,
+            "payload": payload or {},
+            "misfire_grace": MISFIRE_GRACE_SECONDS if misfire_grace is None else float(misfire_grace),
+        }
+        unchanged = (
+            existing
+            and existing.get("cron") == fields["cron"]
+            and existing.get("tz") == tz
+            and existing.get("status") in ("scheduled", "running")
+        )
+        if not unchanged:
+            fields["run_at"] = next_fire_time(cron, tz)
+            # a cron with no future fire time can never run: park it, don't queue it
+            fields["status"] = "scheduled" if fields["run_at"] else "finished"
+        col.update_one(
+            {"_id": job_id},
+            {"$set": fields, "$setOnInsert": {"created_at": _utcnow(), "runs": 0, "failures": 0}},
+            upsert=True,
+        )
+        self._poke()
+
+    def cancel(self, job_id: str) -> bool:
+        res = self._coll().update_one(
+            {"_id": job_id, "status": "scheduled"},
+            {"$set": {"status": "canceled", "finished_at": _utcnow()}},
+        )
+        return res.modified_count > 0
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._coll().find_one({"_id": job_id})
+
+    def list_jobs(
+        self, kind: Optional[str] = None, limit: int = 50, statuses=("scheduled",)
+    ) -> List[Dict[str, Any]]:
+        q: Dict[str, Any] = {"status": {"$in": list(statuses)}}
+        if kind:
+            q["kind"] = kind
+        return list(self._coll().find(q).sort("run_at", ASCENDING).limit(limit))
+
+    async def run_now(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Run a job immediately (owner trigger). The job is claimed first, like the
+        loop does, so it can't overlap a scheduled run; recurring jobs then go
+        back to "scheduled" at their next fire time.
+        Returns the updated job document, or None if there is nothing to run.
+        """
+        doc = await asyncio.to_thread(self.get_job, job_id)
+        if not doc or doc.get("status") in ("running", "canceled"):
+            return None
+        if not doc.get("cron") and doc.get("status") != "scheduled":
+            return None
+        doc = await asyncio.to_thread(self._claim, {"_id": job_id, "status": doc["status"]}, _utcnow())
+        if not doc:
+            return None
+        await self._execute(doc, manual=True)
+        return await asyncio.to_thread(self.get_job, job_id)
+
+    # ---------- run loop ----------
+
+    def _poke(self) -> None:
+        if self._wake is None or self._runner is None:
+            return
+        loop = self._runner.get_loop()
+        try:
+            here = asyncio.get_running_loop()
+        except RuntimeError:
+            here = None
+        if here is loop:
+            self._wake.set()
+        else:
+            # schedule_at/recurring are usually called via asyncio.to_thread
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def _claim(self, query: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+        # atomic claim, so overlapping workers can never fire the same job twice
+        return self._coll().find_one_and_update(
+            query,
+            {"$set": {"status": "running", "started_at": now, "fence": leader.token,
+                      "holder": leader.instance_id}},
+            sort=[("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _claim_due(self, now: datetime) -> Optional[Dict[str, Any]]:
+        return self._claim({"status": "scheduled", "run_at": {"$lte": now}}, now)
+
+    def _record(
+        self,
+        doc: Dict[str, Any],
+        outcome: str,
+        started: Optional[datetime],
+        duration: Optional[float],
+        error: Optional[str],
+    ) -> None:
+        now = _utcnow()
+        sets: Dict[str, Any] = {"last_status": outcome, "last_error": error}
+        inc: Dict[str, int] = {}
+        if started is not None:
+            sets["last_run_at"] = started
+            sets["last_duration"] = duration
+            inc["runs"] = 1
+        if outcome == "failed":
+            inc["failures"] = 1
+
+        if doc.get("cron"):
+            # coalesce: skip every fire time that has already passed (a manual run
+            # keeps the stored one unless it fell due meanwhile)
+            sets["run_at"] = next_fire_time(doc["cron"], doc.get("tz") or DEFAULT_TZ, now)
+            if sets["run_at"]:
+                sets["status"] = "scheduled"
+            else:
+                sets["status"] = "finished"
+                sets["finished_at"] = now
+        else:
+            sets["status"] = outcome
+            sets["finished_at"] = now
+
+        update: Dict[str, Any] = {"$set": sets}
+        if inc:
+            update["$inc"] = inc
+        # fenced: if a newer leader has re-claimed the job since, this write is dropped
+        self._coll().update_one({"_id": doc["_id"], "fence": doc.get("fence")}, update)
+
+    def _release(self, doc: Dict[str, Any]) -> None:
+        self._coll().update_one(
+            {"_id": doc["_id"], "fence": doc.get("fence"), "status": "running"},
+            {"$set": {"status": "scheduled"}},
+        )
+
+    def _requeue_interrupted(self, token: int) -> int:
+        # jobs another process claimed under an older lease (dead or deposed worker)
+        # go back in the queue; ours are still executing, and manual claims
+        # (fence None) belong to whoever ran /runjob
+        res = self._coll().update_many(
+            {"status": "running", "fence": {"$lt": token}, "holder": {"$ne": leader.instance_id}},
+            {"$set": {"status": "scheduled"}},
+        )
+        return res.modified_count
+
+    def _next_run_at(self) -> Optional[datetime]:
+        doc = self._coll().find_one(
+            {"status": "scheduled", "run_at": {"$ne": None}}, {"run_at": 1}, sort=[("run_at", ASCENDING)]
+        )
+        return _aware(doc["run_at"]) if doc else None
+
+    async def _execute(self, doc: Dict[str, Any], manual: bool = False) -> None:
+        job_id, kind = doc["_id"], doc.get("kind")
+        if not manual:
+            late = (_utcnow() - _aware(doc["run_at"])).total_seconds()
+            grace = float(doc.get("misfire_grace", MISFIRE_GRACE_SECONDS))
+            if late > grace:
+                log.warning("scheduler: job %s missed by %.0fs (grace %.0fs), skipping", job_id, late, grace)
+                await asyncio.to_thread(self._record, doc, "missed", None, None, None)
+                return
+
+        if not manual and not await leader.verify():
+            log.warning("scheduler: lost leadership before running job %s, releasing it", job_id)
+            await asyncio.to_thread(self._release, doc)
+            return
+
+        fn = self._tasks.get(kind)
+        if fn is None:
+            log.warning("scheduler: no task registered for kind %r (job %s)", kind, job_id)
+            await asyncio.to_thread(self._record, doc, "failed", None, None, f"unknown kind {kind!r}")
+            return
+
+        started, t0 = _utcnow(), time.perf_counter()
+        outcome, error = "done", None
+        try:
+            await fn(self._client, doc.get("payload") or {})
+        except Exception as e:
+            log.exception("scheduler: job %s (%s) failed", job_id, kind)
+            outcome, error = "failed", f"{type(e).__name__}: {e}"
+        duration = time.perf_counter() - t0
+        metrics.observe("job", kind, duration, outcome == "failed")
+        log.info("scheduler: job %s (%s) %s in %.2fs%s", job_id, kind, outcome, duration, " [manual]" if manual else "")
+        await asyncio.to_thread(self._record, doc, outcome, started, duration, error)
+
+    async def _run_forever(self) -> None:
+        self._wake = asyncio.Event()
+        # wait until pyrogram has finished start() so sends work
+        while not getattr(self._client, "is_initialized", False):
+            await asyncio.sleep(1)
+        log.info("scheduler: running (poll=%ss, misfire_grace=%ss)", POLL_SECONDS, MISFIRE_GRACE_SECONDS)
+        requeued_for: Optional[int] = None
+
+        while True:
+            if not leader.is_leader():
+                # standby: keep serving handlers, wait for the lease
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=leader.heartbeat)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                if requeued_for != leader.token:
+                    requeued = await asyncio.to_thread(self._requeue_interrupted, leader.token)
+                    requeued_for = leader.token
+                    if requeued:
+                        log.warning("scheduler: requeued %d job(s) left running by a previous leader", requeued)
+                while leader.is_leader():
+                    doc = await asyncio.to_thread(self._claim_due, _utcnow())
+                    if not doc:
+                        break
+                    # run concurrently; one slow job must not hold up the rest
+                    task = asyncio.get_running_loop().create_task(self._execute(doc))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+                nxt = await asyncio.to_thread(self._next_run_at)
+            except Exception:
+                log.exception("scheduler: poll failed")
+                nxt = None
+
+            delay = POLL_SECONDS
+            if nxt is not None:
+                delay = max(0.0, min(delay, (nxt - _utcnow()).total_seconds()))
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+scheduler = Scheduler()
+
+
+@on_init("scheduler.indexes")
+def _ensure_indexes() -> None:
+    scheduler.ensure_indexes()
+
+
+def utc_from_local(dt: datetime, tz_name: str = DEFAULT_TZ) -> datetime:
+    """Helper for commands that accept local wall-clock times."""
+    import pytz
+
+    local = pytz.timezone(tz_name)
+    if dt.tzinfo is None:
+        dt = local.localize(dt)
+    return dt.astimezone(timezone.utc)
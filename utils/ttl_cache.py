@@ -0,0 +1,86 @@
+# utils/ttl_cache.py
+"""
+Small in-memory expiry and eviction structures for hot handler paths.
+
+TTLSet keeps keys in insertion-time order (OrderedDict), so expiring old
+entries only ever looks at the front: amortized O(1) per operation instead
+of scanning the whole dict on every event.
+"""
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+class TTLSet:
+    def __init__(self, ttl: float, maxsize: int = 50_000):
+        self.ttl = float(ttl)
+        self.maxsize = max(1, int(maxsize))
+        self._items: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        items = self._items
+        cutoff = now - self.ttl
+        while items:
+            key, ts = next(iter(items.items()))
+            if ts > cutoff and len(items) <= self.maxsize:
+                break
+            items.popitem(last=False)
+
+    def seen(self, key: Hashable, now: Optional[float] = None) -> bool:
+        """
+        True if `key` was added within the last `ttl` seconds.
+        Otherwise record it (as of `now`) and return False.
+        """
+        now = time.time() if now is None else now
+        self._expire(now)
+        if key in self._items:
+            return True
+        self._items[key] = now
+        return False
+
+    def discard(self, key: Hashable) -> None:
+        self._items.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        self._expire(time.time())
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used key when full."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = max(1, int(maxsize))
+        self._items: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        try:
+            self._items.move_to_end(key)
+        except KeyError:
+            return default
+        return self._items[key]
+
+    def put(self, key: Hashable, value) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable, default=None):
+        return self._items.pop(key, default)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def items(self):
+        """Snapshot of (key, value) pairs, oldest first; does not touch recency."""
+        return list(self._items.items())
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
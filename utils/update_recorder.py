@@ -0,0 +1,273 @@
+# utils/update_recorder.py
+"""
+Opt-in recorder of incoming updates, for offline replay (python -m bench.replay).
+
+Set UPDATE_RECORD_PATH to enable it. Messages, callback queries and
+chat-member updates are then appended to that file as JSON lines (gzip if the
+path ends in .gz). Each line holds the arrival time and just enough of the
+update to rebuild it against the fake client.
+
+PII is scrubbed before anything leaves the process:
+  - user and chat ids are replaced by stable keyed pseudonyms (HMAC), except
+    staff (OWNER_ID / SUPER_ADMINS / MODELS) and configured sanctuary
+    groups, so permission checks and group filters still behave on replay
+  - names and usernames are dropped (pseudonymous placeholders instead)
+  - text keeps its /command, short numbers (amounts, menu choices),
+    punctuation and length; letters are masked, long numbers are
+    pseudonymised like ids, and links, emails and @mentions are replaced
+  - callback data keeps its shape; long numeric ids in it are pseudonymised
+
+Writes go through a queue to a daemon thread, so the loop never waits on disk.
+
+Env:
+  UPDATE_RECORD_PATH        file to append to (unset = recorder off)
+  UPDATE_RECORD_SALT        pseudonym key (default: random per process)
+  UPDATE_RECORD_MAX_EVENTS  stop recording after this many (default 1000000)
+  UPDATE_RECORD_KEEP_IDS    extra comma-separated ids to keep in the clear
+"""
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Set
+
+from utils.roles import roles
+
+log = logging.getLogger(__name__)
+
+PATH = os.getenv("UPDATE_RECORD_PATH", "")
+MAX_EVENTS = int(os.getenv("UPDATE_RECORD_MAX_EVENTS", "1000000"))
+FORMAT_VERSION = 1
+# runs before every other group, so each update is seen exactly once
+RECORD_GROUP = -1000
+
+_LONG_NUM = re.compile(r"-?\d{6,}")
+_TEXT_TOKENS = re.compile(
+    r"(?P<url>(?:https?://|t\.me/)\S+)"
+    r"|(?P<email>[\w.+-]+@[\w-]+\.[\w.]+)"
+    r"|(?P<mention>@\w+)"
+    r"|(?P<num>-?\d{6,})"
+)
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def _parse_ids(raw: Optional[str]) -> Set[int]:
+    out: Set[int] = set()
+    for part in (raw or "").replace(" ", "").split(","):
+        if part.lstrip("-").isdigit():
+            out.add(int(part))
+    return out
+
+
+def _default_keep() -> Set[int]:
+    # staff from the shared role table (owner, super admins, models), plus the groups
+    keep = set(roles.table.staff) | {roles.owner_id}
+    for key in ("SANCTUARY_GROUP_IDS", "SUCCUBUS_SANCTUARY", "SANCTUARY_CHAT_ID", "UPDATE_RECORD_KEEP_IDS"):
+        keep |= _parse_ids(os.getenv(key))
+    return keep
+
+
+class Scrubber:
+    def __init__(self, salt: bytes, keep: Iterable[int] = ()):
+        self._salt = salt
+        self.keep = set(keep)
+
+    def _digest(self, s: str) -> int:
+        return int.from_bytes(hmac.new(self._salt, s.encode(), hashlib.sha256).digest()[:8], "big")
+
+    def pid(self, value: Optional[int]) -> Optional[int]:
+        """Stable pseudonym for a user or chat id; keeps the sign and -100 supergroup shape."""
+        if value is None or value in self.keep:
+            return value
+        h = self._digest(str(value))
+        if value < 0:
+            return -(1_000_000_000_000 + h % 10**10)
+        return 10**10 + h % 10**9
+
+    def name(self, user_id: Optional[int]) -> str:
+        return f"User{str(self.pid(user_id) or 0)[-4:]}"
+
+    def data(self, data: Optional[str]) -> Optional[str]:
+        if not data:
+            return data
+        return _LONG_NUM.sub(lambda m: str(self.pid(int(m.group()))), data)
+
+    def text(self, text: Optional[str]) -> Optional[str]:
+        if not text:
+            return text
+        head = ""
+        if text[0] in "/!":
+            cmd, sep, text = text.partition(" ")
+            head = cmd + sep
+        out, pos = [head], 0
+        for m in _TEXT_TOKENS.finditer(text):
+            out.append(_LETTER.sub(lambda c: "X" if c.group().isupper() else "x", text[pos:m.start()]))
+            kind = m.lastgroup
+            if kind == "num":
+                out.append(str(self.pid(int(m.group()))))
+            elif kind == "mention":
+                out.append(f"@u{self._digest(m.group().lower()) % 10**6}")
+            else:
+                out.append(f"<{kind}>")
+            pos = m.end()
+        out.append(_LETTER.sub(lambda c: "X" if c.group().isupper() else "x", text[pos:]))
+        return "".join(out)
+
+    def user(self, u) -> Optional[dict]:
+        if u is None:
+            return None
+        d = {"id": self.pid(u.id), "fn": self.name(u.id)}
+        if u.is_bot:
+            d["bot"] = True
+        if u.username:
+            d["un"] = f"u{d['id']}"
+        return d
+
+    def chat(self, c) -> Optional[dict]:
+        if c is None:
+            return None
+        return {"id": self.pid(c.id), "type": getattr(c.type, "name", str(c.type)).lower()}
+
+
+def _status(member) -> Optional[str]:
+    if member is None:
+        return None
+    return getattr(member.status, "name", str(member.status)).lower()
+
+
+class UpdateRecorder:
+    def __init__(self, path: str, scrubber: Scrubber, max_events: int = MAX_EVENTS):
+        self.path = path
+        self.scrubber = scrubber
+        self.max_events = max_events
+        self.count = 0
+        self.dropped = 0
+        self._t0 = time.monotonic()
+        self._q: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- encoding ----------
+
+    def _line(self, kind: str, **fields) -> None:
+        if self.count >= self.max_events:
+            self.dropped += 1
+            return
+        self.count += 1
+        fields = {k: v for k, v in fields.items() if v not in (None, "", [], False)}
+        self._q.put(json.dumps({"t": round(time.monotonic() - self._t0, 4), "k": kind, **fields},
+                               ensure_ascii=False, separators=(",", ":")))
+
+    def message(self, m) -> None:
+        s = self.scrubber
+        media = getattr(m.media, "name", None)
+        self._line(
+            "msg",
+            chat=s.chat(m.chat),
+            user=s.user(m.from_user),
+            text=s.text(m.text),
+            caption=s.text(m.caption),
+            media=media.lower() if media else None,
+            reply=bool(m.reply_to_message_id),
+            joined=[s.user(u) for u in (m.new_chat_members or [])],
+            left=s.user(m.left_chat_member),
+        )
+
+    def callback(self, cq) -> None:
+        s = self.scrubber
+        self._line(
+            "cb",
+            chat=s.chat(cq.message.chat) if cq.message else None,
+            user=s.user(cq.from_user),
+            data=s.data(cq.data if isinstance(cq.data, str) else None),
+        )
+
+    def member(self, upd) -> None:
+        s = self.scrubber
+        target = (upd.new_chat_member or upd.old_chat_member)
+        self._line(
+            "cmu",
+            chat=s.chat(upd.chat),
+            user=s.user(upd.from_user),
+            target=s.user(target.user if target else None),
+            old=_status(upd.old_chat_member),
+            new=_status(upd.new_chat_member),
+        )
+
+    # ---------- writer ----------
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, "at", encoding="utf-8")
+        return open(self.path, "a", encoding="utf-8")
+
+    def _write_forever(self) -> None:
+        with self._open() as f:
+            f.write(json.dumps({"k": "hdr", "v": FORMAT_VERSION,
+                                "started": datetime.now(timezone.utc).isoformat()}) + "\n")
+            while True:
+                line = self._q.get()
+                if line is None:
+                    break
+                f.write(line + "\n")
+                # batch whatever else is already queued before flushing
+                while True:
+                    try:
+                        line = self._q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if line is None:
+                        return
+                    f.write(line + "\n")
+                f.flush()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_forever, name="update-recorder", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._q.put(None)
+
+
+recorder: Optional[UpdateRecorder] = None
+
+
+def install(app) -> Optional[UpdateRecorder]:
+    """
+    If UPDATE_RECORD_PATH is set, record every message / callback / member
+    update reaching `app`. Call before callback_router and metrics are
+    installed so the recorder neither routes nor times itself.
+    """
+    global recorder
+    if not PATH or recorder is not None:
+        return recorder
+
+    from pyrogram.handlers import CallbackQueryHandler, ChatMemberUpdatedHandler, MessageHandler
+
+    salt = (os.getenv("UPDATE_RECORD_SALT") or secrets.token_hex(16)).encode()
+    recorder = UpdateRecorder(PATH, Scrubber(salt, _default_keep()))
+
+    def _safe(fn):
+        async def handler(client, update):
+            try:
+                fn(update)
+            except Exception as e:
+                log.debug("update_recorder: skipped update: %s", e)
+        return handler
+
+    app.add_handler(MessageHandler(_safe(recorder.message)), RECORD_GROUP)
+    app.add_handler(CallbackQueryHandler(_safe(recorder.callback)), RECORD_GROUP)
+    app.add_handler(ChatMemberUpdatedHandler(_safe(recorder.member)), RECORD_GROUP)
+    recorder.start()
+    log.info("update_recorder: recording to %s (max %d events, %d ids kept in clear)",
+             PATH, recorder.max_events, len(recorder.scrubber.keep))
+    return recorder
@@ -0,0 +1,300 @@
+# utils/user_profiles.py
+"""
+Who is user N? First name, username and last-seen time, without asking
+Telegram once per user.
+
+- Filled for free from every update the bot sees (install(app) adds one
+  observer per update type in an early group).
+- Misses are looked up in the persisted store first, then resolved with
+  batched get_users calls of up to 200 ids.
+- Entries are fresh for USER_PROFILE_TTL_HOURS; stale ones are refreshed on
+  the next resolve() but still used as a fallback if Telegram fails. Ids
+  Telegram can't resolve are not retried for USER_PROFILE_MISS_TTL_MINUTES.
+- Changes are written behind in batches every USER_PROFILE_FLUSH_SECONDS
+  (started by attach(client)), so observing updates never touches the DB.
+
+- Uses MongoDB when available (collection "user_profiles", unique on user_id).
+- Falls back to an atomic JSON file at USER_PROFILE_PATH (default data/user_profiles.json).
+
+Usage:
+    from utils.user_profiles import profiles
+
+    await profiles.resolve(client, ids)          # one batched pass for a whole list
+    name = profiles.first_name(uid, "darling")   # memory only
+
+Env:
+  MONGODB_URI / MONGO_URI / MONGO_URL, MONGO_DB_NAME   (default "succubot")
+  USER_PROFILE_TTL_HOURS                 (default 24)
+  USER_PROFILE_MISS_TTL_MINUTES          (default 60)
+  USER_PROFILE_CACHE                     (default 50000 users in memory)
+  USER_PROFILE_FLUSH_SECONDS             (default 60)
+  USER_PROFILE_PATH                      (default data/user_profiles.json)
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.boot import on_init
+from utils.ttl_cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+_MONGO_URI = os.getenv("MONGODB_URI") or os.getenv("MONGO_URI") or os.getenv("MONGO_URL")
+_MONGO_DB = os.getenv("MONGO_DB_NAME", "succubot")
+_JSON_PATH = os.getenv("USER_PROFILE_PATH", "data/user_profiles.json")
+
+TTL = float(os.getenv("USER_PROFILE_TTL_HOURS", "24")) * 3600
+MISS_TTL = float(os.getenv("USER_PROFILE_MISS_TTL_MINUTES", "60")) * 60
+CACHE_SIZE = int(os.getenv("USER_PROFILE_CACHE", "50000"))
+FLUSH_SECONDS = float(os.getenv("USER_PROFILE_FLUSH_SECONDS", "60"))
+BATCH = 200                     # get_users accepts at most 200 ids per call
+SEEN_RESOLUTION = 600           # last_seen only counts as a change every 10 min
+# after the recorder, request context and roles stages; before handler modules
+PROFILES_GROUP = -450
+
+
+class UserProfiles:
+    def __init__(self):
+        self._lock = threading.RLock()
+        # user_id -> {"user_id", "first_name", "username", "last_seen", "updated_at"[, "missing"]}
+        self._cache = LRUCache(CACHE_SIZE)
+        self._dirty: set = set()
+        self._task = None
+        self._col = None
+
+        if _MONGO_URI:
+            try:
+                from pymongo import MongoClient
+
+                self._col = MongoClient(_MONGO_URI)[_MONGO_DB]["user_profiles"]
+            except Exception as e:
+                log.warning("UserProfiles: Mongo unavailable, using JSON: %s", e)
+                self._col = None
+
+        if self._col is None:
+            self._load_json()
+
+    # ---------- reads (memory only) ----------
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        rec = self._cache.get(user_id)
+        return None if rec is None or rec.get("missing") else rec
+
+    def first_name(self, user_id: int, default: str = "") -> str:
+        rec = self.get(user_id)
+        return (rec or {}).get("first_name") or default
+
+    def label(self, user_id: int) -> str:
+        """'Name (@username)', falling back to the bare id."""
+        rec = self.get(user_id) or {}
+        name = rec.get("first_name") or str(user_id)
+        return f"{name} (@{rec['username']})" if rec.get("username") else name
+
+    # ---------- writes ----------
+
+    def observe(self, user) -> None:
+        """Record a pyrogram User seen in an update. Cheap; no I/O."""
+        if user is None or getattr(user, "is_bot", False) or not getattr(user, "id", None):
+            return
+        now = time.time()
+        first, uname = user.first_name or "", user.username or ""
+        with self._lock:
+            rec = self._cache.get(user.id)
+            if (rec is not None and not rec.get("missing")
+                    and rec.get("first_name") == first and rec.get("username") == uname
+                    and now - rec.get("last_seen", 0) < SEEN_RESOLUTION):
+                return
+            self._cache.put(user.id, {"user_id": user.id, "first_name": first, "username": uname,
+                                      "last_seen": now, "updated_at": now})
+            self._dirty.add(user.id)
+
+    def _remember_fetched(self, user) -> None:
+        with self._lock:
+            old = self._cache.get(user.id) or {}
+            self._cache.put(user.id, {"user_id": user.id, "first_name": user.first_name or "",
+                                      "username": user.username or "",
+                                      "last_seen": old.get("last_seen", 0), "updated_at": time.time()})
+            self._dirty.add(user.id)
+
+    def _remember_missing(self, user_id: int) -> None:
+        with self._lock:
+            old = self._cache.get(user_id)
+            if old is not None and not old.get("missing"):
+                return                           # keep the stale name as a fallback
+            self._cache.put(user_id, {"user_id": user_id, "missing": True, "updated_at": time.time()})
+
+    # ---------- resolving ----------
+
+    def _fresh(self, rec: Optional[Dict[str, Any]], now: float) -> bool:
+        if rec is None:
+            return False
+        return now - rec.get("updated_at", 0) < (MISS_TTL if rec.get("missing") else TTL)
+
+    def _load_many(self, ids: List[int]) -> None:
+        docs = self._col.find({"user_id": {"$in": ids}}, {"_id": 0})
+        with self._lock:
+            for d in docs:
+                if d.get("user_id") is not None and d["user_id"] not in self._cache:
+                    self._cache.put(d["user_id"], d)
+
+    async def _fetch(self, client, ids: List[int]) -> None:
+        from pyrogram.errors import FloodWait
+
+        for attempt in (1, 2):
+            try:
+                users = await client.get_users(ids)
+                break
+            except FloodWait as e:
+                if attempt == 2:
+                    log.warning("UserProfiles: FloodWait resolving %d ids; using cached names", len(ids))
+                    return
+                await asyncio.sleep(float(getattr(e, "value", 1) or 1))
+            except Exception as e:
+                # one unknown peer fails the whole call: halve and retry so only
+                # the ids that really fail are parked for MISS_TTL
+                if len(ids) > 1:
+                    mid = len(ids) // 2
+                    await self._fetch(client, ids[:mid])
+                    await self._fetch(client, ids[mid:])
+                else:
+                    log.info("UserProfiles: get_users(%s) failed: %s", ids[0], e)
+                    self._remember_missing(ids[0])
+                return
+        if not isinstance(users, list):
+            users = [users]
+        got = set()
+        for u in users:
+            if u is not None:
+                self._remember_fetched(u)
+                got.add(u.id)
+        for uid in ids:
+            if uid not in got:
+                self._remember_missing(uid)
+
+    async def resolve(self, client, ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Profiles for `ids`: memory, then the store, then get_users in batches of 200.
+        Ids that can't be resolved are left out (stale entries are returned as-is).
+        """
+        want = list(dict.fromkeys(int(i) for i in ids if i))
+        now = time.time()
+        missing = [uid for uid in want if not self._fresh(self._cache.get(uid), now)]
+
+        if missing and self._col is not None:
+            try:
+                await asyncio.to_thread(self._load_many, missing)
+            except Exception as e:
+                log.warning("UserProfiles: store lookup failed: %s", e)
+            missing = [uid for uid in missing if not self._fresh(self._cache.get(uid), now)]
+
+        for i in range(0, len(missing), BATCH):
+            await self._fetch(client, missing[i:i + BATCH])
+
+        out: Dict[int, Dict[str, Any]] = {}
+        for uid in want:
+            rec = self.get(uid)
+            if rec is not None:
+                out[uid] = rec
+        return out
+
+    # ---------- persistence ----------
+
+    def flush(self) -> int:
+        """Write dirty profiles (sync; one bulk write). Returns how many were written."""
+        with self._lock:
+            ids, self._dirty = self._dirty, set()
+            recs = [r for r in (self._cache.get(uid) for uid in ids) if r and not r.get("missing")]
+        if not recs:
+            return 0
+        try:
+            if self._col is not None:
+                from pymongo import UpdateOne
+
+                self._col.bulk_write(
+                    [UpdateOne({"user_id": r["user_id"]}, {"$set": r}, upsert=True) for r in recs],
+                    ordered=False,
+                )
+            else:
+                self._save_json()
+        except Exception as e:
+            log.warning("UserProfiles: flush of %d profiles failed: %s", len(recs), e)
+            with self._lock:
+                self._dirty.update(r["user_id"] for r in recs)
+            return 0
+        return len(recs)
+
+    async def _flush_forever(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS)
+            await asyncio.to_thread(self.flush)
+
+    def attach(self, client) -> None:
+        """Start the write-behind flusher on the client's loop (idempotent)."""
+        if self._task is None:
+            self._task = client.loop.create_task(self._flush_forever())
+
+    # ---------- json helpers ----------
+
+    def _load_json(self) -> None:
+        try:
+            with open(_JSON_PATH, "r", encoding="utf-8") as f:
+                for rec in (json.load(f) or {}).values():
+                    self._cache.put(int(rec["user_id"]), rec)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning("UserProfiles: failed to load JSON: %s", e)
+
+    def _save_json(self) -> None:
+        with self._lock:
+            data = {str(uid): rec for uid, rec in self._cache.items() if not rec.get("missing")}
+        os.makedirs(os.path.dirname(_JSON_PATH) or ".", exist_ok=True)
+        tmp = _JSON_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, _JSON_PATH)
+
+
+profiles = UserProfiles()
+
+
+@on_init("user_profiles.indexes")
+def _ensure_indexes():
+    # every resolve() is a user_id $in and every flush an upsert by user_id
+    if profiles._col is not None:
+        profiles._col.create_index("user_id", unique=True)
+
+
+def install(app) -> None:
+    """Observe the sender of every message, button press, inline query and member change."""
+    if getattr(app, "_succu_user_profiles", False):
+        return
+    from pyrogram.handlers import (
+        CallbackQueryHandler,
+        ChatMemberUpdatedHandler,
+        InlineQueryHandler,
+        MessageHandler,
+    )
+
+    async def _on_message(client, m):
+        profiles.observe(m.from_user)
+        for u in m.new_chat_members or ():
+            profiles.observe(u)
+
+    async def _on_sender(client, update):
+        profiles.observe(update.from_user)
+
+    async def _on_member(client, ev):
+        member = ev.new_chat_member or ev.old_chat_member
+        profiles.observe(member.user if member else None)
+        profiles.observe(ev.from_user)
+
+    app.add_handler(MessageHandler(_on_message), PROFILES_GROUP)
+    app.add_handler(CallbackQueryHandler(_on_sender), PROFILES_GROUP)
+    app.add_handler(InlineQueryHandler(_on_sender), PROFILES_GROUP)
+    app.add_handler(ChatMemberUpdatedHandler(_on_member), PROFILES_GROUP)
+    app._succu_user_profiles = True